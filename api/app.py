@@ -0,0 +1,135 @@
+"""
+HTTP API для Mini App: пакетне завантаження GPS точок та статистика
+"""
+
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel, Field
+
+from api.auth import WebAppUser, current_user
+from config import config
+from services.location_pipeline import LocationPipeline, location_pipeline
+from services.stats_service import UserStatsService, user_stats_service
+from services.user_directory import UserDirectory, user_directory
+from utils.logger import log_sampler, setup_logger
+from utils.timestamps import now_ms
+
+logger = setup_logger()
+
+MINI_APP_DIR = Path(__file__).resolve().parent.parent / "mini_app"
+
+# Допустиме випередження годинника телефона
+MAX_CLOCK_SKEW_MS = 60_000
+
+UNREGISTERED_DETAIL = "Користувача не зареєстровано, надішліть /start боту"
+
+class LocationPoint(BaseModel):
+    """Точка з буфера Mini App"""
+    latitude: float
+    longitude: float
+    accuracy: Optional[float] = None
+    timestamp: int  # мс епохи, час вимірювання на пристрої
+
+class LocationBatch(BaseModel):
+    """Пакет точок, накопичених між відправками"""
+    points: List[LocationPoint] = Field(min_length=1)
+
+class BatchResult(BaseModel):
+    """Підсумок обробки пакета"""
+    received: int
+    accepted: int
+    invalid: int
+    distance_km: float
+    points_earned: int
+    total_points: int
+
+def _allowed_origins() -> List[str]:
+    parts = urlsplit(config.MINI_APP_URL)
+    return [f"{parts.scheme}://{parts.netloc}"] if parts.scheme and parts.netloc else []
+
+def create_api_app(
+    pipeline: Optional[LocationPipeline] = None,
+    stats: Optional[UserStatsService] = None,
+    directory: Optional[UserDirectory] = None
+) -> FastAPI:
+    """FastAPI застосунок з API локацій, статистики та статикою Mini App"""
+
+    pipeline = pipeline or location_pipeline
+    stats = stats or user_stats_service
+    directory = directory if directory is not None else user_directory
+
+    async def internal_user_id(user: WebAppUser = Depends(current_user)) -> int:
+        """user_id користувача Mini App; 404, якщо він ще не писав боту"""
+
+        user_id = await directory.resolve(user.telegram_id)
+        if user_id is None:
+            raise HTTPException(status_code=404, detail=UNREGISTERED_DETAIL)
+        return user_id
+    app = FastAPI(title="Fitness Bot API", docs_url=None, redoc_url=None)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=_allowed_origins(),
+        allow_methods=["GET", "POST"],
+        allow_headers=["Authorization", "Content-Type", "If-None-Match"],
+        expose_headers=["ETag"]
+    )
+
+    @app.post("/api/locations", response_model=BatchResult)
+    async def upload_locations(
+        batch: LocationBatch,
+        user: WebAppUser = Depends(current_user),
+        user_id: int = Depends(internal_user_id)
+    ):
+        """Пакет точок користувача через той самий конвеєр, що й локації з чату"""
+
+        if len(batch.points) > config.API_MAX_BATCH_POINTS:
+            raise HTTPException(status_code=413, detail=f"Не більше {config.API_MAX_BATCH_POINTS} точок у пакеті")
+
+        latest_allowed = now_ms() + MAX_CLOCK_SKEW_MS
+        points = [point for point in batch.points if point.timestamp <= latest_allowed]
+
+        results = await pipeline.process_many(user_id, points) if points else []
+
+        accepted = [result for result in results if result.accepted]
+        summary = BatchResult(
+            received=len(batch.points),
+            accepted=len(accepted),
+            invalid=len(batch.points) - len(accepted),
+            distance_km=round(sum(result.distance_km for result in accepted), 3),
+            points_earned=sum(result.points_earned for result in accepted),
+            total_points=accepted[-1].total_points if accepted else 0
+        )
+
+        log_sampler.info(
+            ("api.locations", user_id),
+            "📦 Пакет локацій від користувача {}: {}/{} точок, {:.2f} км",
+            user.telegram_id, summary.accepted, summary.received, summary.distance_km
+        )
+        return summary
+
+    @app.get("/api/stats")
+    async def get_stats(
+        user_id: int = Depends(internal_user_id),
+        if_none_match: Optional[str] = Header(default=None)
+    ):
+        """Статистика користувача; 304, якщо з останнього опитування нічого не змінилось"""
+
+        payload = await stats.get(user_id)
+
+        # no-cache: браузер зберігає відповідь, але щоразу перепитує за ETag
+        headers = {"ETag": payload.etag, "Cache-Control": "private, no-cache"}
+        if payload.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=payload.body, media_type="application/json", headers=headers)
+
+    if MINI_APP_DIR.is_dir():
+        app.mount("/mini_app", StaticFiles(directory=MINI_APP_DIR, html=True), name="mini_app")
+
+    return app
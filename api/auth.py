@@ -0,0 +1,90 @@
+"""
+Перевірка initData Telegram Mini App
+"""
+
+import hashlib
+import hmac
+import json
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from fastapi import Header, HTTPException
+
+from config import config
+
+AUTH_SCHEME = "tma"
+
+class InitDataError(ValueError):
+    """Некоректний або прострочений initData"""
+
+@dataclass
+class WebAppUser:
+    """Користувач, підтверджений підписом initData"""
+    telegram_id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    auth_date: int = 0
+
+@lru_cache(maxsize=4)
+def _secret_key(bot_token: str) -> bytes:
+    return hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+
+def verify_init_data(
+    init_data: str,
+    bot_token: str,
+    max_age_seconds: int = 86400,
+    now: Optional[float] = None
+) -> WebAppUser:
+    """
+    Перевірка підпису initData за алгоритмом Telegram.
+
+    hash = HMAC_SHA256(HMAC_SHA256("WebAppData", bot_token), data_check_string),
+    де data_check_string - усі поля крім hash, відсортовані та з'єднані "\\n".
+    """
+
+    try:
+        fields = dict(parse_qsl(init_data, keep_blank_values=True, strict_parsing=True))
+    except ValueError as e:
+        raise InitDataError("initData не розібрано") from e
+
+    received_hash = fields.pop("hash", None)
+    if not received_hash:
+        raise InitDataError("initData без hash")
+
+    data_check_string = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    expected_hash = hmac.new(_secret_key(bot_token), data_check_string.encode(), hashlib.sha256).hexdigest()
+
+    if not hmac.compare_digest(expected_hash, received_hash):
+        raise InitDataError("Невірний підпис initData")
+
+    try:
+        auth_date = int(fields.get("auth_date", 0))
+        user = json.loads(fields["user"])
+        telegram_id = int(user["id"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise InitDataError("initData без користувача") from e
+
+    if max_age_seconds and (now if now is not None else time.time()) - auth_date > max_age_seconds:
+        raise InitDataError("initData прострочено")
+
+    return WebAppUser(
+        telegram_id=telegram_id,
+        username=user.get("username"),
+        first_name=user.get("first_name"),
+        auth_date=auth_date
+    )
+
+async def current_user(authorization: str = Header(default="")) -> WebAppUser:
+    """Залежність FastAPI: користувач із заголовка "Authorization: tma <initData>" """
+
+    scheme, _, init_data = authorization.partition(" ")
+    if scheme.lower() != AUTH_SCHEME or not init_data:
+        raise HTTPException(status_code=401, detail="Потрібен initData")
+
+    try:
+        return verify_init_data(init_data, config.BOT_TOKEN, config.INIT_DATA_MAX_AGE_SECONDS)
+    except InitDataError as e:
+        raise HTTPException(status_code=401, detail=str(e))
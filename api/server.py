@@ -0,0 +1,76 @@
+"""
+Запуск HTTP API в циклі подій бота
+"""
+
+import asyncio
+import socket
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+class ApiServer:
+    """
+    uvicorn сервер як фонова задача.
+
+    API працює в тому ж процесі та циклі подій, що й бот, тому пакети з
+    Mini App потрапляють у спільні черги запису, кеш стану та таблиці
+    результатів змагань. Сокет відкривається тут, а не в uvicorn: при
+    помилці запуску uvicorn викликає sys.exit, що зупинило б і бота.
+    """
+
+    def __init__(self, app: FastAPI, host: str = "0.0.0.0", port: int = 8000):
+        self.host = host
+        self.port = port
+        self._server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        # Сигнали обробляє головний цикл бота
+        self._server.install_signal_handlers = lambda: None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> bool:
+        """Запуск сервера у фоні; False, якщо адреса недоступна (бот працює далі без API)"""
+
+        if self._task is not None:
+            return True
+
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        try:
+            sock = socket.create_server((self.host, self.port), family=family)
+        except OSError as e:
+            logger.error(f"❌ API Mini App не запущено: {self.host}:{self.port} недоступний ({e})")
+            return False
+
+        self._task = asyncio.create_task(self._serve(sock), name="api-server")
+
+        # Зупинка до завершення startup лишила б відкритий сервер (uvicorn тоді пропускає shutdown)
+        while not self._server.started and not self._task.done():
+            await asyncio.sleep(0.01)
+
+        if self._task.done():
+            self._task = None
+            logger.error("❌ API Mini App не запущено: помилка запуску застосунку")
+            return False
+
+        logger.info(f"🌐 API Mini App слухає {self.host}:{self.port}")
+        return True
+
+    async def _serve(self, sock: socket.socket):
+        try:
+            await self._server.serve(sockets=[sock])
+        except SystemExit:
+            logger.error("❌ API Mini App зупинився через помилку запуску")
+        finally:
+            sock.close()
+
+    async def stop(self):
+        """Зупинка з завершенням поточних запитів"""
+
+        if self._task is not None:
+            self._server.should_exit = True
+            await self._task
+            self._task = None
+            logger.info("🛑 API Mini App зупинено")
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Мікробенчмарки сервісів та геоматематики з контролем регресій
+
+Кожен запуск працює з тимчасовим файлом SQLite, заповненим синтетичними
+даними. Результат (нс на операцію, найкращий з повторів) зберігається в
+JSON, а режим порівняння завершується з кодом 1, якщо якийсь бенчмарк
+повільніший за базовий більше ніж на --threshold відсотків.
+
+Запуск:
+    python benchmarks.py --save benchmarks_baseline.json
+    python benchmarks.py --compare benchmarks_baseline.json --threshold 20
+    python benchmarks.py --quick --filter route     # швидкий прогін частини
+    pytest -m benchmark                              # порівняння з benchmarks_baseline.json
+"""
+
+import argparse
+import asyncio
+import gc
+import inspect
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+ROUTE_SIZES = [10, 100, 1_000, 10_000]
+RANKING_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUICK_RANKING_SIZES = [1_000, 10_000]
+
+@dataclass
+class Case:
+    """Один бенчмарк: функція без аргументів (синхронна або async)"""
+    name: str
+    fn: Callable[[], Any]
+    # Непідрахована підготовка перед кожним заміром на number викликів
+    prepare: Optional[Callable[[int], Awaitable[None]]] = None
+
+@dataclass
+class BenchResult:
+    name: str
+    ns_per_op: float  # найкращий з повторів
+    median_ns: float
+    iterations: int
+
+    def to_dict(self) -> dict:
+        return {"ns_per_op": self.ns_per_op, "median_ns": self.median_ns, "iterations": self.iterations}
+
+async def _timed(case: Case, number: int) -> float:
+    if case.prepare is not None:
+        await case.prepare(number)
+
+    fn = case.fn
+    # Як і timeit: збирач сміття не запускається посеред заміру через об'єкти інших наборів
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        # Перший виклик визначає, чи функція повертає корутину
+        if inspect.isawaitable(result := fn()):
+            await result
+            for _ in range(number - 1):
+                await fn()
+        else:
+            for _ in range(number - 1):
+                fn()
+        return time.perf_counter() - started
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+async def measure(case: Case, min_time: float, repeat: int) -> BenchResult:
+    """Калібрування кількості викликів під min_time та repeat замірів"""
+
+    number = 1
+    while True:
+        elapsed = await _timed(case, number)
+        if elapsed >= min_time:
+            break
+        # Наближаємось до min_time, але не більше ніж у 10 разів за крок
+        number = max(number + 1, min(number * 10, int(number * min_time / max(elapsed, 1e-9) * 1.2)))
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        samples.append(await _timed(case, number) / number)
+
+    return BenchResult(
+        name=case.name,
+        ns_per_op=min(samples) * 1e9,
+        median_ns=statistics.median(samples) * 1e9,
+        iterations=number
+    )
+
+def _random_route(rng: random.Random, size: int) -> List[tuple]:
+    """Маршрут-ламана випадковим блуканням біля Києва"""
+
+    lat, lon = 50.45, 30.52
+    route = []
+    for _ in range(size):
+        lat += rng.uniform(-0.0005, 0.0005)
+        lon += rng.uniform(-0.0005, 0.0007)
+        route.append((lat, lon))
+    return route
+
+def _loop_route(size: int, radius_deg: float = 0.02) -> List[tuple]:
+    """Замкнений маршрут-коло навколо центру Києва"""
+
+    lat, lon = 50.45, 30.52
+    return [
+        (lat + radius_deg * math.sin(2 * math.pi * i / size), lon + radius_deg * math.cos(2 * math.pi * i / size))
+        for i in range(size + 1)
+    ]
+
+async def geo_suite(rng: random.Random) -> AsyncIterator[Case]:
+    """GpsService: гаверсинус, валідація, відхилення від маршруту"""
+
+    from types import SimpleNamespace
+    from services.gps_service import GpsService
+    from services.route_index import CompiledRoute
+
+    gps = GpsService()
+    a, b = (50.4501, 30.5234), (50.4547, 30.5238)
+    location = SimpleNamespace(latitude=50.4501, longitude=30.5234, accuracy=12.0)
+
+    yield Case("gps.haversine_distance", lambda: gps.haversine_distance(a, b))
+    yield Case("gps.validate_location", lambda: gps.validate_location(location))
+
+    for size in ROUTE_SIZES:
+        route = _random_route(rng, size)
+        probe = (route[size // 2][0] + 0.0003, route[size // 2][1] - 0.0002)
+        compiled = CompiledRoute(route)
+
+        yield Case(
+            f"gps.calculate_route_deviation[route={size}]",
+            lambda route=route, probe=probe: gps.calculate_route_deviation(probe, route)
+        )
+        yield Case(
+            f"route_index.distance_km[route={size}]",
+            lambda compiled=compiled, probe=probe: compiled.distance_km(*probe)
+        )
+
+        # Точка в центрі петлі: всередині меж маршруту, але далеко від усіх відрізків
+        loop = CompiledRoute(_loop_route(size))
+        yield Case(
+            f"route_index.distance_km.loop_center[route={size}]",
+            lambda loop=loop: loop.distance_km(50.45, 30.52)
+        )
+
+async def _seed_rankings(rng: random.Random, start: int, stop: int):
+    """Користувачі start+1..stop з глобальним рейтингом"""
+
+    from database.database import db_pool
+
+    chunk = 50_000
+    async with db_pool.write() as db:
+        for offset in range(start, stop, chunk):
+            user_ids = range(offset + 1, min(offset + chunk, stop) + 1)
+            await db.executemany(
+                "INSERT INTO users (user_id, telegram_id, first_name) VALUES (?, ?, ?)",
+                [(user_id, 1_000_000_000 + user_id, f"User{user_id}") for user_id in user_ids]
+            )
+            await db.executemany(
+                "INSERT INTO rankings (user_id, points, rank_level, updated_at) VALUES (?, ?, 'bronze', 0)",
+                [(user_id, rng.randint(0, 5_000)) for user_id in user_ids]
+            )
+        await db.commit()
+
+async def ranking_suite(rng: random.Random, sizes: List[int]) -> AsyncIterator[Case]:
+    """RankingService: рівень за балами та позиція з таблиці лідерів і з SQL"""
+
+    from services.leaderboard import leaderboard
+    from services.ranking_service import RankingService
+
+    ranking = RankingService()
+    yield Case("ranking.calculate_rank_level", lambda: ranking.calculate_rank_level(742))
+
+    seeded = 0
+    for size in sizes:
+        await _seed_rankings(rng, seeded, size)
+        seeded = size
+
+        probes = [rng.randint(1, size) for _ in range(1024)]
+        cursor = {"index": 0}
+
+        def next_user() -> int:
+            cursor["index"] = (cursor["index"] + 1) % len(probes)
+            return probes[cursor["index"]]
+
+        leaderboard.is_loaded = False
+        yield Case(f"ranking.get_user_ranking.sql[rankings={size}]", lambda: ranking.get_user_ranking(next_user()))
+
+        await leaderboard.load()
+        yield Case(
+            f"ranking.get_user_ranking.leaderboard[rankings={size}]",
+            lambda: ranking.get_user_ranking(next_user())
+        )
+
+async def competition_suite(rng: random.Random) -> AsyncIterator[Case]:
+    """CompetitionService: створення, приєднання та завершення змагань"""
+
+    from database.database import db_pool
+    from services.competition_service import CompetitionService
+
+    service = CompetitionService()
+    route = _random_route(rng, 100)
+
+    async with db_pool.read() as db:
+        cursor = await db.execute("SELECT MAX(user_id) FROM users")
+        max_user_id = (await cursor.fetchone())[0] or 0
+    if max_user_id < 1000:
+        await _seed_rankings(rng, max_user_id, 1000)
+        max_user_id = 1000
+
+    yield Case("competition.create", lambda: service.create_competition(None, "sprint", 30, route))
+
+    target = {"competition_id": await service.create_competition(None, "endurance", 90), "user_id": 0}
+
+    async def join():
+        target["user_id"] += 1
+        if target["user_id"] > max_user_id:
+            target["competition_id"] = await service.create_competition(None, "endurance", 90)
+            target["user_id"] = 1
+        await service.join_competition(target["user_id"], target["competition_id"])
+
+    yield Case("competition.join", join)
+
+    pending: List[int] = []
+
+    async def prepare_end(number: int):
+        pending.clear()
+        for _ in range(number):
+            pending.append(await service.create_competition(None, "sprint", 30, route))
+
+    async def end():
+        await service.end_competition(pending.pop())
+
+    yield Case("competition.end", end, prepare=prepare_end)
+
+async def run(args: argparse.Namespace) -> Dict[str, BenchResult]:
+    """Прогін усіх наборів"""
+
+    from database.database import close_db, init_db
+
+    rng = random.Random(args.seed)
+    sizes = QUICK_RANKING_SIZES if args.quick else RANKING_SIZES
+
+    results: Dict[str, BenchResult] = {}
+    await init_db()
+    try:
+        for suite in (geo_suite(rng), ranking_suite(rng, sizes), competition_suite(rng)):
+            async for case in suite:
+                if args.filter and args.filter not in case.name:
+                    continue
+                result = await measure(case, args.min_time, args.repeat)
+                results[case.name] = result
+                print(f"{case.name:<58}{_format_ns(result.ns_per_op):>12}  (×{result.iterations})", flush=True)
+    finally:
+        await close_db()
+
+    return results
+
+def _format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} мс"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} мкс"
+    return f"{ns:.0f} нс"
+
+def save_baseline(path: str, results: Dict[str, BenchResult]):
+    data = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": int(time.time())
+        },
+        "results": {name: result.to_dict() for name, result in results.items()}
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def compare(path: str, results: Dict[str, BenchResult], threshold: float) -> List[str]:
+    """Таблиця порівняння з базовим файлом; повертає назви регресій"""
+
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\n{'бенчмарк':<58}{'база':>12}{'зараз':>12}{'зміна':>9}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<58}{'-':>12}{_format_ns(result.ns_per_op):>12}{'нове':>9}")
+            continue
+
+        change = (result.ns_per_op / base["ns_per_op"] - 1) * 100
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<58}{_format_ns(base['ns_per_op']):>12}{_format_ns(result.ns_per_op):>12}"
+            f"{change:>+8.1f}%" + ("  ❌" if regressed else "")
+        )
+
+    return regressions
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Мікробенчмарки сервісів з контролем регресій")
+    parser.add_argument("--save", help="зберегти результати як базові (JSON)")
+    parser.add_argument("--compare", help="порівняти з базовим JSON")
+    parser.add_argument("--threshold", type=float, default=20.0, help="допустиме сповільнення, %%")
+    parser.add_argument("--filter", help="лише бенчмарки, назва яких містить підрядок")
+    parser.add_argument("--quick", action="store_true", help="рейтинги лише до 10k")
+    parser.add_argument("--min-time", type=float, default=0.1, help="секунд на один замір")
+    parser.add_argument("--repeat", type=int, default=5, help="замірів на бенчмарк")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Точка входу CLI; код 1 при регресії"""
+
+    args = parse_args(argv)
+
+    # Тимчасова БД до імпорту модулів бота: config читає оточення під час імпорту
+    workdir = tempfile.mkdtemp(prefix="benchmarks_")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "benchmarks.db")
+    os.environ["LOG_LEVEL"] = "ERROR"
+    os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK")
+
+    results = asyncio.run(run(args))
+
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"\n💾 Базові результати збережено: {args.save}")
+
+    if args.compare:
+        regressions = compare(args.compare, results, args.threshold)
+        if regressions:
+            print(f"\n❌ Регресії понад {args.threshold:.0f}%: {', '.join(regressions)}")
+            return 1
+        print(f"\n✅ Регресій понад {args.threshold:.0f}% немає")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,8 +6,11 @@ from aiogram import Router, types, F
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from datetime import datetime, timedelta
 
-from database.database import get_db_connection
+from database.database import db_pool
+from bot.keyboards.inline import get_competition_actions_keyboard
 from services.competition_service import CompetitionService
+from services.standings_service import StandingEntry, standings_engine
+from services.user_directory import UserContext
 from utils.logger import setup_logger
 
 router = Router()
@@ -15,11 +18,11 @@ logger = setup_logger()
 competition_service = CompetitionService()
 
 @router.callback_query(F.data.startswith("competition_"))
-async def handle_competition_callback(callback: types.CallbackQuery):
+async def handle_competition_callback(callback: types.CallbackQuery, user_context: UserContext):
     """Обробник колбеків змагань"""
 
     action = callback.data.split("_")[1]
-    user_id = callback.from_user.id
+    user_id = user_context.user_id
 
     if action == "sprint":
         await start_sprint_competition(callback, user_id)
@@ -28,6 +31,9 @@ async def handle_competition_callback(callback: types.CallbackQuery):
     elif action == "join":
         comp_id = callback.data.split("_")[2]
         await join_competition(callback, user_id, comp_id)
+    elif action == "standings":
+        comp_id = callback.data.split("_")[2]
+        await show_standings(callback, user_id, comp_id)
 
     await callback.answer()
 
@@ -51,7 +57,11 @@ async def start_sprint_competition(callback: types.CallbackQuery, user_id: int):
 Удачі! 🚀
         """
 
-        await callback.message.edit_text(text, parse_mode="Markdown")
+        await competition_service.join_competition(user_id, competition_id)
+
+        await callback.message.edit_text(
+            text, parse_mode="Markdown", reply_markup=get_competition_actions_keyboard(competition_id)
+        )
 
     except Exception as e:
         logger.error(f"❌ Помилка запуску Sprint змагання: {e}")
@@ -77,8 +87,67 @@ async def start_endurance_competition(callback: types.CallbackQuery, user_id: in
 Удачі! 💪
         """
 
-        await callback.message.edit_text(text, parse_mode="Markdown")
+        await competition_service.join_competition(user_id, competition_id)
+
+        await callback.message.edit_text(
+            text, parse_mode="Markdown", reply_markup=get_competition_actions_keyboard(competition_id)
+        )
 
     except Exception as e:
         logger.error(f"❌ Помилка запуску Endurance змагання: {e}")
         await callback.message.edit_text("❌ Помилка запуску змагання")
+
+async def join_competition(callback: types.CallbackQuery, user_id: int, comp_id: str):
+    """Приєднання до змагання"""
+    try:
+        if await competition_service.join_competition(user_id, int(comp_id)):
+            await callback.message.answer("✅ Ти в змаганні! Поділись локацією, щоб почати")
+        else:
+            await callback.message.answer("⏹️ Змагання вже завершено")
+
+    except Exception as e:
+        logger.error(f"❌ Помилка приєднання до змагання: {e}")
+        await callback.message.answer("❌ Помилка приєднання до змагання")
+
+def format_standing(entry: StandingEntry, comp_type: str) -> str:
+    """Рядок результату учасника"""
+
+    if comp_type == "sprint":
+        return f"{entry.position}. {entry.score:.1f} км/год ({entry.distance_km:.2f} км, штраф {entry.penalty_seconds}с)"
+    return f"{entry.position}. {entry.distance_km:.2f} км (макс {entry.max_speed_kmh:.1f} км/год)"
+
+async def show_standings(callback: types.CallbackQuery, user_id: int, comp_id: str):
+    """Поточні результати змагання"""
+    try:
+        standings = standings_engine.get(int(comp_id))
+        if standings is None:
+            await callback.message.answer("⏹️ Змагання вже завершено")
+            return
+
+        entries = standings.top(10)
+        if not entries:
+            await callback.message.answer("📋 Учасників поки немає")
+            return
+
+        names = {}
+        placeholders = ",".join("?" * len(entries))
+        async with db_pool.read() as db:
+            cursor = await db.execute(
+                f"SELECT user_id, first_name FROM users WHERE user_id IN ({placeholders})",
+                [entry.user_id for entry in entries]
+            )
+            names = dict(await cursor.fetchall())
+
+        text = f"📋 **Результати змагання #{comp_id}:**\n\n"
+        for entry in entries:
+            text += f"{format_standing(entry, standings.comp_type)} - {names.get(entry.user_id, '?')}\n"
+
+        own = standings.get(user_id)
+        if own is not None and own.position > 10:
+            text += f"\n👤 Ти: {format_standing(own, standings.comp_type)}"
+
+        await callback.message.answer(text, parse_mode="Markdown")
+
+    except Exception as e:
+        logger.error(f"❌ Помилка отримання результатів змагання: {e}")
+        await callback.message.answer("❌ Помилка отримання результатів")
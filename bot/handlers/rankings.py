@@ -2,12 +2,9 @@
 Обробник рейтингів та статистики
 """
 
-from aiogram import Router, types, F
-
-from database.database import get_db_connection
-from utils.logger import setup_logger
+from aiogram import Router
 
 router = Router()
-logger = setup_logger()
 
+# Учасників груп реєструє GroupMembershipMiddleware для кожного оновлення з групи
 # Цей модуль може містити додаткові команди для рейтингів
@@ -2,12 +2,18 @@
 Обробник команди /start
 """
 
+from typing import Optional
+
 from aiogram import Router, types, F
 from aiogram.filters import CommandStart
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup, WebAppInfo
 
 from config import config
-from database.database import get_db_connection
+from database.database import db_pool
+from services.group_service import group_service
+from services.leaderboard import leaderboard
+from services.ranking_cache import ranking_cache
+from services.user_directory import UserContext
 from utils.logger import setup_logger
 
 router = Router()
@@ -15,22 +21,11 @@ logger = setup_logger()
 
 @router.message(CommandStart())
 async def cmd_start(message: types.Message):
-    """Обробник команди /start"""
+    """Обробник команди /start (користувача реєструє AuthMiddleware)"""
 
     user = message.from_user
     logger.info(f"👤 Користувач {user.username} ({user.id}) запустив бота")
 
-    # Реєстрація користувача в БД
-    try:
-        async with await get_db_connection() as db:
-            await db.execute("""
-                INSERT OR IGNORE INTO users (telegram_id, username, first_name)
-                VALUES (?, ?, ?)
-            """, (user.id, user.username, user.first_name))
-            await db.commit()
-    except Exception as e:
-        logger.error(f"❌ Помилка реєстрації користувача: {e}")
-
     # Створення клавіатури
     keyboard = ReplyKeyboardMarkup(
         keyboard=[
@@ -70,19 +65,22 @@ async def cmd_start(message: types.Message):
     await message.answer(welcome_text, reply_markup=keyboard, parse_mode="Markdown")
 
 @router.message(F.text == "📊 Мій рейтинг")
-async def my_ranking(message: types.Message):
+async def my_ranking(message: types.Message, user_context: UserContext, group_id: Optional[int] = None):
     """Показати рейтинг користувача"""
-    user_id = message.from_user.id
+    user_id = user_context.user_id
 
     try:
-        async with await get_db_connection() as db:
-            cursor = await db.execute("""
-                SELECT u.total_distance, u.total_steps, r.points, r.rank_level
-                FROM users u
-                LEFT JOIN rankings r ON u.user_id = r.user_id
-                WHERE u.telegram_id = ?
-            """, (user_id,))
-            user_data = await cursor.fetchone()
+        ranking_text = ranking_cache.get_user_stats(user_id)
+
+        if ranking_text is None:
+            async with db_pool.read() as db:
+                cursor = await db.execute("""
+                    SELECT u.total_distance, u.total_steps, r.points, r.rank_level
+                    FROM users u
+                    LEFT JOIN rankings r ON u.user_id = r.user_id AND r.group_id IS NULL
+                    WHERE u.user_id = ?
+                """, (user_id,))
+                user_data = await cursor.fetchone()
 
             if user_data:
                 distance, steps, points, rank = user_data
@@ -98,9 +96,16 @@ async def my_ranking(message: types.Message):
 
 Продовжуй тренування для підвищення рейтингу! 💪
                 """
+                ranking_cache.set_user_stats(user_id, ranking_text)
             else:
                 ranking_text = "📊 Статистика ще не доступна. Почни використовувати бота!"
 
+        # У групі (її зареєстрував GroupMembershipMiddleware) додатково показуємо місце в ній
+        if group_id is not None:
+            group_rank = await group_service.rank_of(group_id, user_id)
+            if group_rank:
+                ranking_text = ranking_text.rstrip() + f"\n👥 Місце в групі: {group_rank[1]} ({group_rank[0]} очок)"
+
         await message.answer(ranking_text, parse_mode="Markdown")
 
     except Exception as e:
@@ -108,21 +113,34 @@ async def my_ranking(message: types.Message):
         await message.answer("❌ Помилка отримання статистики")
 
 @router.message(F.text == "🏆 Топ гравців")  
-async def top_players(message: types.Message):
-    """Показати топ гравців"""
+async def top_players(message: types.Message, user_context: UserContext, group_id: Optional[int] = None):
+    """Показати топ гравців (у групі - топ учасників цієї групи)"""
     try:
-        async with await get_db_connection() as db:
-            cursor = await db.execute("""
-                SELECT u.first_name, r.points, r.rank_level
-                FROM users u
-                JOIN rankings r ON u.user_id = r.user_id
-                ORDER BY r.points DESC
-                LIMIT 10
-            """, )
-            top_users = await cursor.fetchall()
+        leaderboard_text = ranking_cache.get_top(group_id)
+
+        if leaderboard_text is None:
+            if group_id is not None:
+                top_users = await group_service.top(group_id, 10)
+            elif leaderboard.is_loaded:
+                # Топ з таблиці лідерів у пам'яті без сортування всієї таблиці
+                entries = leaderboard.top(10)
+                await leaderboard.fill_names(entries)
+                top_users = [(entry.name, entry.points, entry.rank_level) for entry in entries]
+            else:
+                async with db_pool.read() as db:
+                    cursor = await db.execute("""
+                        SELECT u.first_name, r.points, r.rank_level
+                        FROM users u
+                        JOIN rankings r ON u.user_id = r.user_id
+                        WHERE r.group_id IS NULL
+                        ORDER BY r.points DESC
+                        LIMIT 10
+                    """, )
+                    top_users = await cursor.fetchall()
 
             if top_users:
-                leaderboard_text = "🏆 **Топ 10 гравців:**\n\n"
+                title = "Топ 10 гравців групи" if group_id is not None else "Топ 10 гравців"
+                leaderboard_text = f"🏆 **{title}:**\n\n"
                 rank_emojis = {"bronze": "🥉", "silver": "🥈", "gold": "🥇", "platinum": "💎", "diamond": "👑"}
 
                 for i, (name, points, rank_level) in enumerate(top_users, 1):
@@ -131,6 +149,8 @@ async def top_players(message: types.Message):
             else:
                 leaderboard_text = "🏆 Рейтинг поки що порожній. Будь першим!"
 
+            ranking_cache.set_top(leaderboard_text, group_id)
+
         await message.answer(leaderboard_text, parse_mode="Markdown")
 
     except Exception as e:
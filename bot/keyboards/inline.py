@@ -14,3 +14,14 @@ def get_competition_keyboard() -> InlineKeyboardMarkup:
             ]
         ]
     )
+
+def get_competition_actions_keyboard(competition_id: int) -> InlineKeyboardMarkup:
+    """Клавіатура активного змагання"""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="🙋 Приєднатися", callback_data=f"competition_join_{competition_id}"),
+                InlineKeyboardButton(text="📋 Результати", callback_data=f"competition_standings_{competition_id}")
+            ]
+        ]
+    )
@@ -4,10 +4,22 @@ Middleware для автентифікації
 
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
-from typing import Callable, Dict, Any, Awaitable
+from typing import Callable, Dict, Any, Awaitable, Optional
+
+from services.user_directory import UserDirectory, user_directory
 
 class AuthMiddleware(BaseMiddleware):
-    """Middleware для автентифікації користувачів"""
+    """
+    Визначення внутрішнього користувача один раз на оновлення.
+
+    Невідомі користувачі реєструються при першому зверненні, а обробники
+    отримують UserContext аргументом user_context. Оновлення від ботів
+    (зокрема анонімних адміністраторів груп) не обробляються. Контекст,
+    уже визначений GroupMembershipMiddleware, використовується повторно.
+    """
+
+    def __init__(self, directory: Optional[UserDirectory] = None):
+        self.directory = directory if directory is not None else user_directory
 
     async def __call__(
         self,
@@ -15,5 +27,10 @@ class AuthMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any]
     ) -> Any:
-        # Тут можна додати логіку автентифікації
+        user = data.get("event_from_user")
+        if user is None or user.is_bot:
+            return None
+
+        if "user_context" not in data:
+            data["user_context"] = await self.directory.context(user)
         return await handler(event, data)
@@ -0,0 +1,52 @@
+"""
+Middleware для членства в групах
+"""
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from typing import Callable, Dict, Any, Awaitable, Optional
+
+from services.group_service import GroupService, group_service
+from services.user_directory import UserDirectory, user_directory
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+GROUP_CHAT_TYPES = {"group", "supergroup"}
+
+class GroupMembershipMiddleware(BaseMiddleware):
+    """
+    Реєстрація групи та участі в ній для кожного оновлення з групового чату.
+
+    Зовнішній middleware (dp.message.outer_middleware): виконується ще до
+    вибору обробника, тож учасник запам'ятовується і для повідомлень, які
+    жоден обробник не приймає. Визначений тут user_context далі бере
+    AuthMiddleware; обробники отримують group_id (None поза групами).
+    Помилка реєстрації не зупиняє обробку оновлення.
+    """
+
+    def __init__(self, groups: Optional[GroupService] = None, directory: Optional[UserDirectory] = None):
+        self.groups = groups if groups is not None else group_service
+        self.directory = directory if directory is not None else user_directory
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        data["group_id"] = None
+
+        if chat is not None and chat.type in GROUP_CHAT_TYPES and user is not None and not user.is_bot:
+            try:
+                user_context = await self.directory.context(user)
+                data["user_context"] = user_context
+                data["group_id"] = await self.groups.register_chat_member(
+                    chat.id, chat.title, user_context.user_id
+                )
+            except Exception as e:
+                logger.error(f"❌ Помилка реєстрації учасника групи: {e}")
+
+        return await handler(event, data)
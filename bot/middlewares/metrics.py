@@ -0,0 +1,53 @@
+"""
+Middleware для метрик обробників
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from utils.metrics import metrics
+
+handler_duration = metrics.histogram(
+    "bot_handler_duration_seconds", "Тривалість обробників оновлень", ("handler", "event")
+)
+handler_errors = metrics.counter(
+    "bot_handler_errors_total", "Обробники, що завершились винятком", ("handler", "event")
+)
+handlers_in_flight = metrics.gauge(
+    "bot_handlers_in_flight", "Обробники, що виконуються зараз", ("handler", "event")
+)
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Внутрішній middleware: тривалість, помилки та кількість одночасних
+    викликів кожного обробника.
+
+    Реєструється як внутрішній (dp.message.middleware), бо лише тоді в
+    data вже є обраний обробник і мітка handler - його назва.
+    """
+
+    def __init__(self, event: str):
+        self.event = event
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object is not None else "unknown"
+
+        handlers_in_flight.inc(name, self.event)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            handler_errors.inc(name, self.event)
+            raise
+        finally:
+            handler_duration.observe(time.perf_counter() - started, name, self.event)
+            handlers_in_flight.dec(name, self.event)
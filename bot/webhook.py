@@ -0,0 +1,121 @@
+"""
+Режим webhook: aiohttp сервер, що приймає оновлення від Telegram
+
+Локальна перевірка без Telegram (WEBHOOK_URL порожній):
+    curl -X POST http://localhost:8080/webhook \
+         -H "X-Telegram-Bot-Api-Secret-Token: $WEBHOOK_SECRET" \
+         -H "Content-Type: application/json" -d @update.json
+"""
+
+import asyncio
+import hmac
+import json
+from typing import Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+from services.ingestion_service import gps_ingestion
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+class WebhookHandler:
+    """
+    Приймання оновлень з обмеженою кількістю одночасних обробок.
+
+    Telegram отримує 200 одразу після постановки оновлення в обробку; коли
+    всі max_concurrency слотів зайняті, запит чекає на вільний слот, і ця
+    затримка стає природним зворотним тиском для Telegram.
+
+    Секрет обов'язковий: без нього будь-хто, хто знає адресу, міг би
+    надсилати боту підроблені оновлення від імені будь-якого користувача.
+    """
+
+    def __init__(self, bot: Bot, dp: Dispatcher, secret: str, max_concurrency: int = 100):
+        if not secret:
+            raise ValueError("WEBHOOK_SECRET не встановлено: webhook без секрету не запускається")
+
+        self.bot = bot
+        self.dp = dp
+        self.secret = secret
+        self.max_concurrency = max_concurrency
+
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"received": 0, "processed": 0, "failed": 0, "rejected": 0}
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """POST з оновленням Telegram"""
+
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret):
+            self.stats["rejected"] += 1
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(loads=json.loads), context={"bot": self.bot})
+        except Exception as e:
+            self.stats["rejected"] += 1
+            logger.warning(f"⚠️ Некоректне оновлення webhook: {e}")
+            return web.Response(status=400)
+
+        self.stats["received"] += 1
+        await self._slots.acquire()
+
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return web.Response()
+
+    async def _process(self, update: Update):
+        try:
+            await self.dp.feed_update(self.bot, update)
+            self.stats["processed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"❌ Помилка обробки оновлення {update.update_id}: {e}")
+        finally:
+            self._slots.release()
+
+    async def health(self, request: web.Request) -> web.Response:
+        """Стан сервера для балансувальника та моніторингу"""
+
+        return web.json_response({
+            "status": "ok",
+            "in_flight": len(self._tasks),
+            "max_concurrency": self.max_concurrency,
+            "gps_pending": gps_ingestion.pending(),
+            **self.stats
+        })
+
+    async def drain(self, app: web.Application = None):
+        """Очікування оновлень, що ще обробляються"""
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+# Ключ обробника в застосунку (типізований, без NotAppKeyWarning)
+WEBHOOK_HANDLER_KEY = web.AppKey("webhook_handler", WebhookHandler)
+
+def create_webhook_app(
+    bot: Bot,
+    dp: Dispatcher,
+    secret: str,
+    path: str = "/webhook",
+    max_concurrency: int = 100
+) -> web.Application:
+    """aiohttp застосунок з маршрутами webhook та /health"""
+
+    handler = WebhookHandler(bot, dp, secret, max_concurrency)
+
+    app = web.Application()
+    app[WEBHOOK_HANDLER_KEY] = handler
+    app.router.add_post(path, handler.handle_update)
+    app.router.add_get("/health", handler.health)
+    app.on_shutdown.append(handler.drain)
+
+    return app
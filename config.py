@@ -16,15 +16,81 @@ class Config:
     BOT_TOKEN: str = os.getenv("BOT_TOKEN")
     MINI_APP_URL: str = os.getenv("MINI_APP_URL", "https://yourapp.com/mini_app")
 
+    # Режим отримання оновлень: polling або webhook
+    BOT_MODE: str = os.getenv("BOT_MODE", "polling")
+    WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")  # публічний https адрес; порожній - без реєстрації в Telegram
+    WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")  # обов'язковий у режимі webhook
+    WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8080"))
+    WEBHOOK_MAX_CONCURRENCY: int = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "100"))
+
+    # HTTP API для Mini App (пакетне завантаження локацій)
+    API_ENABLED: bool = os.getenv("API_ENABLED", "false").lower() == "true"
+    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    API_MAX_BATCH_POINTS: int = int(os.getenv("API_MAX_BATCH_POINTS", "500"))
+    INIT_DATA_MAX_AGE_SECONDS: int = int(os.getenv("INIT_DATA_MAX_AGE_SECONDS", "86400"))
+
     # База даних
     DATABASE_PATH: str = os.getenv("DATABASE_PATH", "./bot_database.db")
+    DB_READ_POOL_SIZE: int = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+    DB_CACHE_SIZE_KB: int = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+    DB_MMAP_SIZE: int = int(os.getenv("DB_MMAP_SIZE", "268435456"))
+    DB_BUSY_TIMEOUT_MS: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+    # Метрики Prometheus (локальний /metrics)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9100"))
 
     # Логування
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # Не частіше одного запису гарячого шляху на користувача за N секунд (0 - без вибірки)
+    LOG_SAMPLE_INTERVAL_SECONDS: float = float(os.getenv("LOG_SAMPLE_INTERVAL_SECONDS", "60"))
 
     # GPS налаштування
     GPS_ACCURACY_THRESHOLD: int = int(os.getenv("GPS_ACCURACY_THRESHOLD", "50"))
     ROUTE_DEVIATION_PENALTY: int = int(os.getenv("ROUTE_DEVIATION_PENALTY", "5"))
+    ROUTE_DEVIATION_ENTER_M: float = float(os.getenv("ROUTE_DEVIATION_ENTER_M", "50"))
+    ROUTE_DEVIATION_EXIT_M: float = float(os.getenv("ROUTE_DEVIATION_EXIT_M", "30"))
+    ROUTE_DEVIATION_MIN_SECONDS: int = int(os.getenv("ROUTE_DEVIATION_MIN_SECONDS", "15"))
+    PENALTY_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("PENALTY_FLUSH_INTERVAL_SECONDS", "5"))
+
+    # Пакетний запис GPS точок
+    GPS_QUEUE_MAX_SIZE: int = int(os.getenv("GPS_QUEUE_MAX_SIZE", "10000"))
+    GPS_BATCH_SIZE: int = int(os.getenv("GPS_BATCH_SIZE", "500"))
+    GPS_FLUSH_INTERVAL_MS: int = int(os.getenv("GPS_FLUSH_INTERVAL_MS", "500"))
+    GPS_FLUSH_RETRIES: int = int(os.getenv("GPS_FLUSH_RETRIES", "3"))
+
+    # Спрощення треків при записі (0 - зберігати всі точки)
+    GPS_SIMPLIFY_TOLERANCE_M: float = float(os.getenv("GPS_SIMPLIFY_TOLERANCE_M", "5"))
+    GPS_SIMPLIFY_MAX_GAP_SECONDS: int = int(os.getenv("GPS_SIMPLIFY_MAX_GAP_SECONDS", "300"))
+    GPS_SIMPLIFY_IDLE_CHECK_SECONDS: float = float(os.getenv("GPS_SIMPLIFY_IDLE_CHECK_SECONDS", "30"))
+
+    # Кеш поточного стану користувачів
+    USER_STATE_CACHE_SIZE: int = int(os.getenv("USER_STATE_CACHE_SIZE", "10000"))
+
+    # Кеш відповідності telegram_id → user_id
+    USER_DIRECTORY_CACHE_SIZE: int = int(os.getenv("USER_DIRECTORY_CACHE_SIZE", "50000"))
+
+    # Кеш груп та членства в них
+    GROUP_CACHE_SIZE: int = int(os.getenv("GROUP_CACHE_SIZE", "10000"))
+    GROUP_MEMBERSHIP_CACHE_SIZE: int = int(os.getenv("GROUP_MEMBERSHIP_CACHE_SIZE", "50000"))
+
+    # Кеш відповідей рейтингу
+    RANKING_CACHE_TTL_SECONDS: float = float(os.getenv("RANKING_CACHE_TTL_SECONDS", "30"))
+
+    # Архівація холодних треків
+    TRACK_ARCHIVE_AFTER_DAYS: int = int(os.getenv("TRACK_ARCHIVE_AFTER_DAYS", "30"))
+    TRACK_ARCHIVE_INTERVAL_HOURS: float = float(os.getenv("TRACK_ARCHIVE_INTERVAL_HOURS", "24"))
+
+    # Результати змагань
+    STANDINGS_SNAPSHOT_INTERVAL_SECONDS: float = float(os.getenv("STANDINGS_SNAPSHOT_INTERVAL_SECONDS", "10"))
+
+    # Повтори невдалого автозавершення змагань
+    COMPETITION_END_RETRY_SECONDS: float = float(os.getenv("COMPETITION_END_RETRY_SECONDS", "5"))
+    COMPETITION_END_MAX_RETRY_SECONDS: float = float(os.getenv("COMPETITION_END_MAX_RETRY_SECONDS", "300"))
 
     # Рейтинги
     BRONZE_THRESHOLD: int = int(os.getenv("BRONZE_THRESHOLD", "100"))
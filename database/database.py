@@ -2,99 +2,202 @@
 Підключення та ініціалізація бази даних SQLite
 """
 
+import asyncio
 import aiosqlite
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
 from config import config
+from database.instrumentation import QueryNamer, hot_query_names, instrument
+from database.migrations.runner import apply_migrations
 from utils.logger import setup_logger
+from utils.metrics import metrics
 
 logger = setup_logger()
 
+class DatabasePool:
+    """Пул довгоживучих підключень: один писач та N читачів у режимі WAL"""
+
+    def __init__(
+        self,
+        path: str,
+        readers: int = 4,
+        cache_size_kb: int = 16384,
+        mmap_size: int = 268435456,
+        busy_timeout_ms: int = 5000,
+        cached_statements: int = 256,
+        instrumented: bool = False
+    ):
+        self.path = path
+        self.readers_count = max(1, readers)
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        # Заміри запитів за назвою (database/instrumentation.py)
+        self.instrumented = instrumented
+        self._namer: Optional[QueryNamer] = None
+
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writer_lock = asyncio.Lock()
+        self._writer_owner: Optional[asyncio.Task] = None
+        self._writer_depth = 0
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+
+        # Лічильники: видані читачі, блоки писача, зафіксовані (зі змінами) та відкочені транзакції
+        self.stats: Dict[str, int] = {"reads": 0, "writes": 0, "commits": 0, "rollbacks": 0}
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def _connect(self, read_only: bool = False) -> aiosqlite.Connection:
+        """Відкриття підключення з налаштованими PRAGMA"""
+
+        # cached_statements передається в sqlite3.connect і кешує підготовлені запити
+        db = await aiosqlite.connect(self.path, cached_statements=self.cached_statements)
+
+        await db.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        await db.execute("PRAGMA synchronous = NORMAL")
+        await db.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        await db.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        await db.execute("PRAGMA temp_store = MEMORY")
+
+        if read_only:
+            await db.execute("PRAGMA query_only = 1")
+
+        if self.instrumented:
+            if self._namer is None:
+                self._namer = QueryNamer(hot_query_names())
+            return instrument(db, self._namer)
+
+        return db
+
+    async def open(self):
+        """Відкриття писача та пулу читачів"""
+
+        if self.is_open:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._writer = await self._connect()
+        # WAL зберігається у файлі БД, тому достатньо встановити його один раз
+        cursor = await self._writer.execute("PRAGMA journal_mode = WAL")
+        journal_mode = (await cursor.fetchone())[0]
+
+        self._idle_readers = asyncio.Queue()
+        for _ in range(self.readers_count):
+            reader = await self._connect(read_only=True)
+            self._readers.append(reader)
+            self._idle_readers.put_nowait(reader)
+
+        logger.info(
+            f"✅ Пул БД відкрито: 1 писач, {self.readers_count} читачів, journal_mode={journal_mode}"
+        )
+
+    async def close(self):
+        """Закриття всіх підключень пулу"""
+
+        if not self.is_open:
+            return
+
+        async with self._writer_lock:
+            await self._writer.close()
+            self._writer = None
+
+        for reader in self._readers:
+            await reader.close()
+
+        self._readers = []
+        self._idle_readers = None
+        logger.info("🔌 Пул БД закрито")
+
+    @asynccontextmanager
+    async def read(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Підключення лише для читання з пулу"""
+
+        if not self.is_open:
+            await self.open()
+
+        reader = await self._idle_readers.get()
+        self.stats["reads"] += 1
+        try:
+            yield reader
+        finally:
+            self._idle_readers.put_nowait(reader)
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Ексклюзивне підключення писача.
+
+        Повторний вхід з тієї ж задачі повертає те саме підключення, тому
+        сервіс, викликаний всередині транзакції обробника, не блокує сам себе.
+        Незафіксовані зміни відкочуються при виході з найзовнішнього блоку.
+        """
+
+        if not self.is_open:
+            await self.open()
+
+        task = asyncio.current_task()
+        if self._writer_owner is task:
+            self._writer_depth += 1
+            try:
+                yield self._writer
+            finally:
+                self._writer_depth -= 1
+            return
+
+        async with self._writer_lock:
+            self._writer_owner = task
+            self._writer_depth = 1
+            self.stats["writes"] += 1
+            changes_before = self._writer.total_changes
+            try:
+                yield self._writer
+            finally:
+                self._writer_owner = None
+                self._writer_depth = 0
+                if self._writer is not None:
+                    if self._writer.in_transaction:
+                        await self._writer.rollback()
+                        self.stats["rollbacks"] += 1
+                    elif self._writer.total_changes != changes_before:
+                        self.stats["commits"] += 1
+
+db_pool = DatabasePool(
+    config.DATABASE_PATH,
+    readers=config.DB_READ_POOL_SIZE,
+    cache_size_kb=config.DB_CACHE_SIZE_KB,
+    mmap_size=config.DB_MMAP_SIZE,
+    busy_timeout_ms=config.DB_BUSY_TIMEOUT_MS,
+    instrumented=config.METRICS_ENABLED
+)
+
+metrics.register_stats(
+    "db_pool_operations_total",
+    "Видані читачі, блоки писача, фіксації та відкати пулу БД",
+    lambda: db_pool.stats,
+    label="operation"
+)
+
 async def init_db():
     """Ініціалізація бази даних"""
     try:
-        async with aiosqlite.connect(config.DATABASE_PATH) as db:
-            # Створення таблиці користувачів
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    telegram_id INTEGER UNIQUE NOT NULL,
-                    username TEXT,
-                    first_name TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    total_distance REAL DEFAULT 0.0,
-                    total_steps INTEGER DEFAULT 0,
-                    is_active BOOLEAN DEFAULT 1
-                )
-            """)
-
-            # Створення таблиці груп
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS groups (
-                    group_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    telegram_group_id INTEGER UNIQUE NOT NULL,
-                    group_name TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_active BOOLEAN DEFAULT 1
-                )
-            """)
-
-            # Створення таблиці рейтингів
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS rankings (
-                    ranking_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    group_id INTEGER,
-                    points INTEGER DEFAULT 0,
-                    rank_level TEXT DEFAULT 'bronze',
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id),
-                    FOREIGN KEY (group_id) REFERENCES groups(group_id)
-                )
-            """)
-
-            # Створення таблиці змагань
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS competitions (
-                    competition_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    group_id INTEGER,
-                    comp_type TEXT NOT NULL,
-                    route_data TEXT,
-                    start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    duration_minutes INTEGER DEFAULT 60,
-                    is_active BOOLEAN DEFAULT 1,
-                    FOREIGN KEY (group_id) REFERENCES groups(group_id)
-                )
-            """)
-
-            # Створення таблиці GPS треків
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS gps_tracks (
-                    track_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    competition_id INTEGER,
-                    latitude REAL NOT NULL,
-                    longitude REAL NOT NULL,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    distance_km REAL DEFAULT 0.0,
-                    speed_kmh REAL DEFAULT 0.0,
-                    is_valid BOOLEAN DEFAULT 1,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id),
-                    FOREIGN KEY (competition_id) REFERENCES competitions(competition_id)
-                )
-            """)
-
-            # Створення індексів для швидкості запитів
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_users_telegram_id ON users(telegram_id)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_rankings_user_id ON rankings(user_id)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_gps_tracks_user_id ON gps_tracks(user_id)")
-
-            await db.commit()
-            logger.info("✅ База даних успішно ініціалізована")
+        await db_pool.open()
+
+        async with db_pool.write() as db:
+            schema_version = await apply_migrations(db)
+            logger.info(f"✅ База даних успішно ініціалізована (схема v{schema_version})")
 
     except Exception as e:
         logger.error(f"❌ Помилка ініціалізації БД: {e}")
         raise
 
-async def get_db_connection():
-    """Отримати підключення до БД"""
-    return await aiosqlite.connect(config.DATABASE_PATH)
+async def close_db():
+    """Закриття пулу підключень"""
+    await db_pool.close()
@@ -0,0 +1,114 @@
+"""
+Заміри запитів SQLite: тривалість за назвою запиту та фіксації транзакцій
+"""
+
+import re
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import aiosqlite
+
+from utils.metrics import metrics
+
+query_duration = metrics.histogram(
+    "db_query_duration_seconds", "Тривалість execute/executemany за назвою запиту", ("query",)
+)
+query_errors = metrics.counter("db_query_errors_total", "Запити, що завершились помилкою", ("query",))
+commit_duration = metrics.histogram("db_commit_duration_seconds", "Тривалість фіксації транзакції писача")
+
+# Таблиця запиту за дієсловом: select/delete - після FROM, insert - після INTO, ...
+_TABLE_PATTERNS = {
+    "select": re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE),
+    "delete": re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE),
+    "insert": re.compile(r"\bINTO\s+(\w+)", re.IGNORECASE),
+    "replace": re.compile(r"\bINTO\s+(\w+)", re.IGNORECASE),
+    "update": re.compile(r"^UPDATE\s+(?:OR\s+\w+\s+)?(\w+)", re.IGNORECASE),
+    "create": re.compile(r"\b(?:TABLE|INDEX)\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE),
+    "drop": re.compile(r"\b(?:TABLE|INDEX)\s+(?:IF\s+EXISTS\s+)?(\w+)", re.IGNORECASE),
+}
+_NAMES_LIMIT = 2048
+
+def _normalize(sql: str) -> str:
+    return " ".join(sql.split())
+
+class QueryNamer:
+    """
+    Назви запитів для міток метрик.
+
+    Запити з database/query_plans.HOT_QUERIES отримують свої назви, решта -
+    відбиток "дієслово:таблиця". Результат кешується за текстом SQL, тож
+    розбір виконується один раз на запит.
+    """
+
+    def __init__(self, known: Optional[Dict[str, str]] = None):
+        self._known = {_normalize(sql): name for sql, name in (known or {}).items()}
+        self._cache: Dict[str, str] = {}
+
+    def name(self, sql: str) -> str:
+        name = self._cache.get(sql)
+        if name is not None:
+            return name
+
+        normalized = _normalize(sql)
+        name = self._known.get(normalized)
+        if name is None:
+            name = self.fingerprint(normalized)
+
+        # Запити з динамічним IN (...) дають багато текстів однієї назви
+        if len(self._cache) < _NAMES_LIMIT:
+            self._cache[sql] = name
+        return name
+
+    @staticmethod
+    def fingerprint(sql: str) -> str:
+        """Назва невідомого запиту: дієслово та таблиця, напр. "select:users" """
+
+        verb = sql.split(" ", 1)[0].lower()
+        pattern = _TABLE_PATTERNS.get(verb)
+        match = pattern.search(sql) if pattern else None
+        return f"{verb}:{match.group(1).lower()}" if match else verb or "other"
+
+def hot_query_names() -> Dict[str, str]:
+    """SQL гарячих запитів -> їх назви з database/query_plans.py"""
+    from database.query_plans import HOT_QUERIES
+    return {sql: name for name, (sql, _) in HOT_QUERIES.items()}
+
+class InstrumentedConnection:
+    """Обгортка підключення aiosqlite із замірами execute/executemany/commit"""
+
+    def __init__(self, connection: aiosqlite.Connection, namer: QueryNamer):
+        self._connection = connection
+        self._namer = namer
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+    async def execute(self, sql: str, parameters: Optional[Iterable[Any]] = None) -> aiosqlite.Cursor:
+        return await self._timed(self._connection.execute, sql, parameters)
+
+    async def executemany(self, sql: str, parameters: Iterable[Iterable[Any]]) -> aiosqlite.Cursor:
+        return await self._timed(self._connection.executemany, sql, parameters)
+
+    async def _timed(self, method, sql: str, parameters) -> aiosqlite.Cursor:
+        query = self._namer.name(sql)
+        started = time.perf_counter()
+        try:
+            if parameters is None:
+                return await method(sql)
+            return await method(sql, parameters)
+        except Exception:
+            query_errors.inc(query)
+            raise
+        finally:
+            query_duration.observe(time.perf_counter() - started, query)
+
+    async def commit(self):
+        started = time.perf_counter()
+        try:
+            await self._connection.commit()
+        finally:
+            commit_duration.observe(time.perf_counter() - started)
+
+def instrument(connection: aiosqlite.Connection, namer: Optional[QueryNamer] = None) -> InstrumentedConnection:
+    """Підключення з замірами запитів"""
+    return InstrumentedConnection(connection, namer or QueryNamer(hot_query_names()))
@@ -1,4 +1,4 @@
--- Ініціалізація бази даних Telegram Fitness Bot
+-- Міграція 001: початкова схема бази даних Telegram Fitness Bot
 
 -- Таблиця користувачів
 CREATE TABLE IF NOT EXISTS users (
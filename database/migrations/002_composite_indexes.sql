@@ -0,0 +1,15 @@
+-- Міграція 002: складені та покривні індекси для гарячих запитів
+
+-- Остання валідна точка користувача: пошук, фільтр і сортування з одного індексу,
+-- координати входять в індекс, тому звернення до таблиці не потрібне
+CREATE INDEX IF NOT EXISTS idx_gps_tracks_user_valid_ts
+    ON gps_tracks(user_id, is_valid, timestamp DESC, latitude, longitude);
+
+-- Префікс нового індексу покриває пошук за user_id
+DROP INDEX IF EXISTS idx_gps_tracks_user_id;
+
+-- Топ гравців та позиція в рейтингу
+CREATE INDEX IF NOT EXISTS idx_rankings_points ON rankings(points DESC);
+
+-- Дублює автоматичний індекс обмеження UNIQUE(telegram_id)
+DROP INDEX IF EXISTS idx_users_telegram_id;
@@ -0,0 +1,15 @@
+-- Міграція 003: архів холодних GPS треків (один рядок на користувача за день)
+
+CREATE TABLE IF NOT EXISTS track_archive (
+    archive_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    point_count INTEGER NOT NULL,
+    first_timestamp TIMESTAMP NOT NULL,
+    last_timestamp TIMESTAMP NOT NULL,
+    distance_km REAL DEFAULT 0.0,
+    payload BLOB NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, day),
+    FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
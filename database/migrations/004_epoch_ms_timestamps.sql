@@ -0,0 +1,98 @@
+-- Міграція 004: мітки часу треків, змагань та рейтингів як цілі мілісекунди епохи
+--
+-- Часові пояси текстових значень:
+-- * gps_tracks.timestamp та track_archive.first/last_timestamp писались з
+--   datetime.now() - наївний місцевий час сервера. Вони переводяться в UTC
+--   модифікатором 'utc' за часовим поясом процесу, що виконує міграцію,
+--   тому міграцію слід запускати з тим самим TZ, з яким працював бот.
+--   utils.timestamps.to_epoch_ms тлумачить naive текст за тим самим правилом.
+-- * competitions.start_time та rankings.updated_at писались з CURRENT_TIMESTAMP,
+--   який SQLite повертає в UTC; вони переводяться без зсуву.
+
+-- GPS треки
+CREATE TABLE gps_tracks_new (
+    track_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    competition_id INTEGER,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    timestamp INTEGER NOT NULL DEFAULT (CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)),
+    distance_km REAL DEFAULT 0.0,
+    speed_kmh REAL DEFAULT 0.0,
+    is_valid BOOLEAN DEFAULT 1,
+    FOREIGN KEY (user_id) REFERENCES users(user_id),
+    FOREIGN KEY (competition_id) REFERENCES competitions(competition_id)
+);
+
+INSERT INTO gps_tracks_new
+    (track_id, user_id, competition_id, latitude, longitude, timestamp, distance_km, speed_kmh, is_valid)
+SELECT track_id, user_id, competition_id, latitude, longitude,
+       CASE
+           WHEN typeof(timestamp) IN ('integer', 'real') THEN CAST(timestamp AS INTEGER)
+           ELSE COALESCE(CAST(ROUND((julianday(timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER), 0)
+       END,
+       distance_km, speed_kmh, is_valid
+FROM gps_tracks;
+
+DROP TABLE gps_tracks;
+ALTER TABLE gps_tracks_new RENAME TO gps_tracks;
+
+CREATE INDEX IF NOT EXISTS idx_gps_tracks_user_valid_ts
+    ON gps_tracks(user_id, is_valid, timestamp DESC, latitude, longitude);
+
+-- Змагання
+CREATE TABLE competitions_new (
+    competition_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_id INTEGER,
+    comp_type TEXT NOT NULL,
+    route_data TEXT,
+    start_time INTEGER NOT NULL DEFAULT (CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)),
+    duration_minutes INTEGER DEFAULT 60,
+    is_active BOOLEAN DEFAULT 1,
+    FOREIGN KEY (group_id) REFERENCES groups(group_id)
+);
+
+INSERT INTO competitions_new
+    (competition_id, group_id, comp_type, route_data, start_time, duration_minutes, is_active)
+SELECT competition_id, group_id, comp_type, route_data,
+       CASE
+           WHEN typeof(start_time) IN ('integer', 'real') THEN CAST(start_time AS INTEGER)
+           ELSE COALESCE(CAST(ROUND((julianday(start_time) - 2440587.5) * 86400000) AS INTEGER), 0)
+       END,
+       duration_minutes, is_active
+FROM competitions;
+
+DROP TABLE competitions;
+ALTER TABLE competitions_new RENAME TO competitions;
+
+-- Рейтинги
+CREATE TABLE rankings_new (
+    ranking_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    group_id INTEGER,
+    points INTEGER DEFAULT 0,
+    rank_level TEXT DEFAULT 'bronze',
+    updated_at INTEGER NOT NULL DEFAULT (CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)),
+    FOREIGN KEY (user_id) REFERENCES users(user_id),
+    FOREIGN KEY (group_id) REFERENCES groups(group_id)
+);
+
+INSERT INTO rankings_new (ranking_id, user_id, group_id, points, rank_level, updated_at)
+SELECT ranking_id, user_id, group_id, points, rank_level,
+       CASE
+           WHEN typeof(updated_at) IN ('integer', 'real') THEN CAST(updated_at AS INTEGER)
+           ELSE COALESCE(CAST(ROUND((julianday(updated_at) - 2440587.5) * 86400000) AS INTEGER), 0)
+       END
+FROM rankings;
+
+DROP TABLE rankings;
+ALTER TABLE rankings_new RENAME TO rankings;
+
+CREATE INDEX IF NOT EXISTS idx_rankings_user_id ON rankings(user_id);
+CREATE INDEX IF NOT EXISTS idx_rankings_points ON rankings(points DESC);
+
+-- Межі днів в архіві треків
+UPDATE track_archive
+SET first_timestamp = CAST(ROUND((julianday(first_timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER),
+    last_timestamp = CAST(ROUND((julianday(last_timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER)
+WHERE typeof(first_timestamp) = 'text';
@@ -0,0 +1,31 @@
+-- Міграція 005: поточний стан користувача (остання точка та накопичені підсумки)
+
+CREATE TABLE IF NOT EXISTS user_state (
+    user_id INTEGER PRIMARY KEY,
+    last_latitude REAL,
+    last_longitude REAL,
+    last_timestamp INTEGER,
+    total_distance REAL DEFAULT 0.0,
+    total_steps INTEGER DEFAULT 0,
+    points INTEGER DEFAULT 0,
+    updated_at INTEGER NOT NULL DEFAULT (CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)),
+    FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
+
+-- Початкове заповнення з наявних даних
+INSERT OR IGNORE INTO user_state
+    (user_id, last_latitude, last_longitude, last_timestamp, total_distance, total_steps, points)
+SELECT u.user_id,
+       lp.latitude,
+       lp.longitude,
+       lp.timestamp,
+       COALESCE(u.total_distance, 0.0),
+       COALESCE(u.total_steps, 0),
+       COALESCE((SELECT r.points FROM rankings r WHERE r.user_id = u.user_id), 0)
+FROM users u
+LEFT JOIN gps_tracks lp ON lp.track_id = (
+    SELECT t.track_id FROM gps_tracks t
+    WHERE t.user_id = u.user_id AND t.is_valid = 1
+    ORDER BY t.timestamp DESC
+    LIMIT 1
+);
@@ -0,0 +1,32 @@
+-- Міграція 006: рейтинги в межах груп
+-- Глобальний рейтинг користувача - рядок rankings з group_id IS NULL,
+-- груповий - окремий рядок на кожну пару (group_id, user_id)
+
+CREATE TABLE IF NOT EXISTS group_members (
+    group_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    joined_at INTEGER NOT NULL DEFAULT (CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)),
+    PRIMARY KEY (group_id, user_id),
+    FOREIGN KEY (group_id) REFERENCES groups(group_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_group_members_user ON group_members(user_id);
+
+DROP INDEX IF EXISTS idx_rankings_points;
+DROP INDEX IF EXISTS idx_rankings_user_id;
+
+-- Пошук рядка рейтингу користувача (глобального та групових)
+CREATE INDEX IF NOT EXISTS idx_rankings_user_group ON rankings(user_id, group_id);
+
+-- Глобальний топ та позиція
+CREATE INDEX IF NOT EXISTS idx_rankings_global_points
+    ON rankings(points DESC) WHERE group_id IS NULL;
+
+-- Топ та позиція в групі без проходу по рядках інших груп
+CREATE INDEX IF NOT EXISTS idx_rankings_group_points
+    ON rankings(group_id, points DESC) WHERE group_id IS NOT NULL;
+
+-- Один рядок рейтингу на учасника групи
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rankings_group_user
+    ON rankings(group_id, user_id) WHERE group_id IS NOT NULL;
@@ -0,0 +1,22 @@
+-- Міграція 007: учасники змагань та знімки їх поточних результатів
+
+CREATE TABLE IF NOT EXISTS competition_participants (
+    competition_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    joined_at INTEGER NOT NULL,
+    distance_km REAL NOT NULL DEFAULT 0,
+    max_speed_kmh REAL NOT NULL DEFAULT 0,
+    first_timestamp INTEGER,
+    last_timestamp INTEGER,
+    penalty_seconds INTEGER NOT NULL DEFAULT 0,
+    points_count INTEGER NOT NULL DEFAULT 0,
+    updated_at INTEGER,
+    PRIMARY KEY (competition_id, user_id),
+    FOREIGN KEY (competition_id) REFERENCES competitions(competition_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_competition_participants_user ON competition_participants(user_id);
+
+-- Активні змагання читаються при кожному старті планувальника та таблиць результатів
+CREATE INDEX IF NOT EXISTS idx_competitions_active ON competitions(competition_id) WHERE is_active = 1;
@@ -0,0 +1,18 @@
+-- Міграція 008: журнал штрафів за відхилення від маршруту
+-- Один рядок на виїзд за межі маршруту; підсумки учасників ведуться
+-- інкрементально в competition_participants.penalty_seconds
+
+CREATE TABLE IF NOT EXISTS penalties (
+    penalty_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    competition_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    started_at INTEGER NOT NULL,
+    ended_at INTEGER,
+    max_deviation_m REAL NOT NULL,
+    penalty_seconds INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    FOREIGN KEY (competition_id) REFERENCES competitions(competition_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_penalties_competition_user ON penalties(competition_id, user_id);
@@ -0,0 +1,6 @@
+-- Міграція 009: точки користувача за часом без фільтра is_valid
+-- Архівація (user_id, timestamp < ?) та злиття архіву з гарячими точками
+-- (user_id, timestamp між ? та ?) читають і сортують з цього індексу
+-- замість тимчасового B-дерева; він же покриває SELECT DISTINCT user_id
+
+CREATE INDEX IF NOT EXISTS idx_gps_tracks_user_ts ON gps_tracks(user_id, timestamp);
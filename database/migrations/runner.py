@@ -0,0 +1,74 @@
+"""
+Виконання версійних міграцій схеми бази даних
+"""
+
+import os
+import re
+import aiosqlite
+from typing import List, Tuple
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_([a-z0-9_]+)\.sql$")
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> List[Tuple[int, str, str]]:
+    """Пошук файлів міграцій виду NNN_name.sql, впорядкованих за версією"""
+
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+
+    migrations.sort()
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Дублікати версій міграцій у {directory}")
+
+    return migrations
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    """Поточна версія схеми (0 для порожньої бази)"""
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    await db.commit()
+
+    cursor = await db.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return (await cursor.fetchone())[0]
+
+async def apply_migrations(db: aiosqlite.Connection, directory: str = MIGRATIONS_DIR) -> int:
+    """Застосування всіх нових міграцій; повертає кінцеву версію схеми"""
+
+    current_version = await get_schema_version(db)
+
+    for version, name, path in discover_migrations(directory):
+        if version <= current_version:
+            continue
+
+        with open(path, encoding="utf-8") as f:
+            script = f.read()
+
+        # Міграція та запис про неї фіксуються однією транзакцією
+        try:
+            await db.executescript(
+                f"BEGIN;\n{script}\n"
+                f"INSERT INTO schema_version (version, name) VALUES ({version}, '{name}');\n"
+                f"COMMIT;"
+            )
+        except Exception:
+            await db.rollback()
+            raise
+
+        current_version = version
+        logger.info(f"🗄️ Застосовано міграцію {version:03d}_{name}")
+
+    return current_version
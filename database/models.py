@@ -50,7 +50,7 @@ class Ranking:
     group_id: Optional[int] = None
     points: int = 0
     rank_level: RankLevel = RankLevel.BRONZE
-    updated_at: Optional[datetime] = None
+    updated_at: Optional[int] = None  # мілісекунди епохи
 
 @dataclass
 class Competition:
@@ -59,7 +59,7 @@ class Competition:
     group_id: Optional[int] = None
     comp_type: CompetitionType = CompetitionType.SPRINT
     route_data: str = ""  # JSON з координатами маршруту
-    start_time: Optional[datetime] = None
+    start_time: Optional[int] = None  # мілісекунди епохи
     duration_minutes: int = 60
     is_active: bool = True
 
@@ -71,7 +71,22 @@ class GpsTrack:
     competition_id: Optional[int] = None
     latitude: float = 0.0
     longitude: float = 0.0
-    timestamp: Optional[datetime] = None
+    timestamp: int = 0  # мілісекунди епохи
     distance_km: float = 0.0
     speed_kmh: float = 0.0
     is_valid: bool = True
+
+@dataclass
+class UserState:
+    """Поточний стан користувача для гарячого шляху обробки локації"""
+    user_id: int = 0
+    last_latitude: Optional[float] = None
+    last_longitude: Optional[float] = None
+    last_timestamp: Optional[int] = None  # мілісекунди епохи
+    total_distance: float = 0.0
+    total_steps: int = 0
+    points: int = 0
+
+    @property
+    def has_last_point(self) -> bool:
+        return self.last_timestamp is not None
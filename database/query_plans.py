@@ -0,0 +1,469 @@
+"""
+Перевірка планів виконання (EXPLAIN QUERY PLAN) гарячих запитів
+
+Тести: pytest tests/test_query_plans.py - плани всіх HOT_QUERIES та
+наявність кожного запиту коду в HOT_QUERIES або COLD_QUERIES.
+Звіт з планами: python -m database.query_plans (ненульовий код, якщо
+якийсь запит повертається до повного сканування або тимчасового сортування).
+"""
+
+import asyncio
+import sys
+import aiosqlite
+from typing import Dict, List, Tuple
+from database.migrations.runner import apply_migrations
+
+# Запити з services/ та bot/handlers/ з прикладами параметрів.
+# Новий запит у гарячому шляху потрібно додати сюди.
+HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    "users.by_telegram_id": (
+        "SELECT user_id FROM users WHERE telegram_id = ?",
+        (1,)
+    ),
+    "users.update_totals": (
+        """
+        UPDATE users SET total_distance = total_distance + ?,
+                         total_steps = total_steps + ?
+        WHERE user_id = ?
+        """,
+        (0.1, 130, 1)
+    ),
+    "users.register": (
+        """
+        INSERT OR IGNORE INTO users (telegram_id, username, first_name)
+        VALUES (?, ?, ?)
+        """,
+        (1, "user", "User")
+    ),
+    "users.set_totals": (
+        """
+        UPDATE users SET total_distance = ?, total_steps = ?
+        WHERE user_id = ?
+        """,
+        (1.0, 1300, 1)
+    ),
+    "users.names_by_ids": (
+        # IN (...) будується динамічно (leaderboard, результати змагань)
+        "SELECT user_id, first_name FROM users WHERE user_id IN (?, ?, ?)",
+        (1, 2, 3)
+    ),
+    "users.page": (
+        "SELECT user_id FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?",
+        (0, 1000)
+    ),
+    "users.count_after": (
+        "SELECT COUNT(*) FROM users WHERE user_id > ?",
+        (0,)
+    ),
+    "gps_tracks.insert": (
+        """
+        INSERT INTO gps_tracks
+            (user_id, competition_id, latitude, longitude, timestamp, distance_km, speed_kmh, is_valid)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (1, None, 50.45, 30.52, 0, 0.0, 0.0, 1)
+    ),
+    "gps_tracks.update_recomputed": (
+        """
+        UPDATE gps_tracks SET distance_km = ?, speed_kmh = ?, is_valid = ?
+        WHERE track_id = ?
+        """,
+        (0.1, 5.0, 1, 1)
+    ),
+    "gps_tracks.last_valid_point": (
+        """
+        SELECT latitude, longitude, timestamp
+        FROM gps_tracks
+        WHERE user_id = ? AND is_valid = 1
+        ORDER BY timestamp DESC
+        LIMIT 2
+        """,
+        (1,)
+    ),
+    "gps_tracks.recent_track": (
+        """
+        SELECT latitude, longitude, timestamp
+        FROM gps_tracks
+        WHERE user_id = ? AND is_valid = 1
+        ORDER BY timestamp DESC
+        LIMIT ?
+        """,
+        (1, 50)
+    ),
+    "archive.users_with_tracks": (
+        "SELECT DISTINCT user_id FROM gps_tracks",
+        ()
+    ),
+    "archive.first_cold_timestamp": (
+        "SELECT MIN(timestamp) FROM gps_tracks WHERE user_id = ? AND timestamp < ?",
+        (1, 0)
+    ),
+    "archive.hot_day": (
+        """
+        SELECT track_id, user_id, competition_id, latitude, longitude,
+               timestamp, distance_km, speed_kmh, is_valid
+        FROM gps_tracks
+        WHERE user_id = ? AND timestamp >= ? AND timestamp < ?
+        ORDER BY timestamp
+        """,
+        (1, 0, 1)
+    ),
+    "archive.hot_page": (
+        """
+        SELECT track_id, user_id, competition_id, latitude, longitude,
+               timestamp, distance_km, speed_kmh, is_valid
+        FROM gps_tracks
+        WHERE user_id = ? AND (timestamp, track_id) > (?, ?) AND timestamp <= ?
+        ORDER BY timestamp, track_id
+        LIMIT ?
+        """,
+        (1, 0, -1, 1, 1000)
+    ),
+    "archive.day_payload": (
+        "SELECT payload FROM track_archive WHERE user_id = ? AND day = ?",
+        (1, "2024-01-01")
+    ),
+    "archive.payload_page": (
+        """
+        SELECT day, payload FROM track_archive
+        WHERE user_id = ? AND day > ? AND day <= ?
+        ORDER BY day
+        LIMIT ?
+        """,
+        (1, "", "9999-12-31", 7)
+    ),
+    "archive.delete_hot_point": (
+        "DELETE FROM gps_tracks WHERE track_id = ?",
+        (1,)
+    ),
+    "archive.upsert_day": (
+        """
+        INSERT OR REPLACE INTO track_archive
+            (user_id, day, point_count, first_timestamp, last_timestamp, distance_km, payload)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (1, "2024-01-01", 1, 0, 0, 0.0, b"")
+    ),
+    "user_state.upsert": (
+        """
+        INSERT INTO user_state
+            (user_id, last_latitude, last_longitude, last_timestamp,
+             total_distance, total_steps, points, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            last_latitude = excluded.last_latitude,
+            last_longitude = excluded.last_longitude,
+            last_timestamp = excluded.last_timestamp,
+            total_distance = excluded.total_distance,
+            total_steps = excluded.total_steps,
+            points = excluded.points,
+            updated_at = excluded.updated_at
+        """,
+        (1, 50.45, 30.52, 0, 0.0, 0, 0, 0)
+    ),
+    "user_state.by_user": (
+        """
+        SELECT last_latitude, last_longitude, last_timestamp,
+               total_distance, total_steps, points
+        FROM user_state
+        WHERE user_id = ?
+        """,
+        (1,)
+    ),
+    "rankings.by_user": (
+        "SELECT ranking_id, points FROM rankings WHERE user_id = ? AND group_id IS NULL",
+        (1,)
+    ),
+    "rankings.update_points": (
+        """
+        UPDATE rankings
+        SET points = ?, rank_level = ?, updated_at = ?
+        WHERE user_id = ? AND group_id IS NULL
+        """,
+        (10, "bronze", 0, 1)
+    ),
+    "rankings.insert_if_missing": (
+        """
+        INSERT INTO rankings (user_id, points, rank_level, updated_at)
+        SELECT ?, ?, ?, ?
+        WHERE NOT EXISTS (SELECT 1 FROM rankings WHERE user_id = ? AND group_id IS NULL)
+        """,
+        (1, 10, "bronze", 0, 1)
+    ),
+    "rankings.user_position": (
+        """
+        SELECT points, rank_level,
+               (SELECT COUNT(*) + 1 FROM rankings r2
+                WHERE r2.group_id IS NULL AND r2.points > r1.points) as position
+        FROM rankings r1
+        WHERE user_id = ? AND group_id IS NULL
+        """,
+        (1,)
+    ),
+    "leaderboard.verify_position": (
+        """
+        SELECT points,
+               (SELECT COUNT(*) + 1 FROM rankings r2
+                WHERE r2.group_id IS NULL AND r2.points > r1.points)
+        FROM rankings r1
+        WHERE user_id = ? AND group_id IS NULL
+        """,
+        (1,)
+    ),
+    "start.my_ranking": (
+        """
+        SELECT u.total_distance, u.total_steps, r.points, r.rank_level
+        FROM users u
+        LEFT JOIN rankings r ON u.user_id = r.user_id AND r.group_id IS NULL
+        WHERE u.user_id = ?
+        """,
+        (1,)
+    ),
+    "start.top_players": (
+        """
+        SELECT u.first_name, r.points, r.rank_level
+        FROM users u
+        JOIN rankings r ON u.user_id = r.user_id
+        WHERE r.group_id IS NULL
+        ORDER BY r.points DESC
+        LIMIT 10
+        """,
+        ()
+    ),
+    "groups.by_telegram_id": (
+        "SELECT group_id FROM groups WHERE telegram_group_id = ?",
+        (1,)
+    ),
+    "groups.insert": (
+        "INSERT OR IGNORE INTO groups (telegram_group_id, group_name) VALUES (?, ?)",
+        (1, "group")
+    ),
+    "group_members.insert": (
+        """
+        INSERT OR IGNORE INTO group_members (group_id, user_id, joined_at)
+        VALUES (?, ?, ?)
+        """,
+        (1, 1, 0)
+    ),
+    "group_members.by_user_with_joined": (
+        "SELECT group_id, joined_at FROM group_members WHERE user_id = ?",
+        (1,)
+    ),
+    "rankings.group_init": (
+        """
+        INSERT OR IGNORE INTO rankings (user_id, group_id, points, rank_level, updated_at)
+        VALUES (?, ?, 0, 'bronze', ?)
+        """,
+        (1, 1, 0)
+    ),
+    "rankings.group_set": (
+        """
+        UPDATE rankings SET points = ?, rank_level = ?, updated_at = ?
+        WHERE group_id = ? AND user_id = ?
+        """,
+        (10, "bronze", 0, 1, 1)
+    ),
+    "group_members.by_user": (
+        "SELECT group_id FROM group_members WHERE user_id = ?",
+        (1,)
+    ),
+    "rankings.group_credit": (
+        """
+        INSERT INTO rankings (user_id, group_id, points, rank_level, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(group_id, user_id) WHERE group_id IS NOT NULL DO UPDATE SET
+            points = points + excluded.points,
+            rank_level = CASE
+                WHEN points + excluded.points >= ? THEN 'diamond'
+                WHEN points + excluded.points >= ? THEN 'platinum'
+                WHEN points + excluded.points >= ? THEN 'gold'
+                WHEN points + excluded.points >= ? THEN 'silver'
+                ELSE 'bronze'
+            END,
+            updated_at = excluded.updated_at
+        """,
+        (1, 1, 10, "bronze", 0, 5000, 2500, 1000, 500)
+    ),
+    "rankings.group_top": (
+        """
+        SELECT u.first_name, r.points, r.rank_level
+        FROM rankings r
+        JOIN users u ON u.user_id = r.user_id
+        WHERE r.group_id = ?
+        ORDER BY r.points DESC
+        LIMIT ?
+        """,
+        (1, 10)
+    ),
+    "rankings.group_position": (
+        """
+        SELECT points,
+               (SELECT COUNT(*) + 1 FROM rankings r2
+                WHERE r2.group_id = r1.group_id AND r2.points > r1.points) as position
+        FROM rankings r1
+        WHERE group_id = ? AND user_id = ?
+        """,
+        (1, 1)
+    ),
+    "competitions.create": (
+        """
+        INSERT INTO competitions (group_id, comp_type, route_data, start_time, duration_minutes)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (None, "sprint", None, 0, 30)
+    ),
+    "competitions.active_schedule": (
+        """
+        SELECT competition_id, start_time, duration_minutes
+        FROM competitions
+        WHERE is_active = 1
+        """,
+        ()
+    ),
+    "competitions.active_standings": (
+        """
+        SELECT c.competition_id, c.comp_type, p.user_id, p.distance_km, p.max_speed_kmh,
+               p.first_timestamp, p.last_timestamp, p.penalty_seconds, p.points_count
+        FROM competitions c
+        LEFT JOIN competition_participants p ON p.competition_id = c.competition_id
+        WHERE c.is_active = 1
+        """,
+        ()
+    ),
+    "competition_participants.join": (
+        """
+        INSERT OR IGNORE INTO competition_participants (competition_id, user_id, joined_at)
+        VALUES (?, ?, ?)
+        """,
+        (1, 1, 0)
+    ),
+    "penalties.insert": (
+        """
+        INSERT INTO penalties
+            (competition_id, user_id, started_at, ended_at, max_deviation_m, penalty_seconds, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (1, 1, 0, None, 60.0, 5, 0)
+    ),
+    "penalties.close": (
+        """
+        UPDATE penalties SET ended_at = ?, max_deviation_m = ?
+        WHERE competition_id = ? AND user_id = ? AND started_at = ?
+        """,
+        (0, 60.0, 1, 1, 0)
+    ),
+    "penalties.count_active": (
+        """
+        SELECT c.competition_id, COUNT(*)
+        FROM competitions c
+        JOIN penalties p ON p.competition_id = c.competition_id
+        WHERE c.is_active = 1
+        GROUP BY c.competition_id
+        """,
+        ()
+    ),
+    "competitions.active_by_id": (
+        """
+        SELECT comp_type, start_time, duration_minutes
+        FROM competitions
+        WHERE competition_id = ? AND is_active = 1
+        """,
+        (1,)
+    ),
+    "competitions.route_by_id": (
+        "SELECT route_data FROM competitions WHERE competition_id = ?",
+        (1,)
+    ),
+    "competition_participants.snapshot": (
+        """
+        UPDATE competition_participants
+        SET distance_km = ?, max_speed_kmh = ?, first_timestamp = ?, last_timestamp = ?,
+            penalty_seconds = ?, points_count = ?, updated_at = ?
+        WHERE competition_id = ? AND user_id = ?
+        """,
+        (1.0, 10.0, 0, 0, 0, 1, 0, 1, 1)
+    ),
+    "competitions.end": (
+        "UPDATE competitions SET is_active = 0 WHERE competition_id = ?",
+        (1,)
+    ),
+}
+
+# Запити, яким дозволено прохід повним індексом: топ-K з LIMIT, DISTINCT
+# за покривним індексом раз на прохід архівації та частковий індекс
+# активних змагань (у ньому лише активні рядки)
+INDEX_SCANS_ALLOWED = {
+    "start.top_players",
+    "archive.users_with_tracks",
+    "competitions.active_schedule",
+    "competitions.active_standings",
+    "penalties.count_active",
+}
+
+# Запити, що свідомо читають усю таблицю (лише при старті), без перевірки планів.
+# Кожен запит services/, bot/, api/ та reprocess.py має бути тут або в HOT_QUERIES.
+COLD_QUERIES: Dict[str, str] = {
+    "leaderboard.load": """
+        SELECT r.user_id, r.points, r.rank_level, u.first_name
+        FROM rankings r
+        JOIN users u ON u.user_id = r.user_id
+        WHERE r.group_id IS NULL
+    """,
+}
+
+async def explain(db: aiosqlite.Connection, sql: str, params: tuple = ()) -> List[str]:
+    """Рядки плану виконання запиту"""
+
+    cursor = await db.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    return [row[3] for row in await cursor.fetchall()]
+
+def find_plan_violations(name: str, plan: List[str]) -> List[str]:
+    """Пошук повних сканувань та тимчасових B-дерев у плані"""
+
+    violations = []
+    for detail in plan:
+        if detail.startswith("SCAN") and detail != "SCAN CONSTANT ROW":
+            uses_index = "USING INDEX" in detail or "USING COVERING INDEX" in detail
+            if not uses_index or name not in INDEX_SCANS_ALLOWED:
+                violations.append(detail)
+        elif "USE TEMP B-TREE" in detail:
+            violations.append(detail)
+
+    return violations
+
+async def check_query_plans(db: aiosqlite.Connection) -> Dict[str, List[str]]:
+    """Перевірка всіх гарячих запитів; повертає порушення за назвою запиту"""
+
+    report = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        violations = find_plan_violations(name, await explain(db, sql, params))
+        if violations:
+            report[name] = violations
+
+    return report
+
+async def main() -> int:
+    """Перевірка планів на свіжій схемі в пам'яті"""
+
+    async with aiosqlite.connect(":memory:") as db:
+        await apply_migrations(db)
+
+        for name, (sql, params) in HOT_QUERIES.items():
+            print(f"{name}:")
+            for detail in await explain(db, sql, params):
+                print(f"    {detail}")
+
+        report = await check_query_plans(db)
+
+    if report:
+        print("\n❌ Регресія планів виконання:")
+        for name, violations in report.items():
+            for detail in violations:
+                print(f"    {name}: {detail}")
+        return 1
+
+    print("\n✅ Усі гарячі запити використовують індекси")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Синтетичне навантаження на Dispatcher бота без Telegram
+
+Справжній Dispatcher з setup_routers отримує згенеровані оновлення: /start,
+потоки локацій тисяч користувачів уздовж випадкових маршрутів, "Мій рейтинг",
+"Топ гравців" та колбеки змагань. Bot працює через сесію, що лише записує
+виклики API. Звіт: пропускна здатність, p50/p95/p99 за обробниками, кількість
+транзакцій БД та статистика пакетного писача.
+
+Запуск:
+    python loadtest.py --users 2000 --points 30 --concurrency 200
+    python loadtest.py --json report.json     # звіт для порівняння між змінами
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+KYIV = (50.4501, 30.5234)
+KM_PER_DEGREE = 111.32
+
+# Типи активності: (мін, макс) швидкість, км/год
+ACTIVITY_SPEEDS = [(4.0, 6.0), (8.0, 14.0), (15.0, 25.0)]
+
+@dataclass
+class SimulatedUser:
+    """Користувач, що рухається випадковим маршрутом"""
+    telegram_id: int
+    latitude: float
+    longitude: float
+    heading: float
+    speed_kmh: float
+    timestamp: int
+    competition_id: Optional[int] = None
+
+    def step(self, rng: random.Random, interval_s: float):
+        """Наступна точка: плавна зміна курсу та шум GPS близько 3 м"""
+
+        self.heading = (self.heading + rng.gauss(0, 15)) % 360
+        distance_km = self.speed_kmh * interval_s / 3600
+
+        self.latitude += distance_km * math.cos(math.radians(self.heading)) / KM_PER_DEGREE
+        self.longitude += (
+            distance_km * math.sin(math.radians(self.heading))
+            / (KM_PER_DEGREE * math.cos(math.radians(self.latitude)))
+        )
+        self.timestamp += int(interval_s * 1000)
+
+    def noisy_position(self, rng: random.Random) -> tuple:
+        noise = 0.003 / KM_PER_DEGREE
+        return self.latitude + rng.gauss(0, noise), self.longitude + rng.gauss(0, noise)
+
+@dataclass
+class LoadReport:
+    """Зібрані заміри прогону"""
+    samples: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    updates: int = 0
+    unhandled: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль за найближчим рангом по відсортованому списку"""
+
+    if not values:
+        return 0.0
+    index = max(0, math.ceil(q / 100 * len(values)) - 1)
+    return values[index]
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Навантажувальний тест Dispatcher без Telegram")
+    parser.add_argument("--users", type=int, default=1000, help="кількість користувачів")
+    parser.add_argument("--points", type=int, default=30, help="локацій на користувача")
+    parser.add_argument("--concurrency", type=int, default=100, help="одночасних оновлень в обробці")
+    parser.add_argument("--competitions", type=int, default=5, help="змагань, створених колбеками")
+    parser.add_argument("--join-ratio", type=float, default=0.3, help="частка користувачів у змаганнях")
+    parser.add_argument("--rating-ratio", type=float, default=0.05, help="ймовірність запиту рейтингу після точки")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="файл БД (за замовчуванням - тимчасовий)")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", help="зберегти звіт у JSON")
+    return parser.parse_args(argv)
+
+def configure_environment(args: argparse.Namespace):
+    """Оточення до імпорту модулів бота: config читає його під час імпорту"""
+
+    os.environ["DATABASE_PATH"] = args.db or os.path.join(tempfile.mkdtemp(prefix="loadtest_"), "loadtest.db")
+    os.environ["LOG_LEVEL"] = args.log_level
+    os.environ.setdefault("BOT_TOKEN", "123456:LOADTEST")
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Прогін сценарію; повертає звіт"""
+
+    from aiogram import BaseMiddleware, Bot, Dispatcher
+    from aiogram.client.session.base import BaseSession
+    from aiogram.dispatcher.event.bases import UNHANDLED
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from aiogram.types import Chat, Message, Update
+
+    from bot.handlers import setup_routers
+    from bot.middlewares.auth import AuthMiddleware
+    from bot.middlewares.groups import GroupMembershipMiddleware
+    from bot.middlewares.metrics import MetricsMiddleware
+    from config import config
+    from database.database import close_db, db_pool, init_db
+    from services.archive_service import track_archive_service
+    from services.competition_service import competition_scheduler
+    from services.ingestion_service import gps_ingestion
+    from services.leaderboard import leaderboard
+    from services.location_pipeline import location_pipeline
+    from services.penalty_service import penalty_service
+    from services.standings_service import standings_engine
+    from services.user_directory import user_directory
+    from utils.timestamps import now_ms
+
+    class RecordingSession(BaseSession):
+        """Сесія Bot, що рахує виклики API замість запитів до Telegram"""
+
+        def __init__(self):
+            super().__init__()
+            self.calls: Counter = Counter()
+            self._message_id = 0
+
+        async def make_request(self, bot, method, timeout=None):
+            self.calls[type(method).__name__] += 1
+
+            if method.__returning__ is Message:
+                self._message_id += 1
+                return Message(
+                    message_id=self._message_id,
+                    date=int(time.time()),
+                    chat=Chat(id=getattr(method, "chat_id", 0) or 0, type="private")
+                )
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+        async def close(self):
+            pass
+
+    class HandlerTimer(BaseMiddleware):
+        """Внутрішній middleware: час кожного обробника під його назвою"""
+
+        def __init__(self, report: LoadReport):
+            self.report = report
+
+        async def __call__(self, handler, event, data):
+            started = time.perf_counter()
+            try:
+                return await handler(event, data)
+            finally:
+                name = data["handler"].callback.__name__
+                self.report.samples[name].append((time.perf_counter() - started) * 1000)
+
+    rng = random.Random(args.seed)
+    report = LoadReport()
+    session = RecordingSession()
+    bot = Bot(token=os.environ["BOT_TOKEN"], session=session)
+    dp = Dispatcher(storage=MemoryStorage())
+    setup_routers(dp)
+
+    # Як у main.py: інструментування входить у виміряний час
+    if config.METRICS_ENABLED:
+        dp.message.middleware(MetricsMiddleware("message"))
+        dp.callback_query.middleware(MetricsMiddleware("callback_query"))
+
+    timer = HandlerTimer(report)
+    dp.message.middleware(timer)
+    dp.callback_query.middleware(timer)
+
+    dp.message.middleware(AuthMiddleware())
+    dp.callback_query.middleware(AuthMiddleware())
+    dp.message.outer_middleware(GroupMembershipMiddleware())
+    dp.callback_query.outer_middleware(GroupMembershipMiddleware())
+
+    await init_db()
+    await leaderboard.load()
+    await gps_ingestion.start()
+    await standings_engine.load()
+    await standings_engine.start()
+    await penalty_service.start()
+    await competition_scheduler.start()
+
+    slots = asyncio.Semaphore(args.concurrency)
+    counters = {"update_id": 0, "message_id": 0}
+
+    def chat(user: SimulatedUser) -> dict:
+        return {"id": user.telegram_id, "type": "private"}
+
+    def sender(user: SimulatedUser) -> dict:
+        return {
+            "id": user.telegram_id,
+            "is_bot": False,
+            "first_name": f"Load{user.telegram_id}",
+            "username": f"load{user.telegram_id}"
+        }
+
+    def message(user: SimulatedUser, date_ms: Optional[int] = None, **content) -> dict:
+        counters["message_id"] += 1
+        return {
+            "message_id": counters["message_id"],
+            "date": (date_ms if date_ms is not None else now_ms()) // 1000,
+            "chat": chat(user),
+            "from": sender(user),
+            **content
+        }
+
+    async def feed(payload: dict):
+        counters["update_id"] += 1
+        update = Update.model_validate({"update_id": counters["update_id"], **payload}, context={"bot": bot})
+
+        async with slots:
+            started = time.perf_counter()
+            try:
+                if await dp.feed_update(bot, update) is UNHANDLED:
+                    report.unhandled += 1
+            except Exception:
+                report.errors += 1
+            finally:
+                report.samples["update"].append((time.perf_counter() - started) * 1000)
+                report.updates += 1
+
+    async def send_text(user: SimulatedUser, text: str):
+        await feed({"message": message(user, text=text)})
+
+    async def send_callback(user: SimulatedUser, data: str):
+        await feed({"callback_query": {
+            "id": str(counters["update_id"]),
+            "from": sender(user),
+            "chat_instance": str(user.telegram_id),
+            "data": data,
+            "message": message(user, text="🏆 Змагання")
+        }})
+
+    # Маршрути починаються в минулому, щоб останні точки припали приблизно на "зараз"
+    interval_range = (15.0, 30.0)
+    history_ms = int(args.points * interval_range[1] * 1000)
+    started_at = now_ms() - history_ms
+
+    users = []
+    for index in range(args.users):
+        speed_range = rng.choice(ACTIVITY_SPEEDS)
+        users.append(SimulatedUser(
+            telegram_id=10_000_000 + index,
+            latitude=KYIV[0] + rng.uniform(-0.1, 0.1),
+            longitude=KYIV[1] + rng.uniform(-0.15, 0.15),
+            heading=rng.uniform(0, 360),
+            speed_kmh=rng.uniform(*speed_range),
+            timestamp=started_at + rng.randint(0, 60_000)
+        ))
+
+    async def location_stream(user: SimulatedUser, user_rng: random.Random):
+        if user.competition_id is not None:
+            await send_callback(user, f"competition_join_{user.competition_id}")
+
+        for _ in range(args.points):
+            user.step(user_rng, user_rng.uniform(*interval_range))
+            latitude, longitude = user.noisy_position(user_rng)
+            await feed({"message": message(
+                user, date_ms=user.timestamp,
+                location={"latitude": latitude, "longitude": longitude, "horizontal_accuracy": 5}
+            )})
+
+            roll = user_rng.random()
+            if roll < args.rating_ratio:
+                await send_text(user, "📊 Мій рейтинг")
+            elif roll < args.rating_ratio * 1.5:
+                await send_text(user, "🏆 Топ гравців")
+            elif user.competition_id is not None and roll < args.rating_ratio * 2:
+                await send_callback(user, f"competition_standings_{user.competition_id}")
+
+    db_before = dict(db_pool.stats)
+    started = time.perf_counter()
+
+    # 1. Реєстрація
+    await asyncio.gather(*(send_text(user, "/start") for user in users))
+
+    # 2. Організатори створюють змагання колбеками з клавіатури
+    organisers = users[:args.competitions]
+    for index, user in enumerate(organisers):
+        await send_callback(user, "competition_sprint" if index % 2 == 0 else "competition_endurance")
+
+    async with db_pool.read() as db:
+        cursor = await db.execute("SELECT competition_id FROM competitions WHERE is_active = 1")
+        competition_ids = [row[0] for row in await cursor.fetchall()]
+
+    if competition_ids:
+        for user in users[len(organisers):]:
+            if rng.random() < args.join_ratio:
+                user.competition_id = rng.choice(competition_ids)
+
+    # 3. Потоки локацій усіх користувачів одночасно
+    await asyncio.gather(*(
+        location_stream(user, random.Random(args.seed * 1_000_003 + user.telegram_id))
+        for user in users
+    ))
+
+    report.elapsed = time.perf_counter() - started
+
+    # Дозапис черг входить у звіт БД, але не в час обробників
+    await competition_scheduler.stop()
+    await penalty_service.stop()
+    await standings_engine.stop()
+    await track_archive_service.stop()
+    await location_pipeline.flush_pending()
+    await gps_ingestion.stop()
+
+    db_stats = {key: db_pool.stats[key] - db_before.get(key, 0) for key in db_pool.stats}
+    ingestion_stats = dict(gps_ingestion.stats)
+    await close_db()
+    await bot.session.close()
+
+    handlers = {}
+    for name, values in sorted(report.samples.items()):
+        values.sort()
+        handlers[name] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1]
+        }
+
+    stages = {
+        name: {"count": count, "avg_ms": total / count if count else 0.0}
+        for name, (count, total) in location_pipeline.stage_stats.items()
+    }
+
+    return {
+        "users": args.users,
+        "points_per_user": args.points,
+        "concurrency": args.concurrency,
+        "updates": report.updates,
+        "unhandled": report.unhandled,
+        "errors": report.errors,
+        "elapsed_s": report.elapsed,
+        "updates_per_s": report.updates / report.elapsed if report.elapsed else 0.0,
+        "handlers": handlers,
+        "pipeline_stages": stages,
+        "db": db_stats,
+        "ingestion": ingestion_stats,
+        "user_directory": dict(user_directory.stats),
+        "bot_calls": dict(session.calls)
+    }
+
+def print_report(result: Dict[str, Any]):
+    print(
+        f"\n📊 {result['users']} користувачів × {result['points_per_user']} точок, "
+        f"паралельно {result['concurrency']}: {result['updates']} оновлень за {result['elapsed_s']:.2f}с "
+        f"({result['updates_per_s']:,.0f} оновлень/с), необроблених {result['unhandled']}, помилок {result['errors']}\n"
+    )
+
+    print(f"{'обробник':<32}{'к-сть':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  мс")
+    for name, row in result["handlers"].items():
+        print(
+            f"{name:<32}{row['count']:>8}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+            f"{row['p99_ms']:>9.2f}{row['max_ms']:>9.2f}"
+        )
+
+    print("\nЕтапи конвеєра локацій (середнє, мс): " + ", ".join(
+        f"{name}={row['avg_ms']:.3f}" for name, row in result["pipeline_stages"].items()
+    ))
+    print("БД: " + ", ".join(f"{key}={value}" for key, value in result["db"].items()))
+    print("Пакетний писач: " + ", ".join(f"{key}={value}" for key, value in result["ingestion"].items()))
+    print("Кеш user_id: " + ", ".join(f"{key}={value}" for key, value in result["user_directory"].items()))
+    print("Виклики Bot API: " + ", ".join(f"{key}={value}" for key, value in sorted(result["bot_calls"].items())))
+
+def main(argv: Optional[List[str]] = None):
+    """Точка входу CLI"""
+
+    args = parse_args(argv)
+    configure_environment(args)
+
+    result = asyncio.run(run(args))
+    print_report(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -8,15 +8,67 @@ import asyncio
 import logging
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiohttp import web
 
 from config import config
+from api.app import create_api_app
+from api.server import ApiServer
 from bot.handlers import setup_routers
-from database.database import init_db
+from bot.middlewares.auth import AuthMiddleware
+from bot.middlewares.groups import GroupMembershipMiddleware
+from bot.middlewares.metrics import MetricsMiddleware
+from bot.webhook import create_webhook_app
+from database.database import init_db, close_db
+from services.ingestion_service import gps_ingestion
+from services.archive_service import track_archive_service
+from services.competition_service import competition_scheduler
+from services.penalty_service import penalty_service
+from services.standings_service import standings_engine
+from services.leaderboard import leaderboard
+from services.location_pipeline import location_pipeline
 from utils.logger import setup_logger
+from utils.metrics import MetricsServer, metrics
 
 # Налаштування логування
 logger = setup_logger()
 
+ALLOWED_UPDATES = ["message", "callback_query", "location"]
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """Приймання оновлень через aiohttp webhook сервер"""
+
+    if not config.WEBHOOK_SECRET:
+        raise ValueError("WEBHOOK_SECRET не встановлено в .env файлі: обов'язковий у режимі webhook")
+
+    app = create_webhook_app(
+        bot, dp,
+        path=config.WEBHOOK_PATH,
+        secret=config.WEBHOOK_SECRET,
+        max_concurrency=config.WEBHOOK_MAX_CONCURRENCY
+    )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, config.WEBHOOK_HOST, config.WEBHOOK_PORT)
+    await site.start()
+    logger.info(f"🌐 Webhook сервер слухає {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}{config.WEBHOOK_PATH}")
+
+    if config.WEBHOOK_URL:
+        await bot.set_webhook(
+            config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH,
+            secret_token=config.WEBHOOK_SECRET,
+            allowed_updates=ALLOWED_UPDATES,
+            max_connections=config.WEBHOOK_MAX_CONCURRENCY
+        )
+        logger.info("✅ Webhook зареєстровано в Telegram")
+    else:
+        logger.warning("⚠️ WEBHOOK_URL не задано: сервер приймає лише локальні запити")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
 async def main():
     """Головна функція запуску бота"""
     logger.info("🚀 Запуск Telegram Fitness Bot...")
@@ -29,17 +81,69 @@ async def main():
     await init_db()
     logger.info("✅ База даних ініціалізована")
 
+    # Завантаження таблиці лідерів у пам'ять
+    await leaderboard.load()
+
+    # Запуск пакетного запису GPS точок
+    await gps_ingestion.start()
+
+    # Запуск періодичної архівації холодних треків
+    await track_archive_service.start()
+
+    # Таблиці результатів активних змагань
+    await standings_engine.load()
+    await standings_engine.start()
+    await penalty_service.start()
+
+    # Запуск автозавершення змагань
+    await competition_scheduler.start()
+
+    # HTTP API для пакетного завантаження локацій з Mini App
+    api_server = ApiServer(create_api_app(), config.API_HOST, config.API_PORT) if config.API_ENABLED else None
+    if api_server:
+        await api_server.start()
+
     # Налаштування роутерів
     setup_routers(dp)
     logger.info("✅ Обробники команд налаштовані")
 
-    # Запуск поллінгу
+    # Метрики обробників та локальний /metrics
+    metrics_server = MetricsServer(metrics, config.METRICS_HOST, config.METRICS_PORT) if config.METRICS_ENABLED else None
+    if metrics_server:
+        dp.message.middleware(MetricsMiddleware("message"))
+        dp.callback_query.middleware(MetricsMiddleware("callback_query"))
+        await metrics_server.start()
+
+    # Внутрішній користувач оновлення; після метрик, щоб його визначення входило в заміри
+    dp.message.middleware(AuthMiddleware())
+    dp.callback_query.middleware(AuthMiddleware())
+    # Учасники груп - для кожного оновлення з групи, навіть без обробника
+    dp.message.outer_middleware(GroupMembershipMiddleware())
+    dp.callback_query.outer_middleware(GroupMembershipMiddleware())
+
+    # Запуск поллінгу (за замовчуванням) або webhook сервера
     try:
-        await dp.start_polling(bot, allowed_updates=["message", "callback_query", "location"])
+        if config.BOT_MODE == "webhook":
+            await run_webhook(bot, dp)
+        else:
+            await dp.start_polling(bot, allowed_updates=ALLOWED_UPDATES)
     except Exception as e:
         logger.error(f"❌ Помилка при запуску бота: {e}")
     finally:
         await bot.session.close()
+        if metrics_server:
+            await metrics_server.stop()
+        if api_server:
+            await api_server.stop()
+        await competition_scheduler.stop()
+        await penalty_service.stop()
+        await standings_engine.stop()
+        await track_archive_service.stop()
+        await location_pipeline.flush_pending()
+        await gps_ingestion.stop()
+        await close_db()
+        # Дочекатися запису логів з черги loguru
+        await logger.complete()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -5,6 +5,7 @@ class FitnessMap {
         this.map = null;
         this.userMarker = null;
         this.routePolyline = null;
+        this.historyPolyline = null;
         this.userLocation = null;
         this.routePoints = [];
         this.totalDistance = 0;
@@ -51,6 +52,7 @@ class FitnessMap {
         // Збереження глобального посилання
         window.mapInstance = this.map;
         window.updateMapLocation = (lat, lng) => this.updateUserLocation(lat, lng);
+        window.showRecentTrack = (points) => this.showRecentTrack(points);
 
         console.log('🗺️ Карта ініціалізована');
     }
@@ -137,6 +139,25 @@ class FitnessMap {
         }).addTo(this.map);
     }
 
+    showRecentTrack(points) {
+        // Останні збережені точки з сервера окремим шаром під поточним маршрутом
+        if (!this.map) return;
+
+        if (this.historyPolyline) {
+            this.map.removeLayer(this.historyPolyline);
+            this.historyPolyline = null;
+        }
+
+        if (!points || points.length < 2) return;
+
+        this.historyPolyline = L.polyline(points.map(([lat, lng]) => [lat, lng]), {
+            color: '#0088cc',
+            weight: 3,
+            opacity: 0.5,
+            dashArray: '6 6'
+        }).addTo(this.map);
+    }
+
     calculateDistance(point1, point2) {
         // Формула гаверсинуса для розрахунку відстані між двома точками
         const R = 6371; // Радіус Землі в км
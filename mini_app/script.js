@@ -1,11 +1,23 @@
 // Основна JavaScript логіка для Fitness Competition Mini App
 
+// Адреса HTTP API бота (порожня - той самий домен, що й Mini App)
+const API_BASE_URL = window.FITNESS_API_URL || '';
+const LOCATION_UPLOAD_INTERVAL_MS = 10000;
+const LOCATION_BATCH_SIZE = 500;
+const LOCATION_BUFFER_LIMIT = 5000;
+const STATS_POLL_INTERVAL_MS = 30000;
+
 class FitnessApp {
     constructor() {
         this.tg = window.Telegram.WebApp;
         this.currentTab = 'home';
         this.isTracking = false;
         this.activeCompetition = null;
+        this.locationBuffer = [];
+        this.uploadTimer = null;
+        this.isUploading = false;
+        this.statsEtag = null;
+        this.leaderboard = [];
         this.userStats = {
             totalDistance: 0,
             totalSteps: 0,
@@ -27,8 +39,13 @@ class FitnessApp {
         // Налаштування обробників подій
         this.setupEventListeners();
 
-        // Завантаження даних користувача
+        // Завантаження даних користувача та періодичне оновлення
         this.loadUserData();
+        setInterval(() => {
+            if (document.visibilityState === 'visible') {
+                this.loadUserData();
+            }
+        }, STATS_POLL_INTERVAL_MS);
 
         console.log('🚀 Fitness App ініціалізовано');
     }
@@ -76,6 +93,13 @@ class FitnessApp {
         document.getElementById('show-route')?.addEventListener('click', () => {
             this.showRoute();
         });
+
+        // Відправка залишку точок при згортанні Mini App
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') {
+                this.flushLocations(true);
+            }
+        });
     }
 
     switchTab(tabName) {
@@ -130,6 +154,8 @@ class FitnessApp {
             );
         }
 
+        this.uploadTimer = setInterval(() => this.flushLocations(), LOCATION_UPLOAD_INTERVAL_MS);
+
         this.showNotification('Відстеження розпочато', '📍 GPS відстеження активовано!');
     }
 
@@ -142,11 +168,17 @@ class FitnessApp {
             navigator.geolocation.clearWatch(this.watchId);
         }
 
+        if (this.uploadTimer) {
+            clearInterval(this.uploadTimer);
+            this.uploadTimer = null;
+        }
+        this.flushLocations();
+
         this.showNotification('Відстеження зупинено', '⏹️ GPS відстеження деактивовано.');
     }
 
     handleLocationUpdate(position) {
-        const { latitude, longitude, speed } = position.coords;
+        const { latitude, longitude, accuracy, speed } = position.coords;
 
         // Оновлення карти
         if (window.updateMapLocation) {
@@ -160,40 +192,100 @@ class FitnessApp {
             speedElement.textContent = `${speedKmh} км/год`;
         }
 
-        // Надсилання даних до бота
-        this.sendLocationToBot(latitude, longitude);
+        // Точка потрапляє в буфер і відправляється разом з іншими
+        this.bufferLocation(latitude, longitude, accuracy, position.timestamp);
 
         console.log(`📍 Локація оновлена: ${latitude.toFixed(6)}, ${longitude.toFixed(6)}`);
     }
 
-    sendLocationToBot(latitude, longitude) {
-        // Надсилання даних через Telegram Mini App API
-        const locationData = {
+    bufferLocation(latitude, longitude, accuracy, timestamp) {
+        this.locationBuffer.push({
             latitude,
             longitude,
-            timestamp: Date.now(),
-            user_id: this.tg.initDataUnsafe.user?.id
-        };
+            accuracy: accuracy ?? null,
+            timestamp: Math.round(timestamp || Date.now())
+        });
 
-        // Відправка даних до бота
-        this.tg.sendData(JSON.stringify({
-            type: 'location_update',
-            data: locationData
-        }));
+        // Без мережі зберігаємо лише найновіші точки
+        if (!this.isUploading && this.locationBuffer.length > LOCATION_BUFFER_LIMIT) {
+            this.locationBuffer.splice(0, this.locationBuffer.length - LOCATION_BUFFER_LIMIT);
+        }
+    }
+
+    async flushLocations(keepalive = false) {
+        // Відправка накопичених точок пакетами; при помилці вони лишаються в буфері
+        if (this.isUploading || this.locationBuffer.length === 0) return;
+
+        this.isUploading = true;
+        try {
+            while (this.locationBuffer.length > 0) {
+                const batch = this.locationBuffer.slice(0, LOCATION_BATCH_SIZE);
+                const response = await fetch(`${API_BASE_URL}/api/locations`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'Authorization': `tma ${this.tg.initData}`
+                    },
+                    body: JSON.stringify({ points: batch }),
+                    keepalive
+                });
+
+                // 4xx не виправиться повтором - відкидаємо пакет
+                if (response.status >= 500) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                this.locationBuffer.splice(0, batch.length);
+
+                if (!response.ok) {
+                    console.error(`❌ Пакет локацій відхилено: HTTP ${response.status}`);
+                    break;
+                }
+
+                const result = await response.json();
+                console.log(`📦 Відправлено ${result.accepted}/${result.received} точок, ${result.distance_km} км`);
+            }
+        } catch (error) {
+            console.error('Помилка відправки локацій:', error);
+        } finally {
+            this.isUploading = false;
+        }
     }
 
-    loadUserData() {
-        // Симуляція завантаження даних користувача
-        setTimeout(() => {
+    async loadUserData() {
+        // Статистика з API; ETag попередньої відповіді дає 304 без тіла, якщо нічого не змінилось
+        try {
+            const headers = { 'Authorization': `tma ${this.tg.initData}` };
+            if (this.statsEtag) {
+                headers['If-None-Match'] = this.statsEtag;
+            }
+
+            const response = await fetch(`${API_BASE_URL}/api/stats`, { headers, cache: 'no-store' });
+            if (response.status === 304) return;
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+
+            const data = await response.json();
+            this.statsEtag = response.headers.get('ETag');
+
             this.userStats = {
-                totalDistance: 12.5,
-                totalSteps: 8420,
-                currentRank: 'silver',
-                totalPoints: 245
+                totalDistance: data.user.distance_km.toFixed(1),
+                totalSteps: data.user.steps,
+                currentRank: data.user.rank_level,
+                totalPoints: data.user.points
             };
+            this.leaderboard = data.leaderboard;
 
             this.updateStatsDisplay();
-        }, 1000);
+            if (this.currentTab === 'rankings') {
+                this.loadRankings();
+            }
+            if (window.showRecentTrack) {
+                window.showRecentTrack(data.track);
+            }
+        } catch (error) {
+            console.error('Помилка завантаження статистики:', error);
+        }
     }
 
     updateStatsDisplay() {
@@ -228,27 +320,37 @@ class FitnessApp {
         const leaderboard = document.getElementById('leaderboard');
         if (!leaderboard) return;
 
-        // Симуляція даних лідерборду
-        const mockLeaders = [
-            { rank: 1, name: 'Олександр М.', points: 1250, level: '🥇' },
-            { rank: 2, name: 'Марія К.', points: 1180, level: '🥈' },
-            { rank: 3, name: 'Іван П.', points: 980, level: '🥉' },
-            { rank: 4, name: 'Анна С.', points: 876, level: '🏃‍♀️' },
-            { rank: 5, name: 'Петро Л.', points: 654, level: '🏃‍♂️' }
-        ];
-
-        leaderboard.innerHTML = mockLeaders.map(leader => `
-            <div class="leader-item">
-                <div class="leader-rank">#${leader.rank}</div>
+        const rankEmojis = {
+            bronze: '🥉',
+            silver: '🥈',
+            gold: '🥇',
+            platinum: '💎',
+            diamond: '👑'
+        };
+
+        if (this.leaderboard.length === 0) {
+            leaderboard.innerHTML = '<div class="leader-item">🏆 Рейтинг поки що порожній. Будь першим!</div>';
+            return;
+        }
+
+        leaderboard.innerHTML = this.leaderboard.map(leader => `
+            <div class="leader-item${leader.is_me ? ' me' : ''}">
+                <div class="leader-rank">#${leader.position}</div>
                 <div class="leader-info">
-                    <div class="leader-name">${leader.name}</div>
-                    <div class="leader-details">${leader.level} Активний гравець</div>
+                    <div class="leader-name">${this.escapeHtml(leader.name || 'Гравець')}</div>
+                    <div class="leader-details">${rankEmojis[leader.rank_level] || '🥉'} ${leader.is_me ? 'Це ти' : 'Активний гравець'}</div>
                 </div>
                 <div class="leader-points">${leader.points} очок</div>
             </div>
         `).join('');
     }
 
+    escapeHtml(text) {
+        const element = document.createElement('div');
+        element.textContent = text;
+        return element.innerHTML;
+    }
+
     filterRankings(filter) {
         document.querySelectorAll('.filter-btn').forEach(btn => {
             btn.classList.remove('active');
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Масовий перерахунок історичних треків за поточними правилами GpsService та RankingService
+
+Запуск (при зупиненому боті):
+    python reprocess.py --workers 8
+    python reprocess.py --reset        # почати спочатку, ігноруючи контрольну точку
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database.database import init_db, close_db, db_pool
+from database.models import GpsTrack, UserState
+from services.archive_service import track_archive_service
+from services.location_pipeline import LocationResult, location_pipeline
+from services.user_state_service import user_state_store
+from utils import geo
+from utils.logger import setup_logger
+from utils.timestamps import now_ms
+
+logger = setup_logger()
+
+DEFAULT_CHECKPOINT = "reprocess_checkpoint.json"
+
+# (track_id або None для архівних, latitude, longitude, timestamp)
+PointRow = Tuple[Optional[int], float, float, int]
+
+@dataclass
+class UserResult:
+    """Перераховані дані одного користувача"""
+    user_id: int
+    state: UserState
+    rank_level: str
+    point_updates: List[Tuple[float, float, int, int]] = field(default_factory=list)  # distance, speed, is_valid, track_id
+    group_points: Dict[int, int] = field(default_factory=dict)
+    point_count: int = 0
+
+def recompute_user(user_id: int, points: List[PointRow], joins: List[Tuple[int, int]]) -> UserResult:
+    """
+    Перерахунок користувача в процесі-воркері.
+
+    Точки проходять ті самі етапи validate та apply_delta, що й живі
+    локації, тому зміна правил у сервісах одразу змінює і перерахунок.
+    Відрізки та швидкості між сусідніми валідними точками рахуються
+    векторними ядрами utils.geo для всього треку одразу; скалярний
+    розрахунок від стану лишається лише для точок після незарахованого
+    відрізка, коли опорна точка стану - не попередня.
+    """
+
+    state = UserState(user_id=user_id)
+    result = UserResult(user_id=user_id, state=state, rank_level="bronze", point_count=len(points))
+    gps = location_pipeline.gps_service
+
+    locations = [
+        GpsTrack(user_id=user_id, latitude=latitude, longitude=longitude, timestamp=timestamp)
+        for _, latitude, longitude, timestamp in points
+    ]
+    valid = [location_pipeline.validate(location) for location in locations]
+
+    track = [location for location, is_valid in zip(locations, valid) if is_valid]
+    lats = np.fromiter((p.latitude for p in track), dtype=np.float64, count=len(track))
+    lons = np.fromiter((p.longitude for p in track), dtype=np.float64, count=len(track))
+    lengths = geo.segment_lengths(lats, lons)
+    speeds = gps.track_speeds(track)
+
+    # Накопичені бали після кожної точки - для групових рейтингів з моменту вступу
+    timestamps: List[int] = []
+    cumulative: List[int] = []
+
+    index = -1   # номер поточної точки серед валідних
+    anchor = -1  # номер валідної точки, що є опорною в стані
+
+    for (track_id, _, _, timestamp), location, is_valid in zip(points, locations, valid):
+        delta = LocationResult(user_id=user_id, timestamp=timestamp)
+
+        if is_valid:
+            index += 1
+            if anchor >= 0 and anchor == index - 1:
+                delta.speed_kmh = float(speeds[index])
+                delta.distance_km = gps.counted_distance(float(lengths[anchor]), timestamp - state.last_timestamp)
+            else:
+                delta.speed_kmh = gps.speed_from_state(state, location, timestamp)
+                delta.distance_km = gps.distance_from_state(state, location, timestamp)
+
+            if location_pipeline.apply_delta(state, location, delta):
+                anchor = index
+
+        if track_id is not None:
+            result.point_updates.append((delta.distance_km, delta.speed_kmh, int(is_valid), track_id))
+
+        timestamps.append(timestamp)
+        cumulative.append(state.points)
+
+    for group_id, joined_at in joins:
+        index = bisect_left(timestamps, joined_at)
+        before = cumulative[index - 1] if index > 0 else 0
+        result.group_points[group_id] = state.points - before
+
+    result.rank_level = location_pipeline.ranking_service.calculate_rank_level(state.points)
+    return result
+
+class Checkpoint:
+    """Останній повністю записаний user_id для відновлення після зупинки"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.last_user_id = 0
+        self.users = 0
+        self.points = 0
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.last_user_id = data.get("last_user_id", 0)
+            self.users = data.get("users", 0)
+            self.points = data.get("points", 0)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"last_user_id": self.last_user_id, "users": self.users, "points": self.points}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def load_user(user_id: int) -> Tuple[List[PointRow], List[Tuple[int, int]]]:
+    """Усі точки користувача (архів та gps_tracks) у порядку часу та його вступи в групи"""
+
+    points = [
+        (point.track_id, point.latitude, point.longitude, point.timestamp)
+        async for point in track_archive_service.iter_user_points(user_id)
+    ]
+
+    async with db_pool.read() as db:
+        cursor = await db.execute(
+            "SELECT group_id, joined_at FROM group_members WHERE user_id = ?", (user_id,)
+        )
+        joins = [(row[0], row[1]) for row in await cursor.fetchall()]
+
+    return points, joins
+
+async def iter_user_ids(after_user_id: int, chunk_size: int):
+    """user_id по зростанню, порціями (keyset pagination замість OFFSET)"""
+
+    last_user_id = after_user_id
+    while True:
+        async with db_pool.read() as db:
+            cursor = await db.execute(
+                "SELECT user_id FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                (last_user_id, chunk_size)
+            )
+            user_ids = [row[0] for row in await cursor.fetchall()]
+
+        if not user_ids:
+            return
+
+        yield user_ids
+        last_user_id = user_ids[-1]
+
+async def write_results(results: List[UserResult]):
+    """Запис перерахованих користувачів однією транзакцією"""
+
+    updated_at = now_ms()
+    ranking = location_pipeline.ranking_service
+
+    async with db_pool.write() as db:
+        await db.executemany("""
+            UPDATE gps_tracks SET distance_km = ?, speed_kmh = ?, is_valid = ?
+            WHERE track_id = ?
+        """, [update for result in results for update in result.point_updates])
+
+        await db.executemany("""
+            UPDATE users SET total_distance = ?, total_steps = ?
+            WHERE user_id = ?
+        """, [(r.state.total_distance, r.state.total_steps, r.user_id) for r in results])
+
+        await user_state_store.save_many([r.state for r in results], db)
+
+        await db.executemany("""
+            UPDATE rankings SET points = ?, rank_level = ?, updated_at = ?
+            WHERE user_id = ? AND group_id IS NULL
+        """, [(r.state.points, r.rank_level, updated_at, r.user_id) for r in results])
+        await db.executemany("""
+            INSERT INTO rankings (user_id, points, rank_level, updated_at)
+            SELECT ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM rankings WHERE user_id = ? AND group_id IS NULL)
+        """, [
+            (r.user_id, r.state.points, r.rank_level, updated_at, r.user_id)
+            for r in results if r.state.points > 0
+        ])
+
+        await db.executemany("""
+            UPDATE rankings SET points = ?, rank_level = ?, updated_at = ?
+            WHERE group_id = ? AND user_id = ?
+        """, [
+            # Рівень групового рядка - за груповими балами, а не за глобальними
+            (points, ranking.calculate_rank_level(points), updated_at, group_id, r.user_id)
+            for r in results for group_id, points in r.group_points.items()
+        ])
+
+        await db.commit()
+
+async def reprocess(workers: int, batch_users: int, checkpoint: Checkpoint):
+    """Перерахунок усіх користувачів порціями з контрольною точкою після кожної"""
+
+    loop = asyncio.get_running_loop()
+
+    async with db_pool.read() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM users WHERE user_id > ?", (checkpoint.last_user_id,))
+        remaining = (await cursor.fetchone())[0]
+
+    logger.info(
+        f"🔁 Перерахунок {remaining} користувачів, воркерів: {workers}"
+        + (f", продовження після user_id {checkpoint.last_user_id}" if checkpoint.last_user_id else "")
+    )
+
+    started = time.perf_counter()
+    progress = {"users": 0, "points": 0}
+
+    async def commit(results: List[UserResult], last_user_id: int):
+        await write_results(results)
+
+        point_count = sum(r.point_count for r in results)
+        checkpoint.last_user_id = last_user_id
+        checkpoint.users += len(results)
+        checkpoint.points += point_count
+        checkpoint.save()
+
+        progress["users"] += len(results)
+        progress["points"] += point_count
+        elapsed = time.perf_counter() - started
+        eta = elapsed / progress["users"] * (remaining - progress["users"])
+        logger.info(
+            f"📈 {progress['users']}/{remaining} користувачів, {progress['points']} точок, "
+            f"{progress['points'] / elapsed:,.0f} точок/с, залишилось ~{eta:.0f}с"
+        )
+
+    pending_commit: Optional[asyncio.Task] = None
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        async for user_ids in iter_user_ids(checkpoint.last_user_id, batch_users):
+            # Воркери рахують, поки головний процес читає наступних користувачів
+            futures = []
+            for user_id in user_ids:
+                points, joins = await load_user(user_id)
+                futures.append(loop.run_in_executor(pool, recompute_user, user_id, points, joins))
+
+            results = await asyncio.gather(*futures)
+
+            # Порції фіксуються строго по черзі, щоб контрольна точка не випередила запис
+            if pending_commit is not None:
+                await pending_commit
+            pending_commit = asyncio.create_task(commit(results, user_ids[-1]))
+
+        if pending_commit is not None:
+            await pending_commit
+
+    logger.info(f"✅ Перерахунок завершено за {time.perf_counter() - started:.1f}с")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Перерахунок треків, балів та рівнів за поточними правилами")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="кількість процесів")
+    parser.add_argument("--batch-users", type=int, default=200, help="користувачів на транзакцію")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="файл контрольної точки")
+    parser.add_argument("--reset", action="store_true", help="почати спочатку")
+    return parser.parse_args(argv)
+
+async def main(argv: Optional[List[str]] = None):
+    """Точка входу CLI"""
+
+    args = parse_args(argv)
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.reset:
+        checkpoint.clear()
+    checkpoint.load()
+
+    await init_db()
+    try:
+        await reprocess(args.workers, args.batch_users, checkpoint)
+        checkpoint.clear()
+    finally:
+        await close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,367 @@
+"""
+Архівація холодних GPS треків у стислі блоби (користувач × день)
+"""
+
+import asyncio
+import zlib
+from datetime import datetime, time, timedelta, timezone
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+from config import config
+from database.database import db_pool
+from database.models import GpsTrack
+from utils.logger import setup_logger
+from utils.timestamps import TimestampLike, from_epoch_ms, now_ms, to_epoch_ms
+
+logger = setup_logger()
+
+ARCHIVE_FORMAT_VERSION = 1
+
+# Масштаби квантування: 1e-7° (~1 см), 0.01 км/год, 1 мм
+COORD_SCALE = 10_000_000
+SPEED_SCALE = 100
+DISTANCE_SCALE = 1_000_000
+
+# Читання порціями: пам'ять і час утримання з'єднання пулу не залежать від довжини історії
+HOT_PAGE_SIZE = 1000
+ARCHIVE_PAGE_DAYS = 7
+
+def _write_varint(out: bytearray, value: int):
+    """Запис цілого числа зі знаком як zigzag varint"""
+
+    value = value << 1 if value >= 0 else ((-value) << 1) - 1
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varints(data: bytes, count: int, offset: int) -> Tuple[List[int], int]:
+    """Читання count zigzag varint чисел, починаючи з offset"""
+
+    values = []
+    for _ in range(count):
+        result = shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values.append(result >> 1 if not result & 1 else -((result + 1) >> 1))
+    return values, offset
+
+def encode_track_points(points: Iterable[GpsTrack]) -> bytes:
+    """
+    Кодування впорядкованих за часом точок у стислий блоб.
+
+    Кожна колонка зберігається окремо як дельти квантованих значень
+    у форматі zigzag varint, після чого весь буфер стискається zlib.
+    """
+
+    points = sorted(points, key=lambda p: p.timestamp)
+
+    columns = [
+        [to_epoch_ms(p.timestamp) for p in points],
+        [int(round(p.latitude * COORD_SCALE)) for p in points],
+        [int(round(p.longitude * COORD_SCALE)) for p in points],
+        [int(round((p.speed_kmh or 0.0) * SPEED_SCALE)) for p in points],
+        [int(round((p.distance_km or 0.0) * DISTANCE_SCALE)) for p in points],
+        [p.competition_id or 0 for p in points],
+    ]
+
+    out = bytearray()
+    _write_varint(out, ARCHIVE_FORMAT_VERSION)
+    _write_varint(out, len(points))
+
+    for column in columns:
+        previous = 0
+        for value in column:
+            _write_varint(out, value - previous)
+            previous = value
+
+    # Прапорці валідності не мають сенсу як дельти
+    for p in points:
+        _write_varint(out, 1 if p.is_valid else 0)
+
+    return zlib.compress(bytes(out), 9)
+
+def decode_track_points(payload: bytes, user_id: int) -> List[GpsTrack]:
+    """Декодування блоба архіву в список точок"""
+
+    data = zlib.decompress(payload)
+    (version, count), offset = _read_varints(data, 2, 0)
+
+    if version != ARCHIVE_FORMAT_VERSION:
+        raise ValueError(f"Невідома версія формату архіву: {version}")
+
+    columns = []
+    for _ in range(6):
+        deltas, offset = _read_varints(data, count, offset)
+        values, total = [], 0
+        for delta in deltas:
+            total += delta
+            values.append(total)
+        columns.append(values)
+
+    valid_flags, offset = _read_varints(data, count, offset)
+    timestamps, latitudes, longitudes, speeds, distances, competitions = columns
+
+    return [
+        GpsTrack(
+            user_id=user_id,
+            competition_id=competitions[i] or None,
+            latitude=latitudes[i] / COORD_SCALE,
+            longitude=longitudes[i] / COORD_SCALE,
+            timestamp=timestamps[i],
+            distance_km=distances[i] / DISTANCE_SCALE,
+            speed_kmh=speeds[i] / SPEED_SCALE,
+            is_valid=bool(valid_flags[i])
+        )
+        for i in range(count)
+    ]
+
+async def _next_or_none(iterator: AsyncIterator[GpsTrack]) -> Optional[GpsTrack]:
+    """Наступний елемент асинхронного ітератора або None"""
+
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return None
+
+def _row_to_track(row) -> GpsTrack:
+    """Рядок gps_tracks у модель GpsTrack"""
+
+    track_id, user_id, competition_id, latitude, longitude, timestamp, distance_km, speed_kmh, is_valid = row
+
+    return GpsTrack(
+        track_id=track_id,
+        user_id=user_id,
+        competition_id=competition_id,
+        latitude=latitude,
+        longitude=longitude,
+        timestamp=to_epoch_ms(timestamp),
+        distance_km=distance_km or 0.0,
+        speed_kmh=speed_kmh or 0.0,
+        is_valid=bool(is_valid)
+    )
+
+class TrackArchiveService:
+    """Перенесення старих точок з gps_tracks до track_archive та їх читання"""
+
+    def __init__(self, archive_after_days: int = 30, interval_hours: float = 24.0):
+        self.archive_after_days = archive_after_days
+        self.interval_hours = interval_hours
+        self._task: Optional[asyncio.Task] = None
+
+    async def archive_cold_tracks(self, now: Optional[TimestampLike] = None) -> int:
+        """Архівація точок, старших за archive_after_days; повертає кількість перенесених точок"""
+
+        cutoff_time = from_epoch_ms(to_epoch_ms(now if now is not None else now_ms()))
+        cutoff_time -= timedelta(days=self.archive_after_days)
+        # Архівуються лише повні дні (UTC), щоб не перезаписувати блоб поточного дня
+        cutoff_time = cutoff_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        cutoff = to_epoch_ms(cutoff_time)
+
+        async with db_pool.read() as db:
+            cursor = await db.execute("SELECT DISTINCT user_id FROM gps_tracks")
+            user_ids = [row[0] for row in await cursor.fetchall()]
+
+        archived = 0
+        for user_id in user_ids:
+            try:
+                archived += await self._archive_user(user_id, cutoff)
+            except Exception as e:
+                logger.error(f"❌ Помилка архівації треків користувача {user_id}: {e}")
+
+            # Повертаємо керування циклу подій між користувачами
+            await asyncio.sleep(0)
+
+        if archived:
+            logger.info(f"🗜️ Заархівовано {archived} GPS точок старших за {cutoff_time:%Y-%m-%d}")
+
+        return archived
+
+    async def _archive_user(self, user_id: int, cutoff: int) -> int:
+        """
+        Архівація холодних точок одного користувача, по транзакції на день.
+
+        Дні читаються по одному, тож у пам'яті не більше одного дня точок
+        навіть при першому запуску на місяцях історії.
+        """
+
+        archived = 0
+        while True:
+            async with db_pool.write() as db:
+                cursor = await db.execute("""
+                    SELECT MIN(timestamp) FROM gps_tracks WHERE user_id = ? AND timestamp < ?
+                """, (user_id, cutoff))
+                first = (await cursor.fetchone())[0]
+                if first is None:
+                    return archived
+
+                day = from_epoch_ms(first).date()
+                day_end = to_epoch_ms(datetime.combine(day + timedelta(days=1), time(), tzinfo=timezone.utc))
+
+                cursor = await db.execute("""
+                    SELECT track_id, user_id, competition_id, latitude, longitude,
+                           timestamp, distance_km, speed_kmh, is_valid
+                    FROM gps_tracks
+                    WHERE user_id = ? AND timestamp >= ? AND timestamp < ?
+                    ORDER BY timestamp
+                """, (user_id, first, min(day_end, cutoff)))
+                day_points = [_row_to_track(row) for row in await cursor.fetchall()]
+
+                # Злиття з раніше заархівованими точками того ж дня
+                cursor = await db.execute("""
+                    SELECT payload FROM track_archive WHERE user_id = ? AND day = ?
+                """, (user_id, day.isoformat()))
+                existing = await cursor.fetchone()
+
+                merged = list(day_points)
+                if existing:
+                    merged.extend(decode_track_points(existing[0], user_id))
+                merged.sort(key=lambda p: p.timestamp)
+
+                await db.execute("""
+                    INSERT OR REPLACE INTO track_archive
+                        (user_id, day, point_count, first_timestamp, last_timestamp, distance_km, payload)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    user_id, day.isoformat(), len(merged),
+                    merged[0].timestamp, merged[-1].timestamp,
+                    sum(p.distance_km for p in merged if p.is_valid),
+                    encode_track_points(merged)
+                ))
+
+                await db.executemany(
+                    "DELETE FROM gps_tracks WHERE track_id = ?",
+                    [(p.track_id,) for p in day_points]
+                )
+
+                await db.commit()
+
+            archived += len(day_points)
+            await asyncio.sleep(0)
+
+    async def iter_user_points(
+        self,
+        user_id: int,
+        start: Optional[TimestampLike] = None,
+        end: Optional[TimestampLike] = None
+    ) -> AsyncIterator[GpsTrack]:
+        """Єдиний впорядкований за часом потік архівних та гарячих точок користувача"""
+
+        start = to_epoch_ms(start) if start is not None else None
+        end = to_epoch_ms(end) if end is not None else None
+
+        archived = self._iter_archived(user_id, start, end)
+        hot = self._iter_hot(user_id, start, end)
+
+        next_archived = await _next_or_none(archived)
+        next_hot = await _next_or_none(hot)
+
+        while next_archived is not None or next_hot is not None:
+            if next_hot is None or (next_archived is not None and next_archived.timestamp <= next_hot.timestamp):
+                yield next_archived
+                next_archived = await _next_or_none(archived)
+            else:
+                yield next_hot
+                next_hot = await _next_or_none(hot)
+
+    async def _iter_archived(
+        self,
+        user_id: int,
+        start: Optional[int],
+        end: Optional[int]
+    ) -> AsyncIterator[GpsTrack]:
+        """Точки з архіву; блоби читаються порціями по ARCHIVE_PAGE_DAYS днів і декодуються по одному"""
+
+        # Попередній день перед першим: day > after
+        after = (from_epoch_ms(start).date() - timedelta(days=1)).isoformat() if start is not None else ""
+        last_day = from_epoch_ms(end).date().isoformat() if end is not None else "9999-12-31"
+
+        while True:
+            async with db_pool.read() as db:
+                cursor = await db.execute("""
+                    SELECT day, payload FROM track_archive
+                    WHERE user_id = ? AND day > ? AND day <= ?
+                    ORDER BY day
+                    LIMIT ?
+                """, (user_id, after, last_day, ARCHIVE_PAGE_DAYS))
+                rows = await cursor.fetchall()
+
+            for day, payload in rows:
+                for point in decode_track_points(payload, user_id):
+                    if start is not None and point.timestamp < start:
+                        continue
+                    if end is not None and point.timestamp > end:
+                        return
+                    yield point
+
+            if len(rows) < ARCHIVE_PAGE_DAYS:
+                return
+            after = rows[-1][0]
+
+    async def _iter_hot(
+        self,
+        user_id: int,
+        start: Optional[int],
+        end: Optional[int]
+    ) -> AsyncIterator[GpsTrack]:
+        """Точки з гарячої таблиці gps_tracks порціями по HOT_PAGE_SIZE (keyset за timestamp, track_id)"""
+
+        # З'єднання не утримується, поки споживач обробляє порцію
+        after = (start if start is not None else 0, -1)
+        end = end if end is not None else 2 ** 62
+
+        while True:
+            async with db_pool.read() as db:
+                cursor = await db.execute("""
+                    SELECT track_id, user_id, competition_id, latitude, longitude,
+                           timestamp, distance_km, speed_kmh, is_valid
+                    FROM gps_tracks
+                    WHERE user_id = ? AND (timestamp, track_id) > (?, ?) AND timestamp <= ?
+                    ORDER BY timestamp, track_id
+                    LIMIT ?
+                """, (user_id, after[0], after[1], end, HOT_PAGE_SIZE))
+                rows = await cursor.fetchall()
+
+            for row in rows:
+                yield _row_to_track(row)
+
+            if len(rows) < HOT_PAGE_SIZE:
+                return
+            after = (rows[-1][5], rows[-1][0])
+
+    async def start(self):
+        """Запуск періодичної архівації"""
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="track-archiver")
+
+    async def stop(self):
+        """Зупинка періодичної архівації"""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        """Цикл періодичної архівації"""
+
+        while True:
+            try:
+                await self.archive_cold_tracks()
+            except Exception as e:
+                logger.error(f"❌ Помилка архівації треків: {e}")
+
+            await asyncio.sleep(self.interval_hours * 3600)
+
+track_archive_service = TrackArchiveService(
+    archive_after_days=config.TRACK_ARCHIVE_AFTER_DAYS,
+    interval_hours=config.TRACK_ARCHIVE_INTERVAL_HOURS
+)
@@ -0,0 +1,158 @@
+"""
+Планувальник завершення змагань на мін-купі таймерів
+"""
+
+import asyncio
+import heapq
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from database.database import db_pool
+from utils.logger import setup_logger
+from utils.timestamps import now_ms
+
+logger = setup_logger()
+
+class CompetitionScheduler:
+    """
+    Завершує змагання в момент start_time + duration_minutes.
+
+    Усі дедлайни лежать в одній мін-купі, а одна фонова задача спить до
+    найближчого з них. Скасування ліниве: запис у купі ігнорується, якщо
+    дедлайн змагання в _deadlines вже інший або відсутній.
+
+    Невдале завершення переплановується з подвоєнням паузи: retry_delay,
+    2×, 4× ... але не довше max_retry_delay.
+    """
+
+    def __init__(
+        self,
+        end_competition: Callable[[int], Awaitable[None]],
+        retry_delay: float = 5.0,
+        max_retry_delay: float = 300.0
+    ):
+        self._end_competition = end_competition
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._heap: List[Tuple[int, int]] = []
+        self._deadlines: Dict[int, int] = {}
+        # competition_id -> кількість невдалих спроб завершення поспіль
+        self._failures: Dict[int, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Завершення змагання, що виконується зараз
+        self._ending: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Відновлення дедлайнів активних змагань з БД та запуск таймера"""
+
+        if self.is_running:
+            return
+
+        async with db_pool.read() as db:
+            cursor = await db.execute("""
+                SELECT competition_id, start_time, duration_minutes
+                FROM competitions
+                WHERE is_active = 1
+            """)
+            rows = await cursor.fetchall()
+
+        for competition_id, start_time, duration_minutes in rows:
+            self.schedule(competition_id, start_time + duration_minutes * 60_000)
+
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="competition-scheduler")
+        logger.info(f"✅ Планувальник змагань запущено: активних змагань {len(self)}")
+
+    async def stop(self):
+        """Зупинка таймера (дедлайни відновляться з БД при наступному старті)"""
+
+        if not self.is_running:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Завершення, що вже почалось, не обривається посеред транзакції
+        if self._ending is not None:
+            await self._ending
+            self._ending = None
+        logger.info("🛑 Планувальник змагань зупинено")
+
+    def schedule(self, competition_id: int, end_time: int):
+        """Встановлення (або перенесення) моменту завершення змагання, мс епохи"""
+
+        self._deadlines[competition_id] = end_time
+        heapq.heappush(self._heap, (end_time, competition_id))
+        self._compact()
+
+        # Будимо таймер лише коли новий дедлайн став найближчим
+        if self._wakeup is not None and self._heap[0] == (end_time, competition_id):
+            self._wakeup.set()
+
+    def cancel(self, competition_id: int):
+        """Скасування завершення (змагання завершене вручну)"""
+
+        self._deadlines.pop(competition_id, None)
+        self._failures.pop(competition_id, None)
+        self._compact()
+
+    def _compact(self):
+        # Перебудова купи, коли застарілих записів більше, ніж живих
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(end_time, competition_id) for competition_id, end_time in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now: int) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            end_time, competition_id = heapq.heappop(self._heap)
+            if self._deadlines.get(competition_id) == end_time:
+                del self._deadlines[competition_id]
+                due.append(competition_id)
+        return due
+
+    def _next_delay(self) -> Optional[float]:
+        # Прибираємо скасовані записи з вершини купи
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return max(0.0, (self._heap[0][0] - now_ms()) / 1000) if self._heap else None
+
+    async def _end(self, competition_id: int):
+        try:
+            await self._end_competition(competition_id)
+        except Exception as e:
+            failures = self._failures.get(competition_id, 0) + 1
+            self._failures[competition_id] = failures
+            delay = min(self.retry_delay * 2 ** (failures - 1), self.max_retry_delay)
+            logger.error(
+                f"❌ Помилка автозавершення змагання {competition_id} (спроба {failures}), "
+                f"повтор через {delay:.1f}с: {e}"
+            )
+            self.schedule(competition_id, now_ms() + int(delay * 1000))
+        else:
+            self._failures.pop(competition_id, None)
+
+    async def _run(self):
+        while True:
+            for competition_id in self._pop_due(now_ms()):
+                # shield: скасування таймера в stop() не скасовує саме завершення
+                self._ending = asyncio.create_task(self._end(competition_id))
+                await asyncio.shield(self._ending)
+                self._ending = None
+
+            self._wakeup.clear()
+            delay = self._next_delay()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
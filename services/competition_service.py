@@ -5,8 +5,14 @@
 import json
 from datetime import datetime, timedelta
 from typing import Optional, List
-from database.database import get_db_connection
+from config import config
+from database.database import db_pool
+from services.competition_scheduler import CompetitionScheduler
+from services.penalty_service import penalty_service
+from services.route_index import route_index
+from services.standings_service import standings_engine
 from utils.logger import setup_logger
+from utils.timestamps import now_ms
 
 logger = setup_logger()
 
@@ -24,16 +30,19 @@ class CompetitionService:
 
         try:
             route_data = json.dumps(route_points) if route_points else ""
+            start_time = now_ms()
 
-            async with await get_db_connection() as db:
+            async with db_pool.write() as db:
                 cursor = await db.execute("""
-                    INSERT INTO competitions (group_id, comp_type, route_data, duration_minutes)
-                    VALUES (?, ?, ?, ?)
-                """, (group_id, comp_type, route_data, duration_minutes))
+                    INSERT INTO competitions (group_id, comp_type, route_data, start_time, duration_minutes)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (group_id, comp_type, route_data, start_time, duration_minutes))
 
                 competition_id = cursor.lastrowid
                 await db.commit()
 
+                competition_scheduler.schedule(competition_id, start_time + duration_minutes * 60_000)
+
                 logger.info(f"✅ Створено змагання {comp_type} з ID {competition_id}")
                 return competition_id
 
@@ -45,7 +54,7 @@ class CompetitionService:
         """Приєднання користувача до змагання"""
 
         try:
-            async with await get_db_connection() as db:
+            async with db_pool.read() as db:
                 # Перевірка чи змагання активне
                 cursor = await db.execute("""
                     SELECT comp_type, start_time, duration_minutes 
@@ -58,9 +67,16 @@ class CompetitionService:
                 if not competition:
                     return False
 
-                # Логіка приєднання (можна розширити)
-                logger.info(f"👤 Користувач {user_id} приєднався до змагання {competition_id}")
-                return True
+            async with db_pool.write() as db:
+                await db.execute("""
+                    INSERT OR IGNORE INTO competition_participants (competition_id, user_id, joined_at)
+                    VALUES (?, ?, ?)
+                """, (competition_id, user_id, now_ms()))
+                await db.commit()
+
+            standings_engine.join(competition_id, competition[0], user_id)
+            logger.info(f"👤 Користувач {user_id} приєднався до змагання {competition_id}")
+            return True
 
         except Exception as e:
             logger.error(f"❌ Помилка приєднання до змагання: {e}")
@@ -70,7 +86,7 @@ class CompetitionService:
         """Завершення змагання"""
 
         try:
-            async with await get_db_connection() as db:
+            async with db_pool.write() as db:
                 await db.execute("""
                     UPDATE competitions 
                     SET is_active = 0 
@@ -78,7 +94,20 @@ class CompetitionService:
                 """, (competition_id,))
 
                 await db.commit()
-                logger.info(f"🏁 Змагання {competition_id} завершено")
+
+            competition_scheduler.cancel(competition_id)
+            await penalty_service.finish_competition(competition_id)
+            await standings_engine.finish(competition_id)
+            route_index.invalidate(competition_id)
+            logger.info(f"🏁 Змагання {competition_id} завершено")
 
         except Exception as e:
+            # Планувальник повторить завершення з паузою
             logger.error(f"❌ Помилка завершення змагання: {e}")
+            raise
+
+competition_scheduler = CompetitionScheduler(
+    CompetitionService().end_competition,
+    retry_delay=config.COMPETITION_END_RETRY_SECONDS,
+    max_retry_delay=config.COMPETITION_END_MAX_RETRY_SECONDS
+)
@@ -2,12 +2,13 @@
 GPS Service для обробки локації та розрахунків
 """
 
-import math
-import asyncio
-from datetime import datetime, timedelta
-from typing import Optional, List, Tuple
-from database.database import get_db_connection
-from utils.logger import setup_logger
+import numpy as np
+from typing import List, Sequence, Tuple, Union
+from database.models import GpsTrack, UserState
+from services.user_state_service import user_state_store
+from utils import geo
+from utils.timestamps import now_ms
+from utils.logger import log_sampler, setup_logger
 
 logger = setup_logger()
 
@@ -17,6 +18,8 @@ class GpsService:
     def __init__(self):
         self.accuracy_threshold = 50  # метрів
         self.min_distance_threshold = 0.01  # 10 метрів мінімальна відстань
+        self.min_interval_ms = 10000  # 10 секунд мінімальний інтервал
+        self.max_speed_kmh = 100.0  # фільтрація помилок GPS
 
     async def calculate_distance_from_last_point(
         self, 
@@ -26,41 +29,35 @@ class GpsService:
         """Розрахунок відстані від останньої збереженої точки"""
 
         try:
-            async with await get_db_connection() as db:
-                # Отримання останньої GPS точки користувача
-                cursor = await db.execute("""
-                    SELECT latitude, longitude, timestamp 
-                    FROM gps_tracks 
-                    WHERE user_id = ? AND is_valid = 1
-                    ORDER BY timestamp DESC 
-                    LIMIT 1
-                """, (user_id,))
+            state = await user_state_store.get(user_id)
+            return self.distance_from_state(state, location, now_ms())
 
-                last_point = await cursor.fetchone()
+        except Exception as e:
+            logger.error(f"❌ Помилка розрахунку відстані: {e}")
+            return 0.0
 
-                if not last_point:
-                    return 0.0
+    def distance_from_state(self, state: UserState, location, timestamp: int) -> float:
+        """Відстань від останньої точки зі стану користувача (без звернень до БД)"""
 
-                # Розрахунок відстані
-                distance_km = self.haversine_distance(
-                    (last_point[0], last_point[1]),
-                    (location.latitude, location.longitude)
-                )
+        if not state.has_last_point:
+            return 0.0
 
-                # Перевірка на мінімальну відстань та час
-                last_timestamp = datetime.fromisoformat(last_point[2])
-                time_diff = (datetime.now() - last_timestamp).total_seconds()
+        # Розрахунок відстані
+        distance_km = self.haversine_distance(
+            (state.last_latitude, state.last_longitude),
+            (location.latitude, location.longitude)
+        )
 
-                # Ігнорування якщо відстань дуже мала або час дуже малий
-                if distance_km < self.min_distance_threshold or time_diff < 10:
-                    return 0.0
+        return self.counted_distance(distance_km, timestamp - state.last_timestamp)
 
-                return distance_km
+    def counted_distance(self, distance_km: float, elapsed_ms: float) -> float:
+        """Відстань, що зараховується: 0, якщо відстань дуже мала або час дуже малий"""
 
-        except Exception as e:
-            logger.error(f"❌ Помилка розрахунку відстані: {e}")
+        if distance_km < self.min_distance_threshold or elapsed_ms < self.min_interval_ms:
             return 0.0
 
+        return distance_km
+
     def haversine_distance(
         self, 
         point1: Tuple[float, float], 
@@ -70,26 +67,30 @@ class GpsService:
         Розрахунок відстані між двома точками за формулою гаверсинуса
         """
 
-        lat1, lon1 = point1
-        lat2, lon2 = point2
-
-        # Переведення градусів у радіани
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+        # Для однієї пари точок скалярна математика швидша за NumPy
+        return geo.haversine_km(point1[0], point1[1], point2[0], point2[1])
 
-        # Різниці координат
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+    def track_distance(self, points: Sequence[GpsTrack]) -> float:
+        """Довжина треку за координатами валідних точок, км"""
 
-        # Формула гаверсинуса
-        a = (math.sin(dlat/2)**2 + 
-             math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2)
+        valid = [p for p in points if p.is_valid]
+        if len(valid) < 2:
+            return 0.0
 
-        c = 2 * math.asin(math.sqrt(a))
+        lats = np.fromiter((p.latitude for p in valid), dtype=np.float64, count=len(valid))
+        lons = np.fromiter((p.longitude for p in valid), dtype=np.float64, count=len(valid))
+        return float(geo.segment_lengths(lats, lons).sum())
 
-        # Радіус Землі в кілометрах
-        r = 6371
+    def track_speeds(self, points: Sequence[GpsTrack]) -> np.ndarray:
+        """Швидкості в точках треку за попереднім відрізком, км/год"""
 
-        return c * r
+        count = len(points)
+        return geo.speed_series(
+            np.fromiter((p.latitude for p in points), dtype=np.float64, count=count),
+            np.fromiter((p.longitude for p in points), dtype=np.float64, count=count),
+            np.fromiter((p.timestamp for p in points), dtype=np.float64, count=count),
+            self.max_speed_kmh
+        )
 
     async def calculate_speed(
         self, 
@@ -99,45 +100,36 @@ class GpsService:
         """Розрахунок поточної швидкості"""
 
         try:
-            async with await get_db_connection() as db:
-                # Отримання останніх 2 точок для розрахунку швидкості
-                cursor = await db.execute("""
-                    SELECT latitude, longitude, timestamp 
-                    FROM gps_tracks 
-                    WHERE user_id = ? AND is_valid = 1
-                    ORDER BY timestamp DESC 
-                    LIMIT 2
-                """, (user_id,))
-
-                points = await cursor.fetchall()
+            state = await user_state_store.get(user_id)
+            return self.speed_from_state(state, current_location, now_ms())
 
-                if len(points) < 1:
-                    return 0.0
+        except Exception as e:
+            logger.error(f"❌ Помилка розрахунку швидкості: {e}")
+            return 0.0
 
-                last_point = points[0]
+    def speed_from_state(self, state: UserState, current_location, timestamp: int) -> float:
+        """Швидкість від останньої точки зі стану користувача (без звернень до БД)"""
 
-                # Розрахунок відстані
-                distance_km = self.haversine_distance(
-                    (last_point[0], last_point[1]),
-                    (current_location.latitude, current_location.longitude)
-                )
+        if not state.has_last_point:
+            return 0.0
 
-                # Розрахунок часу
-                last_timestamp = datetime.fromisoformat(last_point[2])
-                time_diff_hours = (datetime.now() - last_timestamp).total_seconds() / 3600
+        # Розрахунок відстані
+        distance_km = self.haversine_distance(
+            (state.last_latitude, state.last_longitude),
+            (current_location.latitude, current_location.longitude)
+        )
 
-                if time_diff_hours == 0:
-                    return 0.0
+        # Розрахунок часу
+        time_diff_hours = (timestamp - state.last_timestamp) / 3600000
 
-                # Швидкість в км/год
-                speed_kmh = distance_km / time_diff_hours
+        if time_diff_hours <= 0:
+            return 0.0
 
-                # Обмеження максимальної швидкості (100 км/год для фільтрації помилок)
-                return min(speed_kmh, 100.0)
+        # Швидкість в км/год
+        speed_kmh = distance_km / time_diff_hours
 
-        except Exception as e:
-            logger.error(f"❌ Помилка розрахунку швидкості: {e}")
-            return 0.0
+        # Обмеження максимальної швидкості (100 км/год для фільтрації помилок)
+        return min(speed_kmh, self.max_speed_kmh)
 
     def validate_location(self, location, previous_location=None) -> bool:
         """Валідація GPS локації"""
@@ -152,7 +144,7 @@ class GpsService:
         # Перевірка точності (якщо доступна)
         if hasattr(location, 'accuracy') and location.accuracy:
             if location.accuracy > self.accuracy_threshold:
-                logger.warning(f"⚠️ Низька точність GPS: {location.accuracy}м")
+                log_sampler.warning("gps.low_accuracy", "⚠️ Низька точність GPS: {}м", location.accuracy)
                 return False
 
         # Перевірка на надто великий стрибок відстані
@@ -164,7 +156,7 @@ class GpsService:
 
             # Якщо відстань більше 1 км за раз - підозріло
             if distance_km > 1.0:
-                logger.warning(f"⚠️ Великий стрибок відстані: {distance_km:.2f}км")
+                log_sampler.warning("gps.jump", "⚠️ Великий стрибок відстані: {:.2f}км", distance_km)
                 return False
 
         return True
@@ -172,18 +164,13 @@ class GpsService:
     async def calculate_route_deviation(
         self, 
         user_location: Tuple[float, float], 
-        route_points: List[Tuple[float, float]]
+        route_points: Union[List[Tuple[float, float]], np.ndarray]
     ) -> float:
         """Розрахунок відхилення від заданого маршруту"""
 
-        if not route_points:
+        if len(route_points) == 0:
             return 0.0
 
-        # Знаходження найближчої точки маршруту
-        min_distance = float('inf')
-
-        for point in route_points:
-            distance = self.haversine_distance(user_location, point)
-            min_distance = min(min_distance, distance)
-
-        return min_distance
+        # Відстані до всіх точок маршруту одним векторним розрахунком
+        lats, lons = geo.as_coordinates(route_points)
+        return float(geo.distances_to(user_location[0], user_location[1], lats, lons).min())
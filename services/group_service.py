@@ -0,0 +1,196 @@
+"""
+Групи та рейтинги в межах груп
+"""
+
+import aiosqlite
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import config
+from database.database import db_pool
+from services.ranking_cache import ranking_cache
+from services.ranking_service import RankingService
+from utils.logger import setup_logger
+from utils.timestamps import now_ms
+
+logger = setup_logger()
+
+class GroupService:
+    """
+    Учасники груп та їх групові бали.
+
+    Груповий рейтинг - рядок rankings з group_id учасника; бали в ньому
+    накопичуються з моменту вступу. Топ і позиція читаються через індекс
+    (group_id, points DESC), тому рядки інших груп не проглядаються.
+
+    Відповідності груп і членства кешуються в обмежених LRU; витіснений
+    запис просто перечитується з БД.
+    """
+
+    def __init__(self, max_groups: int = 10000, max_members: int = 50000):
+        self.max_groups = max_groups
+        self.max_members = max_members
+        # telegram_group_id -> group_id
+        self._group_ids: "OrderedDict[int, int]" = OrderedDict()
+        # user_id -> group_id груп користувача
+        self._memberships: "OrderedDict[int, Tuple[int, ...]]" = OrderedDict()
+        self.ranking_service = RankingService()
+
+    @staticmethod
+    def _remember(cache: OrderedDict, key: int, value, max_size: int):
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > max_size:
+            cache.popitem(last=False)
+
+    async def ensure_group(self, telegram_group_id: int, name: str) -> int:
+        """Внутрішній group_id групи Telegram (реєструє групу за потреби)"""
+
+        group_id = self._group_ids.get(telegram_group_id)
+        if group_id is not None:
+            self._group_ids.move_to_end(telegram_group_id)
+            return group_id
+
+        async with db_pool.read() as db:
+            cursor = await db.execute(
+                "SELECT group_id FROM groups WHERE telegram_group_id = ?", (telegram_group_id,)
+            )
+            row = await cursor.fetchone()
+
+        if row is None:
+            async with db_pool.write() as db:
+                await db.execute("""
+                    INSERT OR IGNORE INTO groups (telegram_group_id, group_name)
+                    VALUES (?, ?)
+                """, (telegram_group_id, name or str(telegram_group_id)))
+                cursor = await db.execute(
+                    "SELECT group_id FROM groups WHERE telegram_group_id = ?", (telegram_group_id,)
+                )
+                row = await cursor.fetchone()
+                await db.commit()
+            logger.info(f"👥 Зареєстровано групу {name} ({telegram_group_id})")
+
+        self._remember(self._group_ids, telegram_group_id, row[0], self.max_groups)
+        return row[0]
+
+    async def ensure_member(self, group_id: int, user_id: int):
+        """Додавання користувача до групи з нульовим груповим рейтингом"""
+
+        if group_id in await self.groups_of(user_id):
+            return
+
+        async with db_pool.write() as db:
+            await db.execute("""
+                INSERT OR IGNORE INTO group_members (group_id, user_id, joined_at)
+                VALUES (?, ?, ?)
+            """, (group_id, user_id, now_ms()))
+            await db.execute("""
+                INSERT OR IGNORE INTO rankings (user_id, group_id, points, rank_level, updated_at)
+                VALUES (?, ?, 0, 'bronze', ?)
+            """, (user_id, group_id, now_ms()))
+            await db.commit()
+
+        self._memberships.pop(user_id, None)
+        ranking_cache.invalidate_group(group_id)
+
+    async def register_chat_member(self, telegram_group_id: int, name: str, user_id: int) -> int:
+        """Реєстрація групи та участі в ній користувача, що написав у групі; повертає group_id"""
+
+        group_id = await self.ensure_group(telegram_group_id, name)
+        await self.ensure_member(group_id, user_id)
+        return group_id
+
+    async def groups_of(self, user_id: int) -> Tuple[int, ...]:
+        """group_id усіх груп користувача"""
+
+        groups = self._memberships.get(user_id)
+        if groups is not None:
+            self._memberships.move_to_end(user_id)
+            return groups
+
+        async with db_pool.read() as db:
+            cursor = await db.execute(
+                "SELECT group_id FROM group_members WHERE user_id = ?", (user_id,)
+            )
+            groups = tuple(row[0] for row in await cursor.fetchall())
+
+        self._remember(self._memberships, user_id, groups, self.max_members)
+        return groups
+
+    async def credit_points(
+        self,
+        db: aiosqlite.Connection,
+        credits: Iterable[Tuple[int, int, int]]
+    ) -> List[int]:
+        """
+        Нарахування балів у групові рейтинги в межах транзакції викликача.
+
+        credits - (user_id, group_id, бали); повертає group_id, топ яких
+        слід скинути після commit. Рівень рядка рахується з його власних
+        групових балів, а не з глобальних.
+        """
+
+        updated_at = now_ms()
+        thresholds = self.ranking_service.rank_thresholds
+        levels = (thresholds["diamond"], thresholds["platinum"], thresholds["gold"], thresholds["silver"])
+        rows = [
+            (
+                user_id, group_id, points,
+                self.ranking_service.calculate_rank_level(points), updated_at, *levels
+            )
+            for user_id, group_id, points in credits
+            if points > 0
+        ]
+        if not rows:
+            return []
+
+        # У SET стовпці мають значення до оновлення, тож points + excluded.points - нові бали
+        await db.executemany("""
+            INSERT INTO rankings (user_id, group_id, points, rank_level, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(group_id, user_id) WHERE group_id IS NOT NULL DO UPDATE SET
+                points = points + excluded.points,
+                rank_level = CASE
+                    WHEN points + excluded.points >= ? THEN 'diamond'
+                    WHEN points + excluded.points >= ? THEN 'platinum'
+                    WHEN points + excluded.points >= ? THEN 'gold'
+                    WHEN points + excluded.points >= ? THEN 'silver'
+                    ELSE 'bronze'
+                END,
+                updated_at = excluded.updated_at
+        """, rows)
+
+        return sorted({row[1] for row in rows})
+
+    async def top(self, group_id: int, k: int = 10) -> List[Tuple[str, int, str]]:
+        """Перші k учасників групи: (ім'я, бали, рівень)"""
+
+        async with db_pool.read() as db:
+            cursor = await db.execute("""
+                SELECT u.first_name, r.points, r.rank_level
+                FROM rankings r
+                JOIN users u ON u.user_id = r.user_id
+                WHERE r.group_id = ?
+                ORDER BY r.points DESC
+                LIMIT ?
+            """, (group_id, k))
+            return await cursor.fetchall()
+
+    async def rank_of(self, group_id: int, user_id: int) -> Optional[Tuple[int, int]]:
+        """Бали та позиція користувача в групі"""
+
+        async with db_pool.read() as db:
+            cursor = await db.execute("""
+                SELECT points,
+                       (SELECT COUNT(*) + 1 FROM rankings r2
+                        WHERE r2.group_id = r1.group_id AND r2.points > r1.points) as position
+                FROM rankings r1
+                WHERE group_id = ? AND user_id = ?
+            """, (group_id, user_id))
+            row = await cursor.fetchone()
+
+        return (row[0], row[1]) if row else None
+
+group_service = GroupService(
+    max_groups=config.GROUP_CACHE_SIZE,
+    max_members=config.GROUP_MEMBERSHIP_CACHE_SIZE
+)
@@ -0,0 +1,356 @@
+"""
+Черга пакетного запису GPS точок (write-behind з груповою фіксацією)
+"""
+
+import asyncio
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+from config import config
+from database.database import db_pool
+from database.models import GpsTrack, UserState
+from services.group_service import group_service
+from services.ranking_cache import ranking_cache
+from services.ranking_service import RankingService
+from services.track_simplifier import TrackSimplifier, track_simplifier
+from services.user_state_service import UserStateStore, user_state_store
+from utils.logger import setup_logger
+from utils.metrics import metrics
+from utils.timestamps import now_ms
+
+logger = setup_logger()
+
+@dataclass
+class LocationWrite:
+    """Елемент черги: точка треку (якщо її слід зберегти) та, за потреби, новий стан користувача"""
+    user_id: int
+    track: Optional[GpsTrack]
+    state: Optional[UserState] = None
+    rank_level: Optional[str] = None
+    points_earned: int = 0
+    group_ids: Tuple[int, ...] = ()
+
+class GpsIngestionQueue:
+    """
+    Буферизує валідовані GPS точки та записує їх пакетами одним commit.
+
+    Разом з точками в тій самій транзакції записуються підсумки користувачів,
+    рейтинг та user_state, тому на пакет припадає рівно один commit.
+
+    Раз на idle_check_interval секунд писач забирає у спрощувача треків
+    кандидатів затихлих потоків і додає їх до пакета.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        retries: int = 3,
+        retry_delay: float = 0.2,
+        simplifier: Optional[TrackSimplifier] = None,
+        idle_check_interval: float = 30.0,
+        state_store: Optional[UserStateStore] = None
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Повтори невдалого пакета з подвоєнням паузи: retry_delay, 2×, 4× ...
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.simplifier = simplifier
+        self.idle_check_interval = idle_check_interval
+        self._next_idle_check = 0.0
+        self.state_store = state_store if state_store is not None else user_state_store
+        self.ranking_service = RankingService()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.stats = {
+            "submitted": 0, "written": 0, "batches": 0, "failed": 0, "retries": 0, "backpressure": 0, "idle_flushed": 0
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def pending(self) -> int:
+        """Кількість точок, що очікують запису"""
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self):
+        """Запуск фонової задачі писача"""
+
+        if self.is_running:
+            return
+
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+            self._wakeup = asyncio.Event()
+
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name="gps-ingestion-writer")
+        logger.info(
+            f"✅ Черга GPS запущена: пакет {self.batch_size}, інтервал {self.flush_interval * 1000:.0f} мс"
+        )
+
+    async def stop(self):
+        """Зупинка писача з дозаписом усіх точок з черги"""
+
+        if not self.is_running:
+            return
+
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        logger.info(f"🛑 Черга GPS зупинена, записано точок: {self.stats['written']}")
+
+    async def submit(
+        self,
+        point: Optional[GpsTrack],
+        state: Optional[UserState] = None,
+        rank_level: Optional[str] = None,
+        points_earned: int = 0,
+        group_ids: Tuple[int, ...] = ()
+    ):
+        """
+        Додавання точки (та знімка стану) в чергу; чекає, якщо черга заповнена.
+
+        Стан передається закріпленим (state_store.pin) - викликач закріплює
+        його ще до зміни, а писач знімає закріплення після запису пакета.
+        """
+
+        if point is None and state is None:
+            raise ValueError("Порожній запис: немає ні точки, ні стану")
+        # Бали зараховуються в групи разом зі станом, з якого вони пораховані
+        if state is None and (points_earned or group_ids):
+            raise ValueError("Бали та групи передаються лише разом зі станом користувача")
+        user_id = state.user_id if state is not None else point.user_id
+
+        if not self.is_running:
+            await self.start()
+
+        if self._queue.full():
+            self.stats["backpressure"] += 1
+
+        # Знімок стану, щоб пакет записав узгоджені значення
+        snapshot = replace(state) if state is not None else None
+        await self._queue.put(LocationWrite(user_id, point, snapshot, rank_level, points_earned, group_ids))
+        self.stats["submitted"] += 1
+        self._wakeup.set()
+
+    async def flush(self):
+        """Очікування запису всіх поставлених у чергу точок"""
+
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _run(self):
+        """Цикл писача: збирає пакет за розміром або часом та фіксує його"""
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            idle = self._idle_writes(loop)
+            if self._queue.empty() and not idle:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._idle_timeout(loop))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Точки затихлих потоків не проходили через чергу
+            batch: List[LocationWrite] = idle
+            queued = 0
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    queued += 1
+                    continue
+
+                remaining = deadline - loop.time()
+                if remaining <= 0 or self._closing:
+                    break
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch, queued)
+
+    def _idle_writes(self, loop: asyncio.AbstractEventLoop) -> List[LocationWrite]:
+        """Кандидати затихлих потоків спрощувача, якщо настав час перевірки"""
+
+        if self.simplifier is None or loop.time() < self._next_idle_check:
+            return []
+
+        self._next_idle_check = loop.time() + self.idle_check_interval
+        points = self.simplifier.flush_idle()
+        self.stats["idle_flushed"] += len(points)
+        return [LocationWrite(point.user_id, point) for point in points]
+
+    def _idle_timeout(self, loop: asyncio.AbstractEventLoop) -> Optional[float]:
+        """Скільки чекати нових точок до наступної перевірки затихлих потоків"""
+
+        if self.simplifier is None:
+            return None
+        return max(self._next_idle_check - loop.time(), 0.0)
+
+    async def _flush(self, batch: List[LocationWrite], queued: int):
+        """
+        Запис пакета з повторами.
+
+        Бали вже враховані в таблиці лідерів і результатах змагань у пам'яті,
+        тому пакет відкидається лише після retries невдалих спроб (транзакція
+        щоразу відкочується повністю). queued - скільки останніх елементів
+        пакета взято з черги.
+        """
+
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    await self._write(batch)
+                    return
+                except Exception as e:
+                    if attempt == self.retries:
+                        self._drop(batch, e)
+                        return
+
+                    self.stats["retries"] += 1
+                    delay = self.retry_delay * 2 ** attempt
+                    logger.warning(
+                        f"⚠️ Помилка пакетного запису GPS (спроба {attempt + 1}/{self.retries + 1}), "
+                        f"повтор через {delay:.1f} с: {e}"
+                    )
+                    await asyncio.sleep(delay)
+        finally:
+            for item in batch:
+                if item.state is not None:
+                    self.state_store.unpin(item.state.user_id)
+            for _ in range(queued):
+                self._queue.task_done()
+
+    def _drop(self, batch: List[LocationWrite], error: Exception):
+        """Відкидання пакета після всіх спроб"""
+
+        points = sum(1 for item in batch if item.track is not None)
+        user_ids = sorted({item.user_id for item in batch})
+        self.stats["failed"] += points
+        logger.error(
+            f"❌ Пакет GPS відкинуто після {self.retries + 1} спроб ({points} точок), "
+            f"користувачі {user_ids}: {error}"
+        )
+
+        # Стан у пам'яті випередив БД, тому при наступному зверненні перечитуємо його
+        for user_id in user_ids:
+            self.state_store.invalidate(user_id)
+
+    async def _write(self, batch: List[LocationWrite]):
+        """Запис пакета через executemany в одній транзакції"""
+
+        rows = [
+            (
+                item.track.user_id, item.track.competition_id, item.track.latitude, item.track.longitude,
+                item.track.timestamp, item.track.distance_km, item.track.speed_kmh, item.track.is_valid
+            )
+            for item in batch
+            if item.track is not None
+        ]
+
+        # Для кожного користувача достатньо останнього знімка стану в пакеті
+        latest: Dict[int, LocationWrite] = {}
+        for item in batch:
+            if item.state is not None:
+                latest[item.state.user_id] = item
+
+        updated_at = now_ms()
+        ranked = [item for item in latest.values() if item.state.points > 0]
+
+        # Зароблені в пакеті бали кожного користувача в кожній його групі
+        group_points: Dict[Tuple[int, int], int] = {}
+        for item in batch:
+            for group_id in item.group_ids:
+                key = (item.user_id, group_id)
+                group_points[key] = group_points.get(key, 0) + item.points_earned
+        touched_groups: List[int] = []
+
+        async with db_pool.write() as db:
+            if rows:
+                await db.executemany("""
+                    INSERT INTO gps_tracks
+                        (user_id, competition_id, latitude, longitude, timestamp, distance_km, speed_kmh, is_valid)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+
+            if latest:
+                await db.executemany("""
+                    UPDATE users SET total_distance = ?, total_steps = ?
+                    WHERE user_id = ?
+                """, [
+                    (item.state.total_distance, item.state.total_steps, item.state.user_id)
+                    for item in latest.values()
+                ])
+
+                await self.state_store.save_many([item.state for item in latest.values()], db)
+
+            if ranked:
+                await db.executemany("""
+                    UPDATE rankings SET points = ?, rank_level = ?, updated_at = ?
+                    WHERE user_id = ? AND group_id IS NULL
+                """, [
+                    (item.state.points, item.rank_level, updated_at, item.state.user_id)
+                    for item in ranked
+                ])
+                await db.executemany("""
+                    INSERT INTO rankings (user_id, points, rank_level, updated_at)
+                    SELECT ?, ?, ?, ?
+                    WHERE NOT EXISTS (SELECT 1 FROM rankings WHERE user_id = ? AND group_id IS NULL)
+                """, [
+                    (item.state.user_id, item.state.points, item.rank_level, updated_at, item.state.user_id)
+                    for item in ranked
+                ])
+
+            if group_points:
+                touched_groups = await group_service.credit_points(db, [
+                    (user_id, group_id, points) for (user_id, group_id), points in group_points.items()
+                ])
+
+            await db.commit()
+
+        self.stats["written"] += len(rows)
+        self.stats["batches"] += 1
+
+        # Рейтинг оновлюється лише після фіксації; без балів змінились тільки підсумки
+        for item in latest.values():
+            if item.state.points > 0:
+                self.ranking_service.update_user_points(item.state.user_id, item.state.points, item.rank_level)
+            else:
+                ranking_cache.invalidate_user(item.state.user_id)
+        for group_id in touched_groups:
+            ranking_cache.invalidate_group(group_id)
+
+gps_ingestion = GpsIngestionQueue(
+    max_size=config.GPS_QUEUE_MAX_SIZE,
+    batch_size=config.GPS_BATCH_SIZE,
+    flush_interval=config.GPS_FLUSH_INTERVAL_MS / 1000,
+    retries=config.GPS_FLUSH_RETRIES,
+    simplifier=track_simplifier,
+    idle_check_interval=config.GPS_SIMPLIFY_IDLE_CHECK_SECONDS
+)
+
+metrics.register_stats(
+    "gps_ingestion_events_total", "Пакетний писач: поставлені, записані та невдалі точки, пакети, повтори", lambda: gps_ingestion.stats
+)
+metrics.register_collector(lambda: [
+    ("gps_ingestion_pending", "gauge", "Точки в черзі на запис", [("gps_ingestion_pending", {}, gps_ingestion.pending())])
+])
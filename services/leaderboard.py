@@ -0,0 +1,315 @@
+"""
+Таблиця лідерів у пам'яті на індексованому skip list (O(log n) на операцію)
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from database.database import db_pool
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+class _End:
+    """Ключ кінцевого вузла, більший за будь-який інший"""
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return False
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, next_nodes: list, widths: list):
+        self.key = key
+        self.next = next_nodes
+        self.width = widths
+
+_NIL = _Node(_End(), [], [])
+
+class IndexableSkipList:
+    """
+    Впорядкований список з доступом за індексом.
+
+    width[level] вузла - кількість кроків нижнього рівня до наступного
+    вузла на цьому рівні, що дає пошук позиції ключа за O(log n).
+    """
+
+    def __init__(self, max_levels: int = 24):
+        self.max_levels = max_levels
+        self.size = 0
+        self._head = _Node(None, [_NIL] * max_levels, [1] * max_levels)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.max_levels and random.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, key):
+        """Вставка ключа"""
+
+        chain = [None] * self.max_levels
+        steps_at_level = [0] * self.max_levels
+        node = self._head
+
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        depth = self._random_level()
+        new_node = _Node(key, [None] * depth, [None] * depth)
+
+        steps = 0
+        for level in range(depth):
+            prev_node = chain[level]
+            new_node.next[level] = prev_node.next[level]
+            prev_node.next[level] = new_node
+            new_node.width[level] = prev_node.width[level] - steps
+            prev_node.width[level] = steps + 1
+            steps += steps_at_level[level]
+
+        for level in range(depth, self.max_levels):
+            chain[level].width[level] += 1
+
+        self.size += 1
+
+    def remove(self, key):
+        """Видалення ключа; KeyError, якщо його немає"""
+
+        chain = [None] * self.max_levels
+        node = self._head
+
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is _NIL or target.key != key:
+            raise KeyError(key)
+
+        depth = len(target.next)
+        for level in range(depth):
+            prev_node = chain[level]
+            prev_node.width[level] += target.width[level] - 1
+            prev_node.next[level] = target.next[level]
+
+        for level in range(depth, self.max_levels):
+            chain[level].width[level] -= 1
+
+        self.size -= 1
+
+    def count_less(self, key) -> int:
+        """Кількість ключів, строго менших за key"""
+
+        position = 0
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def _node_at(self, index: int) -> _Node:
+        node = self._head
+        index += 1
+        for level in reversed(range(self.max_levels)):
+            while node.width[level] <= index:
+                index -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, index: int):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return self._node_at(index).key
+
+    def slice(self, start: int, stop: int) -> list:
+        """Ключі з індексами [start, stop)"""
+
+        start = max(0, start)
+        stop = min(self.size, stop)
+        if start >= stop:
+            return []
+
+        keys = []
+        node = self._node_at(start)
+        for _ in range(stop - start):
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+@dataclass
+class LeaderboardEntry:
+    """Рядок таблиці лідерів"""
+    user_id: int
+    points: int
+    rank_level: str
+    position: int
+    name: Optional[str] = None
+
+class Leaderboard:
+    """
+    Рейтинг користувачів за балами.
+
+    Ключ (-points, user_id) впорядковує список від найбільших балів;
+    позиція рахується як у SQL: 1 + кількість користувачів з більшими балами.
+    Після старту змінюється лише через RankingService.update_user_points.
+    """
+
+    def __init__(self):
+        self._list = IndexableSkipList()
+        self._points: Dict[int, int] = {}
+        self._levels: Dict[int, str] = {}
+        self._names: Dict[int, str] = {}
+        self.is_loaded = False
+        # Зростає з кожною зміною балів: ключ для кешів, що залежать від позицій
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._list)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._points
+
+    async def load(self):
+        """Завантаження рейтингу з БД"""
+
+        async with db_pool.read() as db:
+            cursor = await db.execute("""
+                SELECT r.user_id, r.points, r.rank_level, u.first_name
+                FROM rankings r
+                JOIN users u ON u.user_id = r.user_id
+                WHERE r.group_id IS NULL
+            """)
+            rows = await cursor.fetchall()
+
+        self._list = IndexableSkipList()
+        self._points.clear()
+        self._levels.clear()
+        for user_id, points, rank_level, name in rows:
+            self.update(user_id, points or 0, rank_level or "bronze", name)
+
+        self.is_loaded = True
+        logger.info(f"✅ Таблицю лідерів завантажено: {len(self)} користувачів")
+
+    def update(self, user_id: int, points: int, rank_level: str, name: Optional[str] = None):
+        """Встановлення балів користувача"""
+
+        old_points = self._points.get(user_id)
+        if old_points is not None:
+            self._list.remove((-old_points, user_id))
+
+        self._list.insert((-points, user_id))
+        self._points[user_id] = points
+        self._levels[user_id] = rank_level
+        if name is not None:
+            self._names[user_id] = name
+        self.version += 1
+
+    def remove(self, user_id: int):
+        """Видалення користувача з рейтингу"""
+
+        points = self._points.pop(user_id, None)
+        if points is not None:
+            self._list.remove((-points, user_id))
+            self._levels.pop(user_id, None)
+            self.version += 1
+
+    def _position_for_points(self, points: int) -> int:
+        # (-points,) менший за будь-який (-points, user_id), тож рахуються лише більші бали
+        return self._list.count_less((-points,)) + 1
+
+    def _entry(self, key: Tuple[int, int]) -> LeaderboardEntry:
+        points, user_id = -key[0], key[1]
+        return LeaderboardEntry(
+            user_id=user_id,
+            points=points,
+            rank_level=self._levels.get(user_id, "bronze"),
+            position=self._position_for_points(points),
+            name=self._names.get(user_id)
+        )
+
+    def get(self, user_id: int) -> Optional[LeaderboardEntry]:
+        """Бали, рівень та позиція користувача"""
+
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return self._entry((-points, user_id))
+
+    def rank_of(self, user_id: int) -> Optional[int]:
+        """Позиція користувача в рейтингу"""
+
+        points = self._points.get(user_id)
+        return self._position_for_points(points) if points is not None else None
+
+    def top(self, k: int = 10) -> List[LeaderboardEntry]:
+        """Перші k користувачів"""
+        return [self._entry(key) for key in self._list.slice(0, k)]
+
+    def around(self, user_id: int, radius: int = 2) -> List[LeaderboardEntry]:
+        """Користувачі навколо заданого (radius вище та нижче)"""
+
+        points = self._points.get(user_id)
+        if points is None:
+            return []
+
+        index = self._list.count_less((-points, user_id))
+        return [self._entry(key) for key in self._list.slice(index - radius, index + radius + 1)]
+
+    async def fill_names(self, entries: List[LeaderboardEntry]):
+        """Дозавантаження імен користувачів, яких ще немає в кеші"""
+
+        missing = [entry.user_id for entry in entries if entry.name is None]
+        if missing:
+            placeholders = ",".join("?" * len(missing))
+            async with db_pool.read() as db:
+                cursor = await db.execute(
+                    f"SELECT user_id, first_name FROM users WHERE user_id IN ({placeholders})",
+                    missing
+                )
+                for user_id, name in await cursor.fetchall():
+                    self._names[user_id] = name
+
+        for entry in entries:
+            entry.name = self._names.get(entry.user_id, entry.name)
+
+    async def check_consistency(self, user_ids: Optional[List[int]] = None, sample_size: int = 100) -> List[int]:
+        """Звірка балів та позицій з SQL; повертає user_id з розбіжностями"""
+
+        if user_ids is None:
+            user_ids = random.sample(list(self._points), min(sample_size, len(self._points)))
+
+        mismatched = []
+        async with db_pool.read() as db:
+            for user_id in user_ids:
+                cursor = await db.execute("""
+                    SELECT points,
+                           (SELECT COUNT(*) + 1 FROM rankings r2
+                            WHERE r2.group_id IS NULL AND r2.points > r1.points)
+                    FROM rankings r1
+                    WHERE user_id = ? AND group_id IS NULL
+                """, (user_id,))
+                row = await cursor.fetchone()
+
+                entry = self.get(user_id)
+                expected = (row[0], row[1]) if row else None
+                actual = (entry.points, entry.position) if entry else None
+                if expected != actual:
+                    mismatched.append(user_id)
+
+        if mismatched:
+            logger.warning(f"⚠️ Таблиця лідерів розходиться з БД для {len(mismatched)} користувачів")
+
+        return mismatched
+
+leaderboard = Leaderboard()
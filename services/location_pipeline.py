@@ -0,0 +1,245 @@
+"""
+Конвеєр обробки GPS локації: валідація → приріст → запис
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+from database.models import GpsTrack, UserState
+from services.gps_service import GpsService
+from services.group_service import GroupService, group_service
+from services.ingestion_service import GpsIngestionQueue, gps_ingestion
+from services.penalty_service import PenaltyService, penalty_service
+from services.ranking_service import RankingService
+from services.standings_service import StandingsEngine, standings_engine
+from services.track_simplifier import TrackSimplifier, track_simplifier
+from services.user_state_service import UserStateStore, user_state_store
+from utils.logger import setup_logger
+from utils.metrics import metrics
+from utils.timestamps import now_ms
+
+logger = setup_logger()
+
+STEPS_PER_KM = 1300  # ~1300 кроків на км
+
+points_total = metrics.counter("gps_points_total", "Оброблені GPS точки за результатом", ("status",))
+distance_total = metrics.counter("gps_distance_km_total", "Зарахована відстань, км")
+points_earned_total = metrics.counter("gps_points_earned_total", "Нараховані бали за рух")
+stage_duration = metrics.histogram("gps_pipeline_stage_seconds", "Тривалість етапів конвеєра локацій", ("stage",))
+
+@dataclass
+class LocationResult:
+    """Результат обробки однієї локації"""
+    status: str = "accepted"  # accepted | invalid
+    user_id: Optional[int] = None
+    timestamp: int = 0
+    distance_km: float = 0.0
+    speed_kmh: float = 0.0
+    points_earned: int = 0
+    total_points: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)  # мілісекунди на етап
+    submitted: bool = False  # знімок стану поставлено в чергу писача
+
+    @property
+    def accepted(self) -> bool:
+        return self.status == "accepted"
+
+class LocationPipeline:
+    """
+    Обробка локації явними етапами.
+
+    Приріст рахується від попередньої точки зі стану в пам'яті ще до запису
+    нової, а трек, підсумки, рейтинг і стан записуються в одній транзакції
+    пакетного писача.
+    """
+
+    def __init__(
+        self,
+        gps_service: Optional[GpsService] = None,
+        ranking_service: Optional[RankingService] = None,
+        ingestion: Optional[GpsIngestionQueue] = None,
+        state_store: Optional[UserStateStore] = None,
+        groups: Optional[GroupService] = None,
+        simplifier: Optional[TrackSimplifier] = None,
+        standings: Optional[StandingsEngine] = None,
+        penalties: Optional[PenaltyService] = None
+    ):
+        self.gps_service = gps_service or GpsService()
+        self.ranking_service = ranking_service or RankingService()
+        self.ingestion = ingestion or gps_ingestion
+        self.state_store = state_store if state_store is not None else user_state_store
+        self.groups = groups or group_service
+        self.simplifier = simplifier or track_simplifier
+        self.standings = standings if standings is not None else standings_engine
+        self.penalties = penalties or penalty_service
+
+        # Сумарний час етапів: назва -> [кількість, мілісекунди]
+        self.stage_stats: Dict[str, list] = {}
+
+    @contextmanager
+    def _stage(self, name: str, result: LocationResult):
+        """Замір тривалості етапу"""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stage_duration.observe(elapsed, name)
+            elapsed_ms = elapsed * 1000
+            result.timings[name] = elapsed_ms
+            stats = self.stage_stats.setdefault(name, [0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed_ms
+
+    async def process(self, user_id: int, location, timestamp: Optional[int] = None) -> LocationResult:
+        """Повна обробка локації користувача (внутрішній user_id)"""
+
+        result = LocationResult(user_id=user_id, timestamp=timestamp if timestamp is not None else now_ms())
+        return await self._process_point(location, result)
+
+    async def process_many(self, user_id: int, points: Sequence) -> List[LocationResult]:
+        """
+        Обробка пакета точок одного користувача (з Mini App).
+
+        Кожна точка проходить ті самі етапи, що й окрема локація, у порядку часу.
+        """
+
+        results = []
+        for point in sorted(points, key=lambda point: point.timestamp):
+            result = LocationResult(user_id=user_id, timestamp=point.timestamp)
+            results.append(await self._process_point(point, result))
+
+        return results
+
+    async def _process_point(self, location, result: LocationResult) -> LocationResult:
+        with self._stage("validate", result):
+            is_valid = self.validate(location)
+
+        if not is_valid:
+            result.status = "invalid"
+            points_total.inc(result.status)
+            return result
+
+        with self._stage("compute_delta", result):
+            state = await self.state_store.get(result.user_id)
+            # Закріплення до першого await після зміни стану: поки знімок не
+            # записано, витіснення повернуло б з БД старіші підсумки
+            self.state_store.pin(result.user_id)
+            moved = self.compute_delta(state, location, result)
+
+        if not moved:
+            self.state_store.unpin(result.user_id)
+
+        try:
+            with self._stage("persist", result):
+                await self.persist(state if moved else None, location, result)
+        except BaseException:
+            # Закріплення переходить до писача лише разом зі знімком у черзі
+            if moved and not result.submitted:
+                self.state_store.unpin(result.user_id)
+            raise
+
+        points_total.inc(result.status)
+        distance_total.inc(amount=result.distance_km)
+        points_earned_total.inc(amount=result.points_earned)
+
+        # lazy: рядок етапів збирається лише при рівні DEBUG
+        logger.opt(lazy=True).debug(
+            "⏱️ Локація користувача {}: {}",
+            lambda: result.user_id,
+            lambda: ", ".join(f"{name}={ms:.2f}мс" for name, ms in result.timings.items())
+        )
+
+        return result
+
+    def validate(self, location) -> bool:
+        """Етап 1: валідація координат та точності"""
+        return self.gps_service.validate_location(location)
+
+    def compute_delta(self, state: UserState, location, result: LocationResult) -> bool:
+        """
+        Етап 2: відстань і швидкість від попередньої точки та оновлення стану.
+
+        Без жодного await, тому паралельні локації одного користувача не
+        перетинаються. Повертає True, якщо опорна точка стану змінилась.
+        """
+
+        result.speed_kmh = self.gps_service.speed_from_state(state, location, result.timestamp)
+        result.distance_km = self.gps_service.distance_from_state(state, location, result.timestamp)
+        return self.apply_delta(state, location, result)
+
+    def apply_delta(self, state: UserState, location, result: LocationResult) -> bool:
+        """
+        Оновлення стану за вже порахованими distance_km та speed_kmh результату.
+
+        Окремо від compute_delta, щоб перерахунок міг брати відстані з
+        векторних ядер треку; повертає True, якщо опорна точка змінилась.
+        """
+
+        # Опорна точка зсувається лише після зарахованої відстані,
+        # щоб повільний рух між частими оновленнями накопичувався
+        moved = result.distance_km > 0 or not state.has_last_point
+
+        if moved:
+            state.last_latitude = location.latitude
+            state.last_longitude = location.longitude
+            state.last_timestamp = result.timestamp
+            state.total_distance += result.distance_km
+
+            # Кроки й бали рахуються від загальної відстані, а не від приросту:
+            # інакше дробова частина губилась би на кожному оновленні, і рух
+            # короткими відрізками (менше 100 м) не приносив би балів зовсім
+            state.total_steps = max(state.total_steps, int(state.total_distance * STEPS_PER_KM))
+            result.points_earned = max(
+                0, self.ranking_service.points_for_distance(state.total_distance) - state.points
+            )
+            state.points += result.points_earned
+
+        result.total_points = state.points
+        return moved
+
+    async def persist(self, state: Optional[UserState], location, result: LocationResult):
+        """Етап 3: результати та штрафи змагань; трек, підсумки, рейтинги та стан у спільному пакеті писача"""
+
+        competition_ids = self.standings.record_point(
+            result.user_id, result.distance_km, result.speed_kmh, result.timestamp
+        )
+        for competition_id in competition_ids:
+            await self.penalties.check_route_deviation(
+                result.user_id, competition_id, (location.latitude, location.longitude), timestamp=result.timestamp
+            )
+
+        track = GpsTrack(
+            user_id=result.user_id,
+            competition_id=competition_ids[0] if competition_ids else None,
+            latitude=location.latitude,
+            longitude=location.longitude,
+            timestamp=result.timestamp,
+            distance_km=result.distance_km,
+            speed_kmh=result.speed_kmh
+        )
+
+        rank_level = self.ranking_service.calculate_rank_level(state.points) if state else None
+        group_ids = await self.groups.groups_of(result.user_id) if result.points_earned > 0 else ()
+
+        # Приріст уже пораховано з повного потоку; у gps_tracks потрапляють лише
+        # точки, що лишаються після спрощення
+        stored = self.simplifier.add(track)
+        for point in stored[:-1]:
+            await self.ingestion.submit(point)
+
+        if stored or state is not None:
+            await self.ingestion.submit(
+                stored[-1] if stored else None, state, rank_level, result.points_earned, group_ids
+            )
+            result.submitted = state is not None
+
+    async def flush_pending(self):
+        """Запис відкладених спрощувачем точок (перед зупинкою черги)"""
+
+        for point in self.simplifier.flush():
+            await self.ingestion.submit(point)
+
+location_pipeline = LocationPipeline()
@@ -2,52 +2,218 @@
 Сервіс штрафної системи
 """
 
-from database.database import get_db_connection
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from database.database import db_pool
 from services.gps_service import GpsService
+from services.route_index import route_index
+from services.standings_service import StandingsEngine, standings_engine
 from config import config
 from utils.logger import setup_logger
+from utils.timestamps import now_ms
 
 logger = setup_logger()
 
+ON_ROUTE = "on_route"
+SUSPECT = "suspect"
+OFF_ROUTE = "off_route"
+
+@dataclass
+class DeviationState:
+    """Стан учасника відносно маршруту"""
+    status: str = ON_ROUTE
+    since: Optional[int] = None  # початок поточного виходу за маршрут
+    max_deviation_km: float = 0.0
+    logged: bool = False  # рядок журналу відкрито (штраф нараховано)
+
 class PenaltyService:
-    """Сервіс штрафної системи"""
+    """
+    Сервіс штрафної системи.
+
+    Вихід за маршрут - автомат з гістерезисом: відхилення понад поріг входу
+    переводить у SUSPECT, і лише якщо воно триває min_duration - один штраф
+    (OFF_ROUTE). Повернення - коли відхилення менше нижчого порогу виходу.
 
-    def __init__(self):
+    Рядок журналу penalties створюється разом зі штрафом (ended_at = NULL)
+    і оновлюється, коли вихід закривається; обидві зміни пишуться пакетами.
+    """
+
+    def __init__(
+        self,
+        standings: Optional[StandingsEngine] = None,
+        flush_interval: float = 5.0
+    ):
         self.gps_service = GpsService()
-        self.deviation_threshold = 0.05  # 50 метрів
+        self.standings = standings if standings is not None else standings_engine
+        self.deviation_threshold = config.ROUTE_DEVIATION_ENTER_M / 1000
+        self.exit_threshold = min(config.ROUTE_DEVIATION_EXIT_M, config.ROUTE_DEVIATION_ENTER_M) / 1000
+        self.min_duration_ms = config.ROUTE_DEVIATION_MIN_SECONDS * 1000
         self.penalty_seconds = config.ROUTE_DEVIATION_PENALTY
+        self.flush_interval = flush_interval
+
+        self._states: Dict[Tuple[int, int], DeviationState] = {}
+        # Зміни журналу, що чекають запису: нові виходи та закриття
+        self._pending_open: List[tuple] = []
+        self._pending_close: List[tuple] = []
+        self._task: Optional[asyncio.Task] = None
 
     async def check_route_deviation(
-        self, 
-        user_id: int, 
+        self,
+        user_id: int,
         competition_id: int,
         user_location: tuple,
-        route_points: list
+        route_points: Optional[list] = None,
+        timestamp: Optional[int] = None
     ) -> bool:
-        """Перевірка відхилення від маршруту"""
+        """
+        Перевірка відхилення від маршруту; True, якщо щойно нараховано штраф.
 
-        if not route_points:
+        Маршрут компілюється один раз на змагання (з route_points або
+        competitions.route_data), далі відстань до найближчого відрізка
+        рахується через просторовий індекс.
+        """
+
+        route = await route_index.get(competition_id, route_points)
+        if route is None:
             return False
 
-        deviation_km = await self.gps_service.calculate_route_deviation(
-            user_location, route_points
-        )
+        deviation_km = route.distance_km(user_location[0], user_location[1])
+        return self.observe(user_id, competition_id, deviation_km, timestamp if timestamp is not None else now_ms())
+
+    def observe(self, user_id: int, competition_id: int, deviation_km: float, timestamp: int) -> bool:
+        """Крок автомата відхилення; True, якщо щойно нараховано штраф"""
+
+        key = (competition_id, user_id)
+        state = self._states.get(key)
+
+        if state is None:
+            if deviation_km <= self.deviation_threshold:
+                return False
+            state = self._states[key] = DeviationState()
 
-        # Якщо відхилення більше порогу
-        if deviation_km > self.deviation_threshold:
-            await self.apply_penalty(user_id, competition_id, self.penalty_seconds)
+        if state.status == ON_ROUTE:
+            if deviation_km > self.deviation_threshold:
+                state.status = SUSPECT
+                state.since = timestamp
+                state.max_deviation_km = deviation_km
+            return False
+
+        state.max_deviation_km = max(state.max_deviation_km, deviation_km)
+
+        if deviation_km <= self.exit_threshold:
+            self._close(competition_id, user_id, state, ended_at=timestamp)
+            # Повернулись на маршрут: стан більше не потрібен
+            del self._states[key]
+            return False
+
+        if state.status == SUSPECT and timestamp - state.since >= self.min_duration_ms:
+            state.status = OFF_ROUTE
+            if self.apply_penalty(user_id, competition_id, self.penalty_seconds):
+                self._open(competition_id, user_id, state)
             return True
 
         return False
 
-    async def apply_penalty(self, user_id: int, competition_id: int, penalty_seconds: int):
-        """Застосування штрафу"""
+    def _open(self, competition_id: int, user_id: int, state: DeviationState):
+        state.logged = True
+        self._pending_open.append((
+            competition_id, user_id, state.since, None,
+            state.max_deviation_km * 1000, self.penalty_seconds, now_ms()
+        ))
 
-        try:
-            # Тут можна зберегти штраф в БД або просто логувати
-            logger.warning(f"⚠️ Штраф {penalty_seconds}с для користувача {user_id} в змаганні {competition_id}")
+    def _close(self, competition_id: int, user_id: int, state: DeviationState, ended_at: Optional[int]):
+        # ended_at = NULL - вихід не завершився до кінця змагання або зупинки бота
+        if state.logged:
+            self._pending_close.append((
+                ended_at, state.max_deviation_km * 1000, competition_id, user_id, state.since
+            ))
+
+    def apply_penalty(self, user_id: int, competition_id: int, penalty_seconds: int) -> bool:
+        """Застосування штрафу до результатів змагання; False, якщо користувач не бере участі"""
+
+        if not self.standings.add_penalty(competition_id, user_id, penalty_seconds):
+            return False
+
+        logger.warning(f"⚠️ Штраф {penalty_seconds}с для користувача {user_id} в змаганні {competition_id}")
+        return True
+
+    async def flush(self, close_open: bool = False) -> int:
+        """
+        Запис накопичених змін журналу однією транзакцією; повертає їх кількість.
+
+        close_open також закриває незавершені виходи за маршрут (ended_at
+        лишається NULL, оновлюється максимальне відхилення), напр. при
+        зупинці бота.
+        """
+
+        if close_open:
+            for (competition_id, user_id), state in self._states.items():
+                if state.status == OFF_ROUTE:
+                    self._close(competition_id, user_id, state, ended_at=None)
+            self._states = {key: state for key, state in self._states.items() if state.status != OFF_ROUTE}
 
-            # Можна додати логіку штрафних балів
+        if not self._pending_open and not self._pending_close:
+            return 0
 
+        opened, self._pending_open = self._pending_open, []
+        closed, self._pending_close = self._pending_close, []
+        try:
+            async with db_pool.write() as db:
+                # Спершу нові рядки: закриття в тому ж пакеті може стосуватися їх
+                if opened:
+                    await db.executemany("""
+                        INSERT INTO penalties
+                            (competition_id, user_id, started_at, ended_at, max_deviation_m, penalty_seconds, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, opened)
+                if closed:
+                    await db.executemany("""
+                        UPDATE penalties SET ended_at = ?, max_deviation_m = ?
+                        WHERE competition_id = ? AND user_id = ? AND started_at = ?
+                    """, closed)
+                await db.commit()
         except Exception as e:
-            logger.error(f"❌ Помилка застосування штрафу: {e}")
+            # Повертаємо зміни в чергу для наступної спроби
+            self._pending_open = opened + self._pending_open
+            self._pending_close = closed + self._pending_close
+            logger.error(f"❌ Помилка запису журналу штрафів ({len(opened) + len(closed)}): {e}")
+            return 0
+
+        return len(opened) + len(closed)
+
+    async def finish_competition(self, competition_id: int):
+        """Закриття виходів за маршрут та запис журналу завершеного змагання"""
+
+        for key in [key for key in self._states if key[0] == competition_id]:
+            state = self._states.pop(key)
+            if state.status == OFF_ROUTE:
+                self._close(competition_id, key[1], state, ended_at=None)
+
+        await self.flush()
+
+    async def start(self):
+        """Запуск періодичного запису журналу"""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="penalty-ledger")
+
+    async def stop(self):
+        """Зупинка з дозаписом журналу"""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush(close_open=True)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+penalty_service = PenaltyService(flush_interval=config.PENALTY_FLUSH_INTERVAL_SECONDS)
@@ -0,0 +1,91 @@
+"""
+Кеш готових відповідей рейтингу та статистики
+"""
+
+from typing import Dict, Optional
+from config import config
+from services.leaderboard import leaderboard
+from utils.cache import TTLCache
+from utils.metrics import metrics
+
+class RankingResponseCache:
+    """
+    Відрендерені відповіді "Мій рейтинг", "Топ гравців" та статистики Mini App.
+
+    Записи живуть ttl секунд і скидаються при фіксації змін
+    підсумків або балів користувача (бали - через
+    RankingService.update_user_points).
+    """
+
+    TOP_KEY = "global"
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 10000):
+        self.user_stats = TTLCache(ttl, max_size)
+        self.top = TTLCache(ttl, max_size=1024)
+        self.mini_app_stats = TTLCache(ttl, max_size)
+
+    def get_user_stats(self, user_id: int) -> Optional[str]:
+        return self.user_stats.get(user_id)
+
+    def set_user_stats(self, user_id: int, payload: str):
+        self.user_stats.set(user_id, payload)
+
+    def get_mini_app_stats(self, user_id: int):
+        return self.mini_app_stats.get(user_id)
+
+    def set_mini_app_stats(self, user_id: int, payload):
+        self.mini_app_stats.set(user_id, payload)
+
+    def get_top(self, group_id: Optional[int] = None) -> Optional[str]:
+        return self.top.get(self.TOP_KEY if group_id is None else group_id)
+
+    def set_top(self, payload: str, group_id: Optional[int] = None):
+        self.top.set(self.TOP_KEY if group_id is None else group_id, payload)
+
+    def invalidate_group(self, group_id: int):
+        """Скидання топу групи після зміни групових балів"""
+        self.top.invalidate(group_id)
+
+    def invalidate_user(self, user_id: int, points: Optional[int] = None):
+        """
+        Скидання статистики користувача після зміни його підсумків.
+
+        Якщо змінились бали (points), топ скидається лише тоді, коли
+        користувач може в нього потрапити.
+        """
+
+        self.user_stats.invalidate(user_id)
+        self.mini_app_stats.invalidate(user_id)
+
+        if points is not None and self._affects_top(user_id, points):
+            self.top.invalidate(self.TOP_KEY)
+
+    def _affects_top(self, user_id: int, points: int, size: int = 10) -> bool:
+        if not leaderboard.is_loaded:
+            return True
+
+        top = leaderboard.top(size)
+        return (
+            len(top) < size
+            or points >= top[-1].points
+            or any(entry.user_id == user_id for entry in top)
+        )
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Лічильники влучань та промахів"""
+        return {
+            "user_stats": dict(self.user_stats.stats),
+            "top": dict(self.top.stats),
+            "mini_app_stats": dict(self.mini_app_stats.stats)
+        }
+
+ranking_cache = RankingResponseCache(ttl=config.RANKING_CACHE_TTL_SECONDS)
+
+metrics.register_collector(lambda: [(
+    "ranking_cache_total", "counter", "Влучання, промахи та скидання кешів відповідей рейтингу",
+    [
+        ("ranking_cache_total", {"cache": cache, "event": event}, value)
+        for cache, stats in ranking_cache.stats().items()
+        for event, value in stats.items()
+    ]
+)])
@@ -2,7 +2,9 @@
 Сервіс системи рейтингів
 """
 
-from database.database import get_db_connection
+from database.database import db_pool
+from services.leaderboard import leaderboard
+from services.ranking_cache import ranking_cache
 from config import config
 from utils.logger import setup_logger
 
@@ -20,47 +22,9 @@ class RankingService:
             "diamond": 5000
         }
 
-    async def update_user_points(self, user_id: int, distance_km: float):
-        """Оновлення балів користувача"""
-
-        # Нарахування балів: 10 балів за км
-        points_earned = int(distance_km * 10)
-
-        if points_earned <= 0:
-            return
-
-        try:
-            async with await get_db_connection() as db:
-                # Перевірка чи існує запис рейтингу
-                cursor = await db.execute("""
-                    SELECT ranking_id, points FROM rankings WHERE user_id = ?
-                """, (user_id,))
-                existing_rank = await cursor.fetchone()
-
-                if existing_rank:
-                    # Оновлення існуючого рейтингу
-                    new_points = existing_rank[1] + points_earned
-                    new_rank_level = self.calculate_rank_level(new_points)
-
-                    await db.execute("""
-                        UPDATE rankings 
-                        SET points = ?, rank_level = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE user_id = ?
-                    """, (new_points, new_rank_level, user_id))
-                else:
-                    # Створення нового рейтингу
-                    rank_level = self.calculate_rank_level(points_earned)
-
-                    await db.execute("""
-                        INSERT INTO rankings (user_id, points, rank_level)
-                        VALUES (?, ?, ?)
-                    """, (user_id, points_earned, rank_level))
-
-                await db.commit()
-                logger.info(f"✅ Оновлено рейтинг користувача {user_id}: +{points_earned} балів")
-
-        except Exception as e:
-            logger.error(f"❌ Помилка оновлення рейтингу: {e}")
+    def points_for_distance(self, distance_km: float) -> int:
+        """Нарахування балів: 10 балів за км"""
+        return int(distance_km * 10)
 
     def calculate_rank_level(self, points: int) -> str:
         """Розрахунок рівня рейтингу"""
@@ -76,16 +40,36 @@ class RankingService:
         else:
             return "bronze"
 
+    def update_user_points(self, user_id: int, points: int, rank_level: str):
+        """
+        Оновлення рейтингу користувача після запису балів у rankings.
+
+        Єдина точка входу для змін рейтингу: таблиця лідерів у пам'яті
+        та закешовані відповіді змінюються разом і лише після фіксації
+        транзакції, тож не випереджають таблицю rankings.
+        """
+
+        leaderboard.update(user_id, points, rank_level)
+        ranking_cache.invalidate_user(user_id, points)
+
     async def get_user_ranking(self, user_id: int) -> dict:
         """Отримання рейтингу користувача"""
 
+        # Позиція з таблиці лідерів у пам'яті за O(log n)
+        if leaderboard.is_loaded:
+            entry = leaderboard.get(user_id)
+            if entry:
+                return {"points": entry.points, "rank_level": entry.rank_level, "position": entry.position}
+            return {"points": 0, "rank_level": "bronze", "position": None}
+
         try:
-            async with await get_db_connection() as db:
+            async with db_pool.read() as db:
                 cursor = await db.execute("""
                     SELECT points, rank_level, 
-                           (SELECT COUNT(*) + 1 FROM rankings r2 WHERE r2.points > r1.points) as position
+                           (SELECT COUNT(*) + 1 FROM rankings r2
+                            WHERE r2.group_id IS NULL AND r2.points > r1.points) as position
                     FROM rankings r1
-                    WHERE user_id = ?
+                    WHERE user_id = ? AND group_id IS NULL
                 """, (user_id,))
 
                 result = await cursor.fetchone()
@@ -0,0 +1,192 @@
+"""
+Просторовий індекс маршрутів змагань: відстань до найближчого відрізка маршруту
+"""
+
+import json
+import math
+import numpy as np
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from database.database import db_pool
+from utils.geo import local_scale, point_segment_distance
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+Segment = Tuple[float, float, float, float]
+
+def parse_route_data(route_data: Optional[str]) -> List[Tuple[float, float]]:
+    """Точки маршруту з JSON: [[lat, lon], ...] або [{"latitude": .., "longitude": ..}, ...]"""
+
+    if not route_data:
+        return []
+
+    points = []
+    for item in json.loads(route_data):
+        if isinstance(item, dict):
+            lat = item.get("latitude", item.get("lat"))
+            lon = item.get("longitude", item.get("lon", item.get("lng")))
+        else:
+            lat, lon = item[0], item[1]
+        points.append((float(lat), float(lon)))
+
+    return points
+
+class CompiledRoute:
+    """
+    Маршрут, підготовлений для швидких запитів відхилення.
+
+    Координати проектуються в локальну площину (км) навколо центру маршруту,
+    а відрізки розкладаються по квадратній сітці. Запит перевіряє лише
+    клітинки поруч з точкою, розширюючи пошук кільцями, поки найкращий
+    відрізок не стане гарантовано найближчим. Якщо за max_rings кілець
+    гарантії немає (точка всередині петлі, далеко від усіх відрізків),
+    відстань рахується одним векторним проходом по всіх відрізках.
+    """
+
+    max_rings = 4
+
+    def __init__(self, points: Sequence[Tuple[float, float]], cell_size_km: Optional[float] = None):
+        if not points:
+            raise ValueError("Маршрут без точок")
+
+        coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.origin_lat = float(coords[:, 0].mean())
+        self.origin_lon = float(coords[:, 1].mean())
+        self._kx, self._ky = local_scale(self.origin_lat)
+
+        xs = (coords[:, 1] - self.origin_lon) * self._kx
+        ys = (coords[:, 0] - self.origin_lat) * self._ky
+
+        if len(coords) == 1:
+            xs, ys = np.repeat(xs, 2), np.repeat(ys, 2)
+
+        self._x1, self._y1, self._x2, self._y2 = xs[:-1], ys[:-1], xs[1:], ys[1:]
+        self.segments: List[Segment] = list(zip(
+            self._x1.tolist(), self._y1.tolist(), self._x2.tolist(), self._y2.tolist()
+        ))
+
+        # Клітинка порядку середньої довжини відрізка: кожен відрізок займає
+        # кілька клітинок, а в клітинці - кілька відрізків
+        if cell_size_km is None:
+            lengths = np.hypot(self._x2 - self._x1, self._y2 - self._y1)
+            cell_size_km = float(lengths.mean()) if lengths.size else 0.0
+        self.cell_size = max(cell_size_km, 0.01)
+
+        self.min_x, self.max_x = float(xs.min()), float(xs.max())
+        self.min_y, self.max_y = float(ys.min()), float(ys.max())
+
+        self._grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for index, (x1, y1, x2, y2) in enumerate(self.segments):
+            cx1, cy1 = self._cell(min(x1, x2), min(y1, y2))
+            cx2, cy2 = self._cell(max(x1, x2), max(y1, y2))
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    self._grid[(cx, cy)].append(index)
+
+        self._max_cell = self._cell(self.max_x, self.max_y)
+        self._min_cell = self._cell(self.min_x, self.min_y)
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def project(self, latitude: float, longitude: float) -> Tuple[float, float]:
+        """Координати точки в локальній площині маршруту, км"""
+        return (longitude - self.origin_lon) * self._kx, (latitude - self.origin_lat) * self._ky
+
+    def _outside_distance(self, x: float, y: float) -> float:
+        dx = max(self.min_x - x, 0.0, x - self.max_x)
+        dy = max(self.min_y - y, 0.0, y - self.max_y)
+        return math.hypot(dx, dy)
+
+    def distance_km(self, latitude: float, longitude: float) -> float:
+        """Відстань від точки до найближчого відрізка маршруту, км"""
+
+        x, y = self.project(latitude, longitude)
+
+        # Далеко за межами маршруту сітка не допоможе: один векторний прохід
+        if self._outside_distance(x, y) > 4 * self.cell_size:
+            return self._brute_force(x, y)
+
+        cx, cy = self._cell(x, y)
+        max_ring = max(
+            abs(cx - self._min_cell[0]), abs(cx - self._max_cell[0]),
+            abs(cy - self._min_cell[1]), abs(cy - self._max_cell[1])
+        )
+
+        best = math.inf
+        seen = set()
+        for ring in range(min(max_ring, self.max_rings) + 1):
+            for cell in self._ring_cells(cx, cy, ring):
+                for index in self._grid.get(cell, ()):
+                    if index not in seen:
+                        seen.add(index)
+                        best = min(best, point_segment_distance(x, y, *self.segments[index]))
+
+            # Будь-який відрізок поза переглянутими кільцями далі за ring клітинок
+            if best <= ring * self.cell_size or ring == max_ring:
+                return best
+
+        # Кількість клітинок росте квадратично з радіусом: далі дешевше перебрати всі відрізки
+        return self._brute_force(x, y)
+
+    def _ring_cells(self, cx: int, cy: int, ring: int):
+        if ring == 0:
+            yield (cx, cy)
+            return
+
+        for dx in range(-ring, ring + 1):
+            yield (cx + dx, cy - ring)
+            yield (cx + dx, cy + ring)
+        for dy in range(-ring + 1, ring):
+            yield (cx - ring, cy + dy)
+            yield (cx + ring, cy + dy)
+
+    def _brute_force(self, x: float, y: float) -> float:
+        dx, dy = self._x2 - self._x1, self._y2 - self._y1
+        length_sq = dx * dx + dy * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(length_sq > 0, ((x - self._x1) * dx + (y - self._y1) * dy) / length_sq, 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        return float(np.hypot(x - (self._x1 + t * dx), y - (self._y1 + t * dy)).min())
+
+class RouteIndexCache:
+    """Скомпільовані маршрути змагань за competition_id"""
+
+    def __init__(self):
+        self._routes: Dict[int, Optional[CompiledRoute]] = {}
+
+    async def get(
+        self,
+        competition_id: int,
+        route_points: Optional[Sequence[Tuple[float, float]]] = None
+    ) -> Optional[CompiledRoute]:
+        """Маршрут змагання; при першому зверненні компілюється з route_points або з БД"""
+
+        if competition_id in self._routes:
+            return self._routes[competition_id]
+
+        if route_points is None:
+            async with db_pool.read() as db:
+                cursor = await db.execute(
+                    "SELECT route_data FROM competitions WHERE competition_id = ?", (competition_id,)
+                )
+                row = await cursor.fetchone()
+            route_points = parse_route_data(row[0]) if row else []
+
+        route = CompiledRoute(route_points) if route_points else None
+        self._routes[competition_id] = route
+
+        if route is not None:
+            logger.debug(f"🗺️ Маршрут змагання {competition_id} скомпільовано: {len(route)} відрізків")
+
+        return route
+
+    def invalidate(self, competition_id: int):
+        """Видалення маршруту (після зміни або завершення змагання)"""
+        self._routes.pop(competition_id, None)
+
+route_index = RouteIndexCache()
@@ -0,0 +1,372 @@
+"""
+Поточні результати змагань у пам'яті з інкрементальним оновленням
+"""
+
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from config import config
+from database.database import db_pool
+from services.leaderboard import IndexableSkipList
+from utils.logger import setup_logger
+from utils.timestamps import now_ms
+
+logger = setup_logger()
+
+@dataclass
+class ParticipantStats:
+    """Накопичені показники учасника змагання"""
+    user_id: int
+    distance_km: float = 0.0
+    max_speed_kmh: float = 0.0
+    first_timestamp: Optional[int] = None
+    last_timestamp: Optional[int] = None
+    penalty_seconds: int = 0
+    points_count: int = 0
+
+    @property
+    def elapsed_hours(self) -> float:
+        if self.first_timestamp is None or self.last_timestamp is None:
+            return 0.0
+        return (self.last_timestamp - self.first_timestamp) / 3_600_000
+
+    @property
+    def avg_speed_kmh(self) -> float:
+        hours = self.elapsed_hours
+        return self.distance_km / hours if hours > 0 else 0.0
+
+@dataclass
+class StandingEntry:
+    """Рядок таблиці результатів"""
+    position: int
+    user_id: int
+    score: float
+    distance_km: float
+    max_speed_kmh: float
+    avg_speed_kmh: float
+    penalty_seconds: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+class CompetitionStandings:
+    """
+    Таблиця результатів одного змагання.
+
+    Sprint ранжується за середньою швидкістю, де штрафні секунди додаються
+    до часу; Endurance - за відстанню. Учасники впорядковані в skip list за
+    (-score, user_id), тож оновлення та позиція коштують O(log n).
+    """
+
+    def __init__(self, competition_id: int, comp_type: str):
+        self.competition_id = competition_id
+        self.comp_type = comp_type
+        self._list = IndexableSkipList()
+        self._stats: Dict[int, ParticipantStats] = {}
+        self._keys: Dict[int, Tuple[float, int]] = {}
+
+        # Підсумки штрафів змагання без перегляду журналу
+        self.penalty_total_seconds = 0
+        self.penalty_count = 0
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._stats
+
+    def score(self, stats: ParticipantStats) -> float:
+        """Показник, за яким ранжуються учасники (більше - краще)"""
+
+        if self.comp_type == "sprint":
+            hours = stats.elapsed_hours + stats.penalty_seconds / 3600
+            return stats.distance_km / hours if hours > 0 else 0.0
+
+        return stats.distance_km
+
+    def _reindex(self, stats: ParticipantStats):
+        old_key = self._keys.get(stats.user_id)
+        if old_key is not None:
+            self._list.remove(old_key)
+
+        key = (-self.score(stats), stats.user_id)
+        self._list.insert(key)
+        self._keys[stats.user_id] = key
+
+    def add(self, stats: ParticipantStats):
+        """Додавання учасника (або заміна його показників)"""
+
+        old = self._stats.get(stats.user_id)
+        if old is not None:
+            self.penalty_total_seconds -= old.penalty_seconds
+
+        self._stats[stats.user_id] = stats
+        self.penalty_total_seconds += stats.penalty_seconds
+        self._reindex(stats)
+
+    def record(self, user_id: int, distance_km: float, speed_kmh: float, timestamp: int) -> bool:
+        """Врахування точки учасника; False, якщо користувач не бере участі"""
+
+        stats = self._stats.get(user_id)
+        if stats is None:
+            return False
+
+        if stats.first_timestamp is None:
+            stats.first_timestamp = timestamp
+        stats.last_timestamp = max(timestamp, stats.last_timestamp or timestamp)
+        stats.distance_km += distance_km
+        stats.max_speed_kmh = max(stats.max_speed_kmh, speed_kmh)
+        stats.points_count += 1
+
+        self._reindex(stats)
+        return True
+
+    def add_penalty(self, user_id: int, penalty_seconds: int) -> bool:
+        """Додавання штрафних секунд учаснику"""
+
+        stats = self._stats.get(user_id)
+        if stats is None:
+            return False
+
+        stats.penalty_seconds += penalty_seconds
+        self.penalty_total_seconds += penalty_seconds
+        self.penalty_count += 1
+        self._reindex(stats)
+        return True
+
+    def _entry(self, key: Tuple[float, int]) -> StandingEntry:
+        stats = self._stats[key[1]]
+        return StandingEntry(
+            # Однаковий результат - однакове місце
+            position=self._list.count_less((key[0],)) + 1,
+            user_id=stats.user_id,
+            score=-key[0],
+            distance_km=stats.distance_km,
+            max_speed_kmh=stats.max_speed_kmh,
+            avg_speed_kmh=stats.avg_speed_kmh,
+            penalty_seconds=stats.penalty_seconds
+        )
+
+    def top(self, limit: int = 10, offset: int = 0) -> List[StandingEntry]:
+        """Сторінка таблиці результатів"""
+        return [self._entry(key) for key in self._list.slice(offset, offset + limit)]
+
+    def get(self, user_id: int) -> Optional[StandingEntry]:
+        """Результат та місце учасника"""
+
+        key = self._keys.get(user_id)
+        return self._entry(key) if key is not None else None
+
+    def stats_of(self, user_id: int) -> Optional[ParticipantStats]:
+        return self._stats.get(user_id)
+
+    def user_ids(self) -> List[int]:
+        return list(self._stats)
+
+class StandingsEngine:
+    """
+    Таблиці результатів усіх активних змагань.
+
+    Точки користувача потрапляють лише в змагання, де він бере участь
+    (індекс user_id -> змагання), а змінені учасники періодично
+    записуються в competition_participants одним пакетом.
+    """
+
+    def __init__(self, snapshot_interval: float = 10.0):
+        self.snapshot_interval = snapshot_interval
+        self._competitions: Dict[int, CompetitionStandings] = {}
+        self._by_user: Dict[int, Set[int]] = {}
+        self._dirty: Set[Tuple[int, int]] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def __contains__(self, competition_id: int) -> bool:
+        return competition_id in self._competitions
+
+    def get(self, competition_id: int) -> Optional[CompetitionStandings]:
+        return self._competitions.get(competition_id)
+
+    def competitions_of(self, user_id: int) -> Set[int]:
+        """Активні змагання користувача"""
+        return self._by_user.get(user_id, set())
+
+    async def load(self):
+        """Відновлення таблиць активних змагань з останніх знімків"""
+
+        async with db_pool.read() as db:
+            cursor = await db.execute("""
+                SELECT c.competition_id, c.comp_type, p.user_id, p.distance_km, p.max_speed_kmh,
+                       p.first_timestamp, p.last_timestamp, p.penalty_seconds, p.points_count
+                FROM competitions c
+                LEFT JOIN competition_participants p ON p.competition_id = c.competition_id
+                WHERE c.is_active = 1
+            """)
+            rows = await cursor.fetchall()
+
+            # Кількість штрафів - за журналом, у знімках учасників її немає
+            cursor = await db.execute("""
+                SELECT c.competition_id, COUNT(*)
+                FROM competitions c
+                JOIN penalties p ON p.competition_id = c.competition_id
+                WHERE c.is_active = 1
+                GROUP BY c.competition_id
+            """)
+            penalty_counts = dict(await cursor.fetchall())
+
+        self._competitions.clear()
+        self._by_user.clear()
+        self._dirty.clear()
+
+        for competition_id, comp_type, user_id, *values in rows:
+            standings = self._ensure(competition_id, comp_type)
+            if user_id is not None:
+                standings.add(ParticipantStats(user_id, *values))
+                self._by_user.setdefault(user_id, set()).add(competition_id)
+
+        for competition_id, count in penalty_counts.items():
+            self._competitions[competition_id].penalty_count = count
+
+        logger.info(f"✅ Таблиці результатів завантажено: змагань {len(self._competitions)}")
+
+    def _ensure(self, competition_id: int, comp_type: str) -> CompetitionStandings:
+        standings = self._competitions.get(competition_id)
+        if standings is None:
+            standings = CompetitionStandings(competition_id, comp_type)
+            self._competitions[competition_id] = standings
+        return standings
+
+    def join(self, competition_id: int, comp_type: str, user_id: int):
+        """Додавання учасника до таблиці активного змагання"""
+
+        standings = self._ensure(competition_id, comp_type)
+        if user_id not in standings:
+            standings.add(ParticipantStats(user_id))
+            self._by_user.setdefault(user_id, set()).add(competition_id)
+
+    def record_point(self, user_id: int, distance_km: float, speed_kmh: float, timestamp: int) -> List[int]:
+        """Врахування точки в усіх змаганнях користувача; повертає їх competition_id"""
+
+        competition_ids = self._by_user.get(user_id)
+        if not competition_ids:
+            return []
+
+        updated = []
+        for competition_id in competition_ids:
+            if self._competitions[competition_id].record(user_id, distance_km, speed_kmh, timestamp):
+                self._dirty.add((competition_id, user_id))
+                updated.append(competition_id)
+
+        return sorted(updated)
+
+    def add_penalty(self, competition_id: int, user_id: int, penalty_seconds: int) -> bool:
+        """Штрафні секунди учаснику змагання"""
+
+        standings = self._competitions.get(competition_id)
+        if standings is None or not standings.add_penalty(user_id, penalty_seconds):
+            return False
+
+        self._dirty.add((competition_id, user_id))
+        return True
+
+    def top(self, competition_id: int, limit: int = 10, offset: int = 0) -> List[StandingEntry]:
+        """Сторінка результатів змагання"""
+
+        standings = self._competitions.get(competition_id)
+        return standings.top(limit, offset) if standings else []
+
+    def position(self, competition_id: int, user_id: int) -> Optional[StandingEntry]:
+        """Результат та місце користувача в змаганні"""
+
+        standings = self._competitions.get(competition_id)
+        return standings.get(user_id) if standings else None
+
+    async def snapshot(self, competition_id: Optional[int] = None) -> int:
+        """Запис змінених учасників (усіх або одного змагання); повертає кількість рядків"""
+
+        # Набір забирається до першого await: зміни під час запису потрапляють
+        # у новий набір і не губляться
+        if competition_id is None:
+            dirty, self._dirty = self._dirty, set()
+        else:
+            dirty = {key for key in self._dirty if key[0] == competition_id}
+            self._dirty -= dirty
+
+        # Завершені змагання вже записав finish
+        dirty = {key for key in dirty if key[0] in self._competitions}
+        return await self._write(dirty, self._competitions)
+
+    async def _write(self, dirty: Set[Tuple[int, int]], competitions: Dict[int, CompetitionStandings]) -> int:
+        if not dirty:
+            return 0
+
+        rows = []
+        updated_at = now_ms()
+        for comp_id, user_id in dirty:
+            stats = competitions[comp_id].stats_of(user_id)
+            rows.append((
+                stats.distance_km, stats.max_speed_kmh, stats.first_timestamp, stats.last_timestamp,
+                stats.penalty_seconds, stats.points_count, updated_at, comp_id, user_id
+            ))
+
+        try:
+            async with db_pool.write() as db:
+                await db.executemany("""
+                    UPDATE competition_participants
+                    SET distance_km = ?, max_speed_kmh = ?, first_timestamp = ?, last_timestamp = ?,
+                        penalty_seconds = ?, points_count = ?, updated_at = ?
+                    WHERE competition_id = ? AND user_id = ?
+                """, rows)
+                await db.commit()
+        except Exception:
+            # Наступний знімок повторить запис ще активних змагань
+            self._dirty |= {key for key in dirty if key[0] in self._competitions}
+            raise
+
+        return len(rows)
+
+    async def finish(self, competition_id: int):
+        """Видалення таблиці завершеного змагання та її фінальний знімок"""
+
+        standings = self._competitions.pop(competition_id, None)
+        if standings is None:
+            return
+
+        # Спершу таблиця від'єднується, щоб нові точки вже не змінювали її під час запису
+        for user_id in standings.user_ids():
+            competition_ids = self._by_user.get(user_id)
+            if competition_ids is not None:
+                competition_ids.discard(competition_id)
+                if not competition_ids:
+                    del self._by_user[user_id]
+
+        dirty = {key for key in self._dirty if key[0] == competition_id}
+        self._dirty -= dirty
+        await self._write(dirty, {competition_id: standings})
+
+    async def start(self):
+        """Запуск періодичних знімків"""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="standings-snapshot")
+
+    async def stop(self):
+        """Зупинка з фінальним знімком"""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.snapshot()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.snapshot()
+            except Exception as e:
+                logger.error(f"❌ Помилка знімка результатів змагань: {e}")
+
+standings_engine = StandingsEngine(snapshot_interval=config.STANDINGS_SNAPSHOT_INTERVAL_SECONDS)
@@ -0,0 +1,160 @@
+"""
+Готова статистика користувача для Mini App з ETag
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from database.database import db_pool
+from database.models import GpsTrack
+from services.gps_service import GpsService
+from services.leaderboard import Leaderboard, LeaderboardEntry, leaderboard
+from services.ranking_cache import RankingResponseCache, ranking_cache
+from services.ranking_service import RankingService
+from services.user_state_service import UserStateStore, user_state_store
+
+LEADERBOARD_SIZE = 10
+RECENT_TRACK_POINTS = 50
+
+# Один тег із заголовка If-None-Match: "*" або (слабкий W/) тег у лапках
+_ENTITY_TAG = re.compile(r'\*|(?:W/)?("[^"]*")')
+
+@dataclass(frozen=True)
+class StatsPayload:
+    """Серіалізована відповідь та її сильний ETag"""
+    body: bytes
+    etag: str
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """
+        Чи збігається ETag з заголовком If-None-Match.
+
+        Заголовок - список тегів через кому; для If-None-Match теги
+        порівнюються слабко (W/"x" збігається з "x"), "*" - будь-який.
+        """
+
+        if not if_none_match:
+            return False
+        for match in _ENTITY_TAG.finditer(if_none_match):
+            if match.group(0) == "*" or match.group(1) == self.etag:
+                return True
+        return False
+
+@dataclass
+class _UserStats:
+    """Частина відповіді, що залежить лише від самого користувача, та її остання збірка"""
+    data: dict
+    payload: Optional[StatsPayload] = None
+    leaderboard_version: int = -1
+
+class UserStatsService:
+    """
+    JSON статистики Mini App: підсумки, рівень, місце, зріз рейтингу та
+    останні точки треку.
+
+    Підсумки й трек користувача лежать у кеші відповідей рейтингу і
+    скидаються, коли пакетний писач фіксує його зміни (або мине TTL).
+    Місце та зріз рейтингу залежать і від чужих балів, тому готова
+    відповідь та її ETag прив'язані до версії таблиці лідерів: поки
+    рейтинг не змінився, повторні опитування не звертаються до БД і не
+    серіалізують відповідь заново.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[RankingResponseCache] = None,
+        board: Optional[Leaderboard] = None,
+        state_store: Optional[UserStateStore] = None
+    ):
+        self.cache = cache or ranking_cache
+        self.leaderboard = board if board is not None else leaderboard
+        self.state_store = state_store if state_store is not None else user_state_store
+        self.ranking_service = RankingService()
+        self.gps_service = GpsService()
+        # Топ таблиці лідерів, спільний для всіх користувачів: (версія, рядки)
+        self._top: Tuple[int, List[LeaderboardEntry]] = (-1, [])
+
+    async def get(self, user_id: int) -> StatsPayload:
+        """Статистика зареєстрованого користувача"""
+
+        stats = self.cache.get_mini_app_stats(user_id)
+        if stats is None:
+            stats = _UserStats(await self._user_data(user_id))
+            self.cache.set_mini_app_stats(user_id, stats)
+
+        version = self.leaderboard.version
+        if stats.payload is None or stats.leaderboard_version != version:
+            data = dict(stats.data)
+            data["user"] = {**data["user"], "position": self.leaderboard.rank_of(user_id)}
+            data["leaderboard"] = await self._leaderboard_slice(user_id)
+
+            stats.payload = self._serialize(data)
+            stats.leaderboard_version = version
+
+        return stats.payload
+
+    async def _user_data(self, user_id: int) -> dict:
+        # Підсумки та останні точки треку користувача
+        async with db_pool.read() as db:
+            cursor = await db.execute("""
+                SELECT latitude, longitude, timestamp
+                FROM gps_tracks
+                WHERE user_id = ? AND is_valid = 1
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """, (user_id, RECENT_TRACK_POINTS))
+            track = [
+                GpsTrack(user_id=user_id, latitude=lat, longitude=lon, timestamp=ts)
+                for lat, lon, ts in reversed(await cursor.fetchall())
+            ]
+
+        state = await self.state_store.get(user_id)
+        return {
+            "user": {
+                "distance_km": round(state.total_distance, 3),
+                "steps": state.total_steps,
+                "points": state.points,
+                "rank_level": self.ranking_service.calculate_rank_level(state.points)
+            },
+            "track": [[p.latitude, p.longitude, p.timestamp] for p in track],
+            # Довжина показаного відрізка треку за координатами (векторне ядро)
+            "track_distance_km": round(self.gps_service.track_distance(track), 3)
+        }
+
+    async def _top_entries(self) -> List[LeaderboardEntry]:
+        # Топ будується (з іменами) раз на версію таблиці лідерів
+        version = self.leaderboard.version
+        if self._top[0] != version:
+            entries = self.leaderboard.top(LEADERBOARD_SIZE)
+            await self.leaderboard.fill_names(entries)
+            self._top = (version, entries)
+        return self._top[1]
+
+    async def _leaderboard_slice(self, user_id: int) -> List[dict]:
+        # Топ та сусіди користувача, якщо він за межами топу
+        entries = list(await self._top_entries())
+        if all(entry.user_id != user_id for entry in entries):
+            around = self.leaderboard.around(user_id, radius=1)
+            await self.leaderboard.fill_names(around)
+            entries += around
+
+        return [
+            {
+                "position": entry.position,
+                "name": entry.name,
+                "points": entry.points,
+                "rank_level": entry.rank_level,
+                "is_me": entry.user_id == user_id
+            }
+            for entry in entries
+        ]
+
+    @staticmethod
+    def _serialize(data: dict) -> StatsPayload:
+        # Детермінована серіалізація: однакові дані - однаковий ETag
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode()
+        return StatsPayload(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+user_stats_service = UserStatsService()
@@ -0,0 +1,172 @@
+"""
+Спрощення GPS треків під час запису (ковзне вікно Дугласа-Пекера)
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional
+from config import config
+from database.models import GpsTrack
+from utils.geo import local_scale, point_segment_distance
+
+@dataclass
+class _Stream:
+    """Потік точок користувача з моменту останньої збереженої точки"""
+    anchor: GpsTrack
+    window: List[GpsTrack] = field(default_factory=list)  # пропущені точки та кандидат (останній)
+    pending_distance: float = 0.0  # відстань від anchor до кандидата
+    seen_at: float = field(default_factory=time.monotonic)  # коли отримано останню точку
+
+class TrackSimplifier:
+    """
+    Онлайн-спрощення потоку точок кожного користувача.
+
+    Точка зберігається лише тоді, коли пряма від останньої збереженої точки
+    до нової вже не проходить в межах tolerance від усіх проміжних точок
+    (стояння на місці та рух по прямій схлопуються). Рішення запізнюється на
+    одну точку: зберігається останній кандидат, що ще вкладався в коридор.
+
+    Відстань і швидкість рахуються з повного потоку до спрощення; відстань
+    пропущених точок переноситься в distance_km збереженої, тому сума
+    distance_km треку не змінюється.
+
+    Кандидат потоку, що затих (напр. користувач вимкнув трансляцію), чекав би
+    наступної точки безкінечно, тому flush_idle періодично віддає кандидатів
+    потоків без нових точок довше max_gap_ms.
+    """
+
+    def __init__(
+        self,
+        tolerance_m: float = 5.0,
+        max_gap_ms: int = 300_000,
+        max_window: int = 50,
+        max_users: int = 10000
+    ):
+        self.tolerance_km = tolerance_m / 1000
+        self.max_gap_ms = max_gap_ms
+        self.max_window = max_window
+        self.max_users = max_users
+
+        self._streams: "OrderedDict[int, _Stream]" = OrderedDict()
+        self.stats: Dict[str, int] = {"received": 0, "stored": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.tolerance_km > 0
+
+    def add(self, point: GpsTrack) -> List[GpsTrack]:
+        """Нова точка потоку; повертає точки, які слід записати (зазвичай 0 або 1)"""
+
+        self.stats["received"] += 1
+
+        if not self.enabled:
+            return self._emit([point])
+
+        stream = self._streams.get(point.user_id)
+        if stream is None:
+            self._streams[point.user_id] = _Stream(anchor=point)
+            emitted = self._evict()
+            emitted.append(point)
+            return self._emit(emitted)
+
+        self._streams.move_to_end(point.user_id)
+        stream.seen_at = time.monotonic()
+
+        if stream.window and not self._fits(stream, point):
+            # Кандидат - остання точка, що ще вкладалась у коридор
+            stored = self._close_window(stream)
+            stream.anchor = stored
+            stream.window = [point]
+            stream.pending_distance = point.distance_km
+            return self._emit([stored])
+
+        stream.window.append(point)
+        stream.pending_distance += point.distance_km
+        return []
+
+    def _fits(self, stream: _Stream, point: GpsTrack) -> bool:
+        if len(stream.window) >= self.max_window:
+            return False
+        if point.timestamp - stream.anchor.timestamp > self.max_gap_ms:
+            return False
+
+        anchor = stream.anchor
+        kx, ky = local_scale(anchor.latitude)
+        x2 = (point.longitude - anchor.longitude) * kx
+        y2 = (point.latitude - anchor.latitude) * ky
+
+        for skipped in stream.window:
+            x = (skipped.longitude - anchor.longitude) * kx
+            y = (skipped.latitude - anchor.latitude) * ky
+            if point_segment_distance(x, y, 0.0, 0.0, x2, y2) > self.tolerance_km:
+                return False
+
+        return True
+
+    def _close_window(self, stream: _Stream) -> GpsTrack:
+        candidate = stream.window[-1]
+        return replace(candidate, distance_km=stream.pending_distance)
+
+    def _evict(self) -> List[GpsTrack]:
+        emitted = []
+        while len(self._streams) > self.max_users:
+            _, stream = self._streams.popitem(last=False)
+            if stream.window:
+                emitted.append(self._close_window(stream))
+        return emitted
+
+    def _emit(self, points: List[GpsTrack]) -> List[GpsTrack]:
+        self.stats["stored"] += len(points)
+        return points
+
+    def flush(self, user_id: Optional[int] = None) -> List[GpsTrack]:
+        """Незаписані кандидати (одного або всіх користувачів), напр. перед зупинкою"""
+
+        user_ids = [user_id] if user_id is not None else list(self._streams)
+        emitted = []
+        for uid in user_ids:
+            stream = self._streams.get(uid)
+            if stream is not None and stream.window:
+                stored = self._close_window(stream)
+                emitted.append(stored)
+                stream.anchor = stored
+                stream.window = []
+                stream.pending_distance = 0.0
+
+        return self._emit(emitted)
+
+    def flush_idle(self, now: Optional[float] = None) -> List[GpsTrack]:
+        """
+        Кандидати потоків без нових точок довше max_gap_ms (now - time.monotonic()).
+
+        Такий потік однаково не продовжиться коридором (наступну точку відріже
+        розрив у часі), тому він забувається: наступна точка користувача
+        почне новий потік і збережеться одразу.
+        """
+
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.max_gap_ms / 1000
+
+        # Потоки впорядковані за останньою точкою: затихлі - на початку
+        emitted = []
+        while self._streams:
+            user_id, stream = next(iter(self._streams.items()))
+            if stream.seen_at > cutoff:
+                break
+            del self._streams[user_id]
+            if stream.window:
+                emitted.append(self._close_window(stream))
+
+        return self._emit(emitted)
+
+    @property
+    def reduction_ratio(self) -> float:
+        """У скільки разів менше точок записано, ніж отримано"""
+        return self.stats["received"] / self.stats["stored"] if self.stats["stored"] else 0.0
+
+track_simplifier = TrackSimplifier(
+    tolerance_m=config.GPS_SIMPLIFY_TOLERANCE_M,
+    max_gap_ms=config.GPS_SIMPLIFY_MAX_GAP_SECONDS * 1000,
+    max_users=config.USER_STATE_CACHE_SIZE
+)
@@ -0,0 +1,118 @@
+"""
+Відповідність telegram_id → внутрішній user_id: обмежений LRU кеш поверх таблиці users
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from config import config
+from database.database import db_pool
+from utils.logger import setup_logger
+from utils.metrics import metrics
+
+logger = setup_logger()
+
+@dataclass
+class UserContext:
+    """Користувач поточного оновлення (передається обробникам як user_context)"""
+    user_id: int
+    telegram_id: int
+    first_name: str = ""
+    username: Optional[str] = None
+    is_new: bool = False  # зареєстрований під час цього оновлення
+
+class UserDirectory:
+    """
+    Внутрішні user_id за telegram_id.
+
+    user_id користувача не змінюється, тому кешуються лише знайдені
+    відповідності, без часу життя; невідомі користувачі не кешуються, щоб
+    реєстрація з іншого місця була видна одразу.
+    """
+
+    def __init__(self, max_size: int = 50000):
+        self.max_size = max_size
+        self._cache: "OrderedDict[int, int]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "registrations": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    async def resolve(self, telegram_id: int) -> Optional[int]:
+        """user_id зареєстрованого користувача або None"""
+
+        user_id = self._cache.get(telegram_id)
+        if user_id is not None:
+            self._cache.move_to_end(telegram_id)
+            self.stats["hits"] += 1
+            return user_id
+
+        self.stats["misses"] += 1
+
+        async with db_pool.read() as db:
+            cursor = await db.execute("SELECT user_id FROM users WHERE telegram_id = ?", (telegram_id,))
+            row = await cursor.fetchone()
+
+        if row is None:
+            return None
+
+        self._remember(telegram_id, row[0])
+        return row[0]
+
+    async def ensure(self, telegram_id: int, username: Optional[str], first_name: str) -> Tuple[int, bool]:
+        """
+        user_id користувача з реєстрацією невідомого.
+
+        Повертає (user_id, чи зареєстровано зараз).
+        """
+
+        user_id = await self.resolve(telegram_id)
+        if user_id is not None:
+            return user_id, False
+
+        async with db_pool.write() as db:
+            cursor = await db.execute("""
+                INSERT OR IGNORE INTO users (telegram_id, username, first_name)
+                VALUES (?, ?, ?)
+            """, (telegram_id, username, first_name))
+            created = cursor.rowcount == 1
+
+            if created:
+                user_id = cursor.lastrowid
+            else:
+                # Паралельне оновлення того ж користувача встигло зареєструвати його
+                cursor = await db.execute("SELECT user_id FROM users WHERE telegram_id = ?", (telegram_id,))
+                user_id = (await cursor.fetchone())[0]
+            await db.commit()
+
+        if created:
+            self.stats["registrations"] += 1
+            logger.info(f"👤 Зареєстровано користувача {username} ({telegram_id}) з user_id {user_id}")
+
+        self._remember(telegram_id, user_id)
+        return user_id, created
+
+    async def context(self, user) -> UserContext:
+        """Контекст для користувача Telegram (aiogram User) з лінивою реєстрацією"""
+
+        user_id, created = await self.ensure(user.id, user.username, user.first_name)
+        return UserContext(
+            user_id=user_id,
+            telegram_id=user.id,
+            first_name=user.first_name,
+            username=user.username,
+            is_new=created
+        )
+
+    def _remember(self, telegram_id: int, user_id: int):
+        self._cache[telegram_id] = user_id
+        self._cache.move_to_end(telegram_id)
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+            self.stats["evictions"] += 1
+
+user_directory = UserDirectory(max_size=config.USER_DIRECTORY_CACHE_SIZE)
+
+metrics.register_stats(
+    "user_directory_total", "Влучання, промахи, реєстрації та витіснення кешу user_id", lambda: user_directory.stats
+)
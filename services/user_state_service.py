@@ -0,0 +1,150 @@
+"""
+Поточний стан користувачів: обмежений LRU кеш поверх таблиці user_state
+"""
+
+import aiosqlite
+from collections import OrderedDict
+from typing import Dict, List
+from config import config
+from database.database import db_pool
+from database.models import UserState
+from utils.logger import setup_logger
+from utils.metrics import metrics
+from utils.timestamps import now_ms
+
+logger = setup_logger()
+
+class UserStateStore:
+    """
+    Стан користувачів у пам'яті з лінивим завантаженням після рестарту.
+
+    Стан із записом, що ще чекає в черзі пакетного писача, закріплений
+    (pin) і не витісняється: інакше наступне читання взяло б з БД старіший
+    рядок, і відстань та бали користувача пішли б назад.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._cache: "OrderedDict[int, UserState]" = OrderedDict()
+        # user_id -> кількість незаписаних знімків у черзі писача
+        self._pins: Dict[int, int] = {}
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._cache
+
+    async def get(self, user_id: int) -> UserState:
+        """Стан користувача з кешу або з таблиці user_state"""
+
+        state = self._cache.get(user_id)
+        if state is not None:
+            self._cache.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return state
+
+        self.stats["misses"] += 1
+
+        async with db_pool.read() as db:
+            cursor = await db.execute("""
+                SELECT last_latitude, last_longitude, last_timestamp,
+                       total_distance, total_steps, points
+                FROM user_state
+                WHERE user_id = ?
+            """, (user_id,))
+            row = await cursor.fetchone()
+
+        # Поки читали, стан міг завантажити інший обробник
+        cached = self._cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        if row:
+            state = UserState(
+                user_id=user_id,
+                last_latitude=row[0],
+                last_longitude=row[1],
+                last_timestamp=row[2],
+                total_distance=row[3] or 0.0,
+                total_steps=row[4] or 0,
+                points=row[5] or 0
+            )
+        else:
+            state = UserState(user_id=user_id)
+
+        # Місце звільняється до вставки: інакше, коли решта станів закріплені,
+        # витісненим виявився б щойно завантажений стан, який отримає викликач
+        if len(self._cache) >= self.max_size:
+            self._evict()
+        self._cache[user_id] = state
+
+        return state
+
+    def _evict(self):
+        """Витіснення найдавнішого незакріпленого стану"""
+
+        # Закріплені стани переносяться в кінець, тож кожен пропускається
+        # щонайбільше раз; якщо закріплені всі, кеш тимчасово більший за max_size
+        for _ in range(len(self._cache)):
+            user_id = next(iter(self._cache))
+            if user_id in self._pins:
+                self._cache.move_to_end(user_id)
+                continue
+
+            del self._cache[user_id]
+            self.stats["evictions"] += 1
+            return
+
+    def pin(self, user_id: int):
+        """Знімок стану поставлено в чергу запису"""
+        self._pins[user_id] = self._pins.get(user_id, 0) + 1
+
+    def unpin(self, user_id: int):
+        """Знімок стану записано (або відкинуто)"""
+
+        count = self._pins.get(user_id, 0) - 1
+        if count > 0:
+            self._pins[user_id] = count
+        else:
+            self._pins.pop(user_id, None)
+
+    async def save(self, state: UserState, db: aiosqlite.Connection):
+        """Запис стану в межах транзакції викликача (commit робить викликач)"""
+        await self.save_many([state], db)
+
+    async def save_many(self, states: List[UserState], db: aiosqlite.Connection):
+        """Пакетний запис станів в межах транзакції викликача"""
+
+        updated_at = now_ms()
+        await db.executemany("""
+            INSERT INTO user_state
+                (user_id, last_latitude, last_longitude, last_timestamp,
+                 total_distance, total_steps, points, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                last_latitude = excluded.last_latitude,
+                last_longitude = excluded.last_longitude,
+                last_timestamp = excluded.last_timestamp,
+                total_distance = excluded.total_distance,
+                total_steps = excluded.total_steps,
+                points = excluded.points,
+                updated_at = excluded.updated_at
+        """, [
+            (
+                state.user_id, state.last_latitude, state.last_longitude, state.last_timestamp,
+                state.total_distance, state.total_steps, state.points, updated_at
+            )
+            for state in states
+        ])
+
+    def invalidate(self, user_id: int):
+        """Видалення стану з кешу (наступне читання завантажить його з БД)"""
+        self._cache.pop(user_id, None)
+
+user_state_store = UserStateStore(max_size=config.USER_STATE_CACHE_SIZE)
+
+metrics.register_stats(
+    "user_state_cache_total", "Влучання, промахи та витіснення кешу стану користувачів", lambda: user_state_store.stats
+)
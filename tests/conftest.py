@@ -0,0 +1,41 @@
+"""
+Спільні налаштування тестів
+
+config читає оточення під час імпорту, тому тимчасова БД та токен
+задаються тут, до імпорту модулів бота.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_workdir = tempfile.mkdtemp(prefix="fitness_bot_tests_")
+os.environ["DATABASE_PATH"] = os.path.join(_workdir, "tests.db")
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """Один цикл подій на сесію: синглтони сервісів (черги, пул БД) прив'язуються до нього"""
+
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+@pytest.fixture
+async def db():
+    """Пул БД на тимчасовому файлі з застосованими міграціями"""
+
+    from database.database import close_db, db_pool, init_db
+    from services.ingestion_service import gps_ingestion
+
+    await init_db()
+    yield db_pool
+    await gps_ingestion.stop()
+    await close_db()
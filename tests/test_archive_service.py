@@ -0,0 +1,121 @@
+"""
+Стисле кодування архіву треків та єдиний потік архівних і гарячих точок
+"""
+
+import math
+import pathlib
+import random
+import sqlite3
+
+from database.models import GpsTrack
+from services import archive_service
+from services.archive_service import TrackArchiveService, decode_track_points, encode_track_points
+
+MIGRATIONS = pathlib.Path(__file__).resolve().parent.parent / "database" / "migrations"
+DAY_MS = 86_400_000
+START = 1_700_000_000_000  # 2023-11-14 22:13 UTC
+
+def _walk(user_id: int, count: int, start: int = START, interval_ms: int = 5000, seed: int = 1):
+    """Прогулянка з кроком ~7 м кожні interval_ms"""
+
+    rng = random.Random(seed)
+    lat, lon, heading = 50.45, 30.52, 0.0
+    points = []
+    for i in range(count):
+        heading += rng.uniform(-0.3, 0.3)
+        lat += 0.00006 * math.cos(heading)
+        lon += 0.00009 * math.sin(heading)
+        points.append(GpsTrack(
+            user_id=user_id,
+            competition_id=7 if i % 100 < 50 else None,
+            latitude=round(lat, 7),
+            longitude=round(lon, 7),
+            timestamp=start + i * interval_ms + rng.randint(0, 999),
+            distance_km=round(rng.uniform(0.005, 0.009), 6),
+            speed_kmh=round(rng.uniform(4.0, 6.5), 2),
+            is_valid=i % 37 != 0
+        ))
+    return points
+
+def test_round_trip_keeps_precision():
+    points = _walk(1, 2000)
+    decoded = decode_track_points(encode_track_points(points), 1)
+
+    assert len(decoded) == len(points)
+    for original, restored in zip(points, decoded):
+        assert restored.timestamp == original.timestamp
+        assert abs(restored.latitude - original.latitude) < 1e-9
+        assert abs(restored.longitude - original.longitude) < 1e-9
+        assert abs(restored.speed_kmh - original.speed_kmh) < 1e-9
+        assert abs(restored.distance_km - original.distance_km) < 1e-9
+        assert restored.competition_id == original.competition_id
+        assert restored.is_valid == original.is_valid
+
+def _table_bytes(fill) -> int:
+    """Приріст розміру БД (зі схемою з міграцій та індексами) після fill(db)"""
+
+    db = sqlite3.connect(":memory:")
+    for migration in sorted(MIGRATIONS.glob("*.sql")):
+        db.executescript(migration.read_text(encoding="utf-8"))
+    empty = db.execute("PRAGMA page_count").fetchone()[0]
+
+    fill(db)
+    db.commit()
+    db.execute("VACUUM")
+    pages = db.execute("PRAGMA page_count").fetchone()[0] - empty
+    return pages * db.execute("PRAGMA page_size").fetchone()[0]
+
+def test_archive_is_ten_times_smaller_on_disk():
+    days = [_walk(1, 4000, start=START + day * DAY_MS, seed=day) for day in range(10)]
+
+    hot = _table_bytes(lambda db: db.executemany("""
+        INSERT INTO gps_tracks
+            (user_id, competition_id, latitude, longitude, timestamp, distance_km, speed_kmh, is_valid)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (p.user_id, p.competition_id, p.latitude, p.longitude, p.timestamp, p.distance_km, p.speed_kmh, p.is_valid)
+        for points in days for p in points
+    ]))
+    archived = _table_bytes(lambda db: db.executemany("""
+        INSERT INTO track_archive
+            (user_id, day, point_count, first_timestamp, last_timestamp, distance_km, payload)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (1, f"2023-11-{15 + i}", len(points), points[0].timestamp, points[-1].timestamp, 0.0, encode_track_points(points))
+        for i, points in enumerate(days)
+    ]))
+
+    assert archived * 10 <= hot
+
+async def test_archived_and_hot_points_form_one_stream(db, monkeypatch):
+    monkeypatch.setattr(archive_service, "HOT_PAGE_SIZE", 50)
+    monkeypatch.setattr(archive_service, "ARCHIVE_PAGE_DAYS", 1)
+
+    # Три дні історії з кроком у годину та свіжі точки
+    old = _walk(501, 72, start=START, interval_ms=3_600_000, seed=2)
+    hot = _walk(501, 120, start=START + 40 * DAY_MS, seed=3)
+    async with db.write() as conn:
+        await conn.execute("INSERT INTO users (user_id, telegram_id, first_name) VALUES (501, 501, 'A')")
+        await conn.executemany("""
+            INSERT INTO gps_tracks
+                (user_id, competition_id, latitude, longitude, timestamp, distance_km, speed_kmh, is_valid)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (p.user_id, p.competition_id, p.latitude, p.longitude, p.timestamp, p.distance_km, p.speed_kmh, p.is_valid)
+            for p in old + hot
+        ])
+        await conn.commit()
+
+    service = TrackArchiveService(archive_after_days=30)
+    assert await service.archive_cold_tracks(now=START + 41 * DAY_MS) == len(old)
+
+    async with db.read() as conn:
+        cursor = await conn.execute("SELECT COUNT(*), SUM(point_count) FROM track_archive WHERE user_id = 501")
+        days, archived = await cursor.fetchone()
+    assert days >= 3 and archived == len(old)
+
+    streamed = [p async for p in service.iter_user_points(501)]
+    assert [p.timestamp for p in streamed] == [p.timestamp for p in old + hot]
+
+    window = [p async for p in service.iter_user_points(501, start=old[30].timestamp, end=hot[60].timestamp)]
+    assert [p.timestamp for p in window] == [p.timestamp for p in old[30:] + hot[:61]]
@@ -0,0 +1,75 @@
+"""
+Перевірка підпису initData Telegram Mini App
+"""
+
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import urlencode
+
+import pytest
+from fastapi import HTTPException
+
+from api.auth import InitDataError, current_user, verify_init_data
+from config import config
+
+TOKEN = "123456:TEST"
+NOW = 1_700_000_000
+
+def _sign(fields: dict, token: str = TOKEN) -> str:
+    """initData, підписаний так само, як це робить Telegram"""
+
+    data_check_string = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", token.encode(), hashlib.sha256).digest()
+    signature = hmac.new(secret, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode({**fields, "hash": signature})
+
+def _fields(auth_date: int = NOW, **user) -> dict:
+    return {
+        "query_id": "AAF",
+        "auth_date": str(auth_date),
+        "user": json.dumps({"id": 42, "first_name": "Оля", "username": "olya", **user}, ensure_ascii=False)
+    }
+
+def test_valid_init_data():
+    user = verify_init_data(_sign(_fields()), TOKEN, now=NOW + 60)
+
+    assert (user.telegram_id, user.username, user.first_name, user.auth_date) == (42, "olya", "Оля", NOW)
+
+@pytest.mark.parametrize("init_data", [
+    # Підпис іншим токеном
+    _sign(_fields(), token="654321:OTHER"),
+    # Змінене поле після підпису
+    _sign(_fields()).replace("auth_date=1700000000", "auth_date=1700000001"),
+    # Підроблений hash
+    urlencode({**_fields(), "hash": "0" * 64}),
+    # Без hash та нерозбірний рядок
+    urlencode(_fields()),
+    "hash",
+])
+def test_bad_signature_is_rejected(init_data):
+    with pytest.raises(InitDataError):
+        verify_init_data(init_data, TOKEN, now=NOW)
+
+def test_expired_auth_date_is_rejected():
+    init_data = _sign(_fields())
+
+    verify_init_data(init_data, TOKEN, max_age_seconds=3600, now=NOW + 3600)
+    with pytest.raises(InitDataError, match="прострочено"):
+        verify_init_data(init_data, TOKEN, max_age_seconds=3600, now=NOW + 3601)
+    # 0 - без обмеження віку
+    verify_init_data(init_data, TOKEN, max_age_seconds=0, now=NOW + 10 ** 6)
+
+def test_signed_data_without_user_is_rejected():
+    with pytest.raises(InitDataError):
+        verify_init_data(_sign({"auth_date": str(NOW)}), TOKEN, now=NOW)
+
+async def test_current_user_requires_tma_scheme():
+    init_data = _sign(_fields(auth_date=int(time.time())), token=config.BOT_TOKEN)
+
+    assert (await current_user(f"tma {init_data}")).telegram_id == 42
+    for header in ("", f"Bearer {init_data}", "tma ", f"tma {_sign(_fields(), token='654321:OTHER')}"):
+        with pytest.raises(HTTPException) as error:
+            await current_user(header)
+        assert error.value.status_code == 401
@@ -0,0 +1,49 @@
+"""
+Контроль регресій мікробенчмарків відносно базового файлу
+
+За замовчуванням не запускаються (маркер benchmark):
+    pytest -m benchmark
+
+Кожна група - окремий процес benchmarks.py з власною тимчасовою БД.
+Базовий файл залежить від машини: після зміни середовища його перезаписують
+    python benchmarks.py --quick --save benchmarks_baseline.json
+"""
+
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+BASELINE = pathlib.Path(os.getenv("BENCHMARK_BASELINE", ROOT / "benchmarks_baseline.json"))
+# Запас ширший, ніж у CLI: операції в сотні наносекунд між запусками коливаються на ±25%
+THRESHOLD = os.getenv("BENCHMARK_THRESHOLD", "50")
+
+pytestmark = pytest.mark.benchmark
+
+@pytest.mark.parametrize("group", [
+    "gps.",
+    "route_index.distance_km[",
+    # Точка всередині петлі: найгірший випадок пошуку в сітці маршруту
+    "route_index.distance_km.loop_center",
+    "ranking.",
+    "competition.",
+])
+def test_no_regression(group):
+    if not BASELINE.exists():
+        pytest.skip(f"немає базового файлу {BASELINE}")
+
+    result = subprocess.run(
+        [
+            sys.executable, "benchmarks.py", "--quick",
+            "--compare", str(BASELINE), "--threshold", THRESHOLD, "--filter", group
+        ],
+        cwd=ROOT, capture_output=True, text=True, timeout=600
+    )
+    output = result.stdout + result.stderr
+
+    assert result.returncode == 0, output
+    # Бенчмарк без базового значення нічого не перевіряє
+    assert "нове" not in output, output
@@ -0,0 +1,108 @@
+"""
+Планувальник завершення змагань
+"""
+
+import asyncio
+
+from services.competition_scheduler import CompetitionScheduler
+from utils.timestamps import now_ms
+
+# Ідентифікатори поза тими, що створюють інші тести
+BASE_ID = 10_000
+
+class _Recorder:
+    """Завершення змагань з журналом викликів та керованими збоями"""
+
+    def __init__(self, failures: int = 0):
+        self.ended = []
+        self.calls = []
+        self.failures = failures
+
+    async def __call__(self, competition_id: int):
+        if competition_id < BASE_ID:
+            return
+        self.calls.append(competition_id)
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("БД недоступна")
+        self.ended.append(competition_id)
+
+async def _wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.005)
+
+async def test_competitions_end_in_deadline_order(db):
+    recorder = _Recorder()
+    scheduler = CompetitionScheduler(recorder)
+    await scheduler.start()
+
+    now = now_ms()
+    for offset, competition_id in ((80, BASE_ID + 1), (20, BASE_ID + 2), (50, BASE_ID + 3)):
+        scheduler.schedule(competition_id, now + offset)
+
+    await _wait_for(lambda: len(recorder.ended) == 3)
+    await scheduler.stop()
+
+    assert recorder.ended == [BASE_ID + 2, BASE_ID + 3, BASE_ID + 1]
+
+async def test_cancel_and_reschedule(db):
+    recorder = _Recorder()
+    scheduler = CompetitionScheduler(recorder)
+    await scheduler.start()
+
+    now = now_ms()
+    scheduler.schedule(BASE_ID + 11, now + 30)
+    scheduler.schedule(BASE_ID + 12, now + 40)
+    scheduler.schedule(BASE_ID + 13, now + 10_000)
+    scheduler.cancel(BASE_ID + 11)
+    # Перенесення на раніше будить таймер, на пізніше - відкладає завершення
+    scheduler.schedule(BASE_ID + 13, now + 20)
+    scheduler.schedule(BASE_ID + 12, now + 60_000)
+
+    await _wait_for(lambda: recorder.ended)
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    assert recorder.ended == [BASE_ID + 13]
+    assert BASE_ID + 12 in scheduler._deadlines and BASE_ID + 11 not in scheduler._deadlines
+
+async def test_failed_end_is_retried_with_backoff(db):
+    recorder = _Recorder(failures=2)
+    scheduler = CompetitionScheduler(recorder, retry_delay=0.02, max_retry_delay=0.03)
+    await scheduler.start()
+
+    scheduler.schedule(BASE_ID + 21, now_ms())
+    await _wait_for(lambda: recorder.ended)
+    await scheduler.stop()
+
+    assert recorder.calls == [BASE_ID + 21] * 3
+    assert recorder.ended == [BASE_ID + 21]
+    assert not scheduler._failures
+
+async def test_stop_waits_for_end_in_progress(db):
+    started = asyncio.Event()
+    release = asyncio.Event()
+    finished = []
+
+    async def slow_end(competition_id: int):
+        if competition_id < BASE_ID:
+            return
+        started.set()
+        await release.wait()
+        finished.append(competition_id)
+
+    scheduler = CompetitionScheduler(slow_end)
+    await scheduler.start()
+    scheduler.schedule(BASE_ID + 31, now_ms())
+    await started.wait()
+
+    stopping = asyncio.create_task(scheduler.stop())
+    await asyncio.sleep(0.02)
+    assert not stopping.done()
+
+    release.set()
+    await stopping
+    assert finished == [BASE_ID + 31]
+    assert not scheduler.is_running
@@ -0,0 +1,95 @@
+"""
+Векторні ядра треку проти скалярного гаверсинуса
+"""
+
+import math
+import random
+
+import numpy as np
+
+from database.models import GpsTrack, UserState
+from reprocess import recompute_user
+from services.gps_service import GpsService
+from services.location_pipeline import LocationResult, location_pipeline
+from utils import geo
+
+TOLERANCE_KM = 1e-9
+
+def _track(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    lat, lon, timestamp = 50.45, 30.52, 0
+    points = []
+    for _ in range(count):
+        lat += rng.uniform(-0.002, 0.002)
+        lon += rng.uniform(-0.002, 0.002)
+        # Повтори та нульові інтервали часу, щоб перевірити dt <= 0
+        timestamp += rng.choice((0, 5000, 30000, 60000))
+        points.append((lat, lon, timestamp))
+    return points
+
+def test_segments_and_cumulative_match_scalar():
+    points = _track(500)
+    lats, lons, _ = map(np.array, zip(*points))
+
+    expected = [geo.haversine_km(*points[i][:2], *points[i + 1][:2]) for i in range(len(points) - 1)]
+    assert np.allclose(geo.segment_lengths(lats, lons), expected, rtol=0, atol=TOLERANCE_KM)
+    assert np.allclose(
+        geo.cumulative_distance(lats, lons), np.concatenate(([0.0], np.cumsum(expected))), rtol=0, atol=1e-6
+    )
+    assert geo.segment_lengths(lats[:1], lons[:1]).size == 0
+    assert geo.cumulative_distance([], []).size == 0
+
+def test_speed_series_matches_scalar():
+    points = _track(500)
+    lats, lons, timestamps = map(np.array, zip(*points))
+    speeds = geo.speed_series(lats, lons, timestamps)
+
+    assert speeds[0] == 0.0
+    for i in range(1, len(points)):
+        hours = (points[i][2] - points[i - 1][2]) / 3_600_000
+        expected = min(geo.haversine_km(*points[i - 1][:2], *points[i][:2]) / hours, 100.0) if hours > 0 else 0.0
+        assert math.isclose(speeds[i], expected, rel_tol=0, abs_tol=1e-6)
+
+def test_bearings():
+    # Північ, схід, південь, захід
+    bearings = geo.bearings_deg([50.0] * 4, [30.0] * 4, [50.1, 50.0, 49.9, 50.0], [30.0, 30.1, 30.0, 29.9])
+    assert np.allclose(bearings, [0.0, 90.0, 180.0, 270.0], atol=0.1)
+    assert ((bearings >= 0) & (bearings < 360)).all()
+
+def test_track_distance_skips_invalid_points():
+    gps = GpsService()
+    points = [GpsTrack(user_id=1, latitude=lat, longitude=lon, timestamp=ts) for lat, lon, ts in _track(50)]
+    points[10].is_valid = False
+
+    valid = [p for p in points if p.is_valid]
+    expected = sum(
+        geo.haversine_km(a.latitude, a.longitude, b.latitude, b.longitude) for a, b in zip(valid, valid[1:])
+    )
+    assert math.isclose(gps.track_distance(points), expected, rel_tol=0, abs_tol=1e-6)
+    assert gps.track_distance(points[:1]) == 0.0
+    assert len(gps.track_speeds(points)) == len(points)
+
+def test_recompute_matches_per_point_pipeline():
+    rows = [(i, lat, lon, ts) for i, (lat, lon, ts) in enumerate(_track(2000, seed=9))]
+    # Точка з некоректною широтою не зсуває опорну точку
+    rows[100] = (100, 95.0, rows[100][2], rows[100][3])
+
+    result = recompute_user(7, rows, joins=[])
+
+    state = UserState(user_id=7)
+    expected = []
+    for track_id, lat, lon, ts in rows:
+        location = GpsTrack(user_id=7, latitude=lat, longitude=lon, timestamp=ts)
+        delta = LocationResult(user_id=7, timestamp=ts)
+        is_valid = location_pipeline.validate(location)
+        if is_valid:
+            location_pipeline.compute_delta(state, location, delta)
+        expected.append((delta.distance_km, delta.speed_kmh, int(is_valid), track_id))
+
+    assert len(result.point_updates) == len(expected)
+    for got, want in zip(result.point_updates, expected):
+        assert got[2:] == want[2:]
+        assert math.isclose(got[0], want[0], rel_tol=0, abs_tol=TOLERANCE_KM)
+        assert math.isclose(got[1], want[1], rel_tol=0, abs_tol=1e-6)
+    assert math.isclose(result.state.total_distance, state.total_distance, rel_tol=0, abs_tol=1e-6)
+    assert result.state.points == state.points
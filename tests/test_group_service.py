@@ -0,0 +1,103 @@
+"""
+Групові рейтинги та реєстрація учасників груп
+"""
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Update
+
+from bot.middlewares.auth import AuthMiddleware
+from bot.middlewares.groups import GroupMembershipMiddleware
+from services.group_service import GroupService, group_service
+from services.user_directory import user_directory
+
+def _group_message(update_id: int, telegram_id: int, chat_id: int = -1001, chat_type: str = "supergroup") -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": chat_type, "title": "Бігуни"},
+            "from": {"id": telegram_id, "is_bot": False, "first_name": "Учасник"},
+            "text": "привіт"
+        }
+    })
+
+@pytest.fixture
+async def bot():
+    bot = Bot(token="123456:TEST")
+    yield bot
+    await bot.session.close()
+
+async def _credit(db, credits):
+    async with db.write() as conn:
+        touched = await group_service.credit_points(conn, credits)
+        await conn.commit()
+    return touched
+
+async def test_group_rank_level_follows_group_points(db):
+    async with db.write() as conn:
+        await conn.execute("INSERT INTO users (user_id, telegram_id, first_name) VALUES (901, 901, 'A')")
+        await conn.commit()
+    group_id = await group_service.ensure_group(-901, "Група")
+    await group_service.ensure_member(group_id, 901)
+
+    # Рівень рядка групи - за його власними балами, незалежно від глобальних
+    assert await _credit(db, [(901, group_id, 300)]) == [group_id]
+    assert await _credit(db, [(901, group_id, 250), (901, group_id, 0)]) == [group_id]
+
+    async with db.read() as conn:
+        cursor = await conn.execute(
+            "SELECT points, rank_level FROM rankings WHERE group_id = ? AND user_id = 901", (group_id,)
+        )
+        assert tuple(await cursor.fetchone()) == (550, "silver")
+
+    await _credit(db, [(901, group_id, 5000)])
+    async with db.read() as conn:
+        cursor = await conn.execute(
+            "SELECT rank_level FROM rankings WHERE group_id = ? AND user_id = 901", (group_id,)
+        )
+        assert (await cursor.fetchone())[0] == "diamond"
+
+async def test_caches_are_bounded(db):
+    groups = GroupService(max_groups=2, max_members=2)
+
+    group_ids = [await groups.ensure_group(-950 - i, f"G{i}") for i in range(4)]
+    for user_id in range(950, 954):
+        await groups.groups_of(user_id)
+
+    assert len(groups._group_ids) == 2 and len(groups._memberships) == 2
+    # Витіснена відповідність перечитується з БД
+    assert await groups.ensure_group(-950, "G0") == group_ids[0]
+
+async def test_every_group_message_registers_membership(db, bot):
+    dp = Dispatcher()
+    dp.include_router(Router())  # жоден обробник не приймає повідомлення
+    dp.message.middleware(AuthMiddleware())
+    dp.message.outer_middleware(GroupMembershipMiddleware())
+
+    await dp.feed_update(bot, _group_message(1, 960001))
+    await dp.feed_update(bot, _group_message(2, 960002, chat_id=960002, chat_type="private"))
+
+    member = await user_directory.resolve(960001)
+    group_id = await group_service.ensure_group(-1001, "Бігуни")
+    assert group_id in await group_service.groups_of(member)
+    assert await group_service.groups_of(await user_directory.resolve(960002)) == ()
+
+async def test_handlers_get_group_context(db, bot):
+    router = Router()
+    seen = {}
+
+    @router.message()
+    async def handler(message, user_context, group_id):
+        seen.update(user_id=user_context.user_id, group_id=group_id)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    dp.message.middleware(AuthMiddleware())
+    dp.message.outer_middleware(GroupMembershipMiddleware())
+
+    await dp.feed_update(bot, _group_message(3, 960003, chat_id=-1002))
+
+    assert seen["user_id"] == await user_directory.resolve(960003)
+    assert seen["group_id"] == await group_service.ensure_group(-1002, "Бігуни")
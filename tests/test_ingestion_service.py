@@ -0,0 +1,46 @@
+"""
+Пакетний писач GPS точок
+"""
+
+import pytest
+
+from database.models import GpsTrack
+from services.ingestion_service import GpsIngestionQueue
+from services.leaderboard import leaderboard
+from services.ranking_cache import ranking_cache
+from services.user_state_service import user_state_store
+
+def _point(user_id: int) -> GpsTrack:
+    return GpsTrack(user_id=user_id, latitude=50.45, longitude=30.52, timestamp=1)
+
+async def test_points_without_state_are_rejected():
+    queue = GpsIngestionQueue()
+
+    with pytest.raises(ValueError):
+        await queue.submit(_point(1), None, points_earned=5, group_ids=(1,))
+    with pytest.raises(ValueError):
+        await queue.submit(None)
+    assert queue.stats["submitted"] == 0
+
+async def test_leaderboard_follows_committed_points(db):
+    """Таблиця лідерів і кеш відповідей оновлюються після запису пакета, а не раніше"""
+
+    async with db.write() as conn:
+        await conn.execute("INSERT INTO users (user_id, telegram_id, first_name) VALUES (701, 701, 'A')")
+        await conn.commit()
+
+    queue = GpsIngestionQueue(flush_interval=0.01)
+    ranking_cache.set_user_stats(701, "старий текст")
+    state = await user_state_store.get(701)
+    user_state_store.pin(701)
+    state.total_distance, state.points = 2.0, 20
+
+    await queue.submit(_point(701), state, "bronze", 20)
+    assert leaderboard.get(701) is None
+    await queue.stop()
+
+    assert leaderboard.get(701).points == 20
+    assert ranking_cache.get_user_stats(701) is None
+    async with db.read() as conn:
+        cursor = await conn.execute("SELECT points FROM rankings WHERE user_id = 701 AND group_id IS NULL")
+        assert (await cursor.fetchone())[0] == 20
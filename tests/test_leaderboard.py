@@ -0,0 +1,107 @@
+"""
+Таблиця лідерів на індексованому skip list
+"""
+
+import random
+
+import pytest
+
+from services.leaderboard import IndexableSkipList, Leaderboard
+
+def _expected_position(points: dict, user_id: int) -> int:
+    return 1 + sum(1 for other in points.values() if other > points[user_id])
+
+def test_skip_list_matches_sorted_list():
+    rng = random.Random(3)
+    skip_list = IndexableSkipList()
+    reference = []
+
+    for _ in range(2000):
+        key = (rng.randint(0, 300), rng.randint(0, 10 ** 6))
+        if reference and rng.random() < 0.3:
+            key = reference[rng.randrange(len(reference))]
+            skip_list.remove(key)
+            reference.remove(key)
+        elif key not in reference:
+            skip_list.insert(key)
+            reference.append(key)
+        reference.sort()
+
+        probe = (rng.randint(0, 300), rng.randint(0, 10 ** 6))
+        assert skip_list.count_less(probe) == sum(1 for item in reference if item < probe)
+
+    assert len(skip_list) == len(reference)
+    assert [skip_list[i] for i in range(len(reference))] == reference
+    assert skip_list.slice(10, 25) == reference[10:25]
+    assert skip_list.slice(-5, 3) == reference[:3]
+    with pytest.raises(IndexError):
+        skip_list[len(reference)]
+    with pytest.raises(KeyError):
+        skip_list.remove((-1, -1))
+
+def test_positions_follow_updates_with_ties():
+    rng = random.Random(11)
+    board = Leaderboard()
+    points = {}
+
+    for _ in range(3000):
+        user_id = rng.randint(1, 400)
+        if user_id in points and rng.random() < 0.1:
+            board.remove(user_id)
+            del points[user_id]
+            continue
+        # Малий діапазон балів - багато однакових значень
+        points[user_id] = rng.randint(0, 50)
+        board.update(user_id, points[user_id], "bronze")
+
+    assert len(board) == len(points)
+    for user_id in points:
+        assert board.rank_of(user_id) == _expected_position(points, user_id)
+        assert board.get(user_id).points == points[user_id]
+
+    top = board.top(10)
+    assert [entry.points for entry in top] == sorted(points.values(), reverse=True)[:10]
+    assert [entry.position for entry in top] == [_expected_position(points, entry.user_id) for entry in top]
+
+def test_around_returns_neighbours():
+    board = Leaderboard()
+    for user_id in range(1, 11):
+        board.update(user_id, user_id * 10, "bronze")
+
+    # Бали 50 - шосте місце; по двоє сусідів вище та нижче
+    assert [entry.user_id for entry in board.around(5)] == [7, 6, 5, 4, 3]
+    assert [entry.user_id for entry in board.around(10, radius=1)] == [10, 9]
+    assert board.around(99) == []
+    assert board.get(99) is None and board.rank_of(99) is None
+
+async def test_load_matches_sql_positions(db):
+    rng = random.Random(5)
+    user_ids = range(801, 861)
+
+    async with db.write() as conn:
+        await conn.executemany(
+            "INSERT INTO users (user_id, telegram_id, first_name) VALUES (?, ?, ?)",
+            [(user_id, user_id, f"U{user_id}") for user_id in user_ids]
+        )
+        await conn.executemany(
+            "INSERT INTO rankings (user_id, points, rank_level, updated_at) VALUES (?, ?, 'bronze', 0)",
+            [(user_id, rng.randint(0, 20)) for user_id in user_ids]
+        )
+        await conn.commit()
+
+    board = Leaderboard()
+    await board.load()
+
+    async with db.read() as conn:
+        cursor = await conn.execute("""
+            SELECT r1.user_id,
+                   (SELECT COUNT(*) + 1 FROM rankings r2
+                    WHERE r2.group_id IS NULL AND r2.points > r1.points)
+            FROM rankings r1
+            WHERE r1.group_id IS NULL
+        """)
+        expected = dict(await cursor.fetchall())
+
+    assert board.is_loaded
+    assert {user_id: board.rank_of(user_id) for user_id in expected} == expected
+    assert board.get(801).name == "U801"
@@ -0,0 +1,99 @@
+"""
+Приріст відстані, кроків і балів у конвеєрі локацій
+"""
+
+import asyncio
+
+from database.models import GpsTrack, UserState
+from services.ingestion_service import GpsIngestionQueue
+from services.location_pipeline import STEPS_PER_KM, LocationPipeline, LocationResult, location_pipeline
+from services.track_simplifier import TrackSimplifier
+from services.user_state_service import UserStateStore
+
+STEP_DEGREES = 0.0005  # ~55 м по широті
+
+def _walk(state: UserState, steps: int, start: int = 0) -> int:
+    """Рух на північ рівними короткими відрізками раз на 30 с; повертає суму нарахованих балів"""
+
+    earned = 0
+    for i in range(start, start + steps):
+        location = GpsTrack(user_id=state.user_id, latitude=50.0 + i * STEP_DEGREES, longitude=30.0, timestamp=i * 30000)
+        result = LocationResult(user_id=state.user_id, timestamp=location.timestamp)
+        location_pipeline.compute_delta(state, location, result)
+        earned += result.points_earned
+    return earned
+
+def test_short_steps_accumulate_points():
+    state = UserState(user_id=1)
+    earned = _walk(state, 201)
+
+    assert 10.5 < state.total_distance < 11.5
+    assert state.points == earned == int(state.total_distance * 10)
+    assert state.total_steps == int(state.total_distance * STEPS_PER_KM)
+
+def test_points_continue_from_loaded_state():
+    state = UserState(user_id=2)
+    _walk(state, 100)
+    restored = UserState(
+        user_id=2,
+        last_latitude=state.last_latitude,
+        last_longitude=state.last_longitude,
+        last_timestamp=state.last_timestamp,
+        total_distance=state.total_distance,
+        total_steps=state.total_steps,
+        points=state.points
+    )
+
+    _walk(restored, 101, start=100)
+    assert restored.points == int(restored.total_distance * 10)
+
+async def test_state_stays_cached_while_write_waits_for_queue(db, monkeypatch):
+    """Витіснення під зворотним тиском черги не відкочує підсумки користувача"""
+
+    store = UserStateStore(max_size=1)
+    queue = GpsIngestionQueue(max_size=1, batch_size=1, flush_interval=0.01, state_store=store)
+    pipeline = LocationPipeline(
+        ingestion=queue, state_store=store, simplifier=TrackSimplifier(tolerance_m=0)
+    )
+
+    # Писач тримає перший пакет, доки тест не відпустить його
+    gate = asyncio.Event()
+    write = queue._write
+
+    async def gated_write(batch):
+        await gate.wait()
+        await write(batch)
+
+    monkeypatch.setattr(queue, "_write", gated_write)
+
+    async with db.write() as conn:
+        await conn.executemany(
+            "INSERT INTO users (user_id, telegram_id, first_name) VALUES (?, ?, 'A')",
+            [(user_id, user_id) for user_id in (601, 602, 603)]
+        )
+        await conn.commit()
+
+    def at(i: int) -> GpsTrack:
+        return GpsTrack(user_id=601, latitude=50.0 + i * 0.001, longitude=30.0, timestamp=i * 60000)
+
+    # Пакет 603 у писача та ще один у черзі: черга заповнена
+    await pipeline.process(603, at(0), at(0).timestamp)
+    await asyncio.sleep(0.05)
+    await pipeline.process(603, at(1), at(1).timestamp)
+
+    blocked = asyncio.create_task(pipeline.process(601, at(0), at(0).timestamp))
+    await asyncio.sleep(0.05)
+    assert not blocked.done()
+
+    # Звернення іншого користувача витісняє незакріплений стан
+    await store.get(602)
+    assert 601 in store
+
+    gate.set()
+    await blocked
+    result = await pipeline.process(601, at(1), at(1).timestamp)
+    await queue.stop()
+
+    assert result.distance_km > 0.1
+    assert (await store.get(601)).total_distance == result.distance_km
+    assert not store._pins
@@ -0,0 +1,76 @@
+"""
+Вибірка записів гарячого шляху (LogSampler)
+"""
+
+import pytest
+from loguru import logger
+
+from utils import logger as logger_module
+from utils.logger import LogSampler
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(logger_module.time, "monotonic", lambda: now[0])
+    return now
+
+@pytest.fixture
+def records():
+    messages = []
+    sink_id = logger.add(lambda message: messages.append(message.record), level="DEBUG")
+    yield messages
+    logger.remove(sink_id)
+
+def test_one_record_per_key_per_interval(clock, records):
+    sampler = LogSampler(interval=10)
+
+    for _ in range(3):
+        sampler.info(("location", 1), "точка {}", 1)
+    sampler.info(("location", 2), "точка {}", 2)
+
+    assert [record["message"] for record in records] == ["точка 1", "точка 2"]
+    assert sampler.stats == {"emitted": 2, "suppressed": 2}
+
+def test_suppressed_count_is_added_to_next_record(clock, records):
+    sampler = LogSampler(interval=2.5)
+
+    sampler.debug("key", "перший")
+    sampler.debug("key", "пропущений")
+    sampler.debug("key", "пропущений")
+    clock[0] += 2.5
+    sampler.debug("key", "наступний {}", "запис")
+    clock[0] += 2.5
+    sampler.debug("key", "без пропусків")
+
+    assert [record["message"] for record in records] == [
+        "перший",
+        "наступний запис (ще 2 за 2.5 с)",
+        "без пропусків",
+    ]
+
+def test_zero_interval_disables_sampling(clock, records):
+    sampler = LogSampler(interval=0)
+
+    for _ in range(3):
+        sampler.warning("key", "запис")
+
+    assert len(records) == 3
+    assert sampler.stats == {"emitted": 3, "suppressed": 0}
+
+def test_keys_are_bounded(clock, records):
+    sampler = LogSampler(interval=10, max_keys=2)
+
+    for key in ("a", "b", "c"):
+        sampler.info(key, key)
+    # "a" витіснено найдавнішим - наступний запис не пропускається
+    sampler.info("a", "a")
+    sampler.info("c", "c")
+
+    assert [record["message"] for record in records] == ["a", "b", "c", "a"]
+    assert len(sampler._keys) == 2
+
+def test_record_points_at_caller(clock, records):
+    LogSampler(interval=10).log("INFO", "key", "запис")
+
+    assert records[0]["function"] == "test_record_points_at_caller"
+    assert records[0]["level"].name == "INFO"
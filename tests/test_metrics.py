@@ -0,0 +1,99 @@
+"""
+Текстовий формат Prometheus реєстру метрик
+"""
+
+import re
+
+import pytest
+
+from utils.metrics import CONTENT_TYPE, MetricsRegistry, MetricsServer
+
+# Рядок семплу: назва, необов'язкові мітки, значення
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*"(,[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*")*\})? \S+$')
+
+def _lines(registry: MetricsRegistry):
+    return registry.render().splitlines()
+
+def test_every_line_follows_exposition_format():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Запити", ("method",)).inc("GET")
+    registry.gauge("in_flight", "Поточні").set(3)
+    registry.histogram("latency_seconds", "Тривалість", ("handler",), buckets=(0.1, 1.0)).observe(0.5, "start")
+    registry.register_stats("cache_total", "Кеш", lambda: {"hits": 2, "misses": 1})
+
+    text = registry.render()
+    assert text.endswith("\n")
+
+    names = set()
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            names.add(line.split()[2])
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            # TYPE іде одразу після HELP тієї ж метрики
+            assert name in names and kind in {"counter", "gauge", "histogram"}
+        else:
+            assert SAMPLE_LINE.match(line), line
+    assert names == {"requests_total", "in_flight", "latency_seconds", "cache_total"}
+
+def test_counter_and_gauge_values():
+    registry = MetricsRegistry()
+    counter = registry.counter("points_total", "Точки", ("status",))
+    counter.inc("accepted")
+    counter.inc("accepted", amount=2)
+    counter.inc("invalid", amount=0.5)
+    gauge = registry.gauge("queue_size", "Черга")
+    gauge.inc(amount=5)
+    gauge.dec(amount=2)
+
+    lines = _lines(registry)
+    assert 'points_total{status="accepted"} 3' in lines
+    assert 'points_total{status="invalid"} 0.5' in lines
+    assert "queue_size 3" in lines
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("duration_seconds", "Тривалість", buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    lines = _lines(registry)
+    assert lines[2:] == [
+        'duration_seconds_bucket{le="0.1"} 2',
+        'duration_seconds_bucket{le="1"} 3',
+        'duration_seconds_bucket{le="+Inf"} 4',
+        "duration_seconds_sum 2.65",
+        "duration_seconds_count 4",
+    ]
+    assert histogram.count() == 4
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Помилки", ("message",)).inc('a "b"\\c\nd')
+
+    assert 'errors_total{message="a \\"b\\"\\\\c\\nd"} 1' in _lines(registry)
+
+def test_wrong_label_count_is_rejected():
+    counter = MetricsRegistry().counter("x_total", "X", ("a", "b"))
+    with pytest.raises(ValueError):
+        counter.inc("only-one")
+
+def test_same_name_returns_existing_metric():
+    registry = MetricsRegistry()
+    assert registry.counter("x_total", "X") is registry.counter("x_total", "X")
+
+def test_failing_collector_does_not_break_scrape():
+    registry = MetricsRegistry()
+    registry.register_collector(lambda: 1 / 0)
+    registry.register_stats("ok_total", "Працює", lambda: {"event": 1})
+
+    assert 'ok_total{event="event"} 1' in _lines(registry)
+
+async def test_server_response_content_type():
+    registry = MetricsRegistry()
+    registry.gauge("up", "Працює").set(1)
+
+    response = await MetricsServer(registry).handle(None)
+
+    assert response.headers["Content-Type"] == CONTENT_TYPE
+    assert b"up 1" in response.body
@@ -0,0 +1,129 @@
+"""
+Автомат виходу за маршрут та журнал штрафів
+"""
+
+import pytest
+
+from services.penalty_service import OFF_ROUTE, SUSPECT, PenaltyService
+from services.standings_service import StandingsEngine
+
+USER_ID = 1101
+SECOND = 1000
+
+@pytest.fixture
+async def competition_id(db):
+    """Активне змагання з одним учасником"""
+
+    async with db.write() as conn:
+        await conn.execute(
+            "INSERT OR IGNORE INTO users (user_id, telegram_id, first_name) VALUES (?, ?, 'A')", (USER_ID, USER_ID)
+        )
+        cursor = await conn.execute("""
+            INSERT INTO competitions (group_id, comp_type, route_data, start_time, duration_minutes)
+            VALUES (NULL, 'endurance', '[]', 0, 60)
+        """)
+        await conn.execute(
+            "INSERT INTO competition_participants (competition_id, user_id, joined_at) VALUES (?, ?, 0)",
+            (cursor.lastrowid, USER_ID)
+        )
+        await conn.commit()
+    return cursor.lastrowid
+
+def _service(competition_id: int) -> PenaltyService:
+    engine = StandingsEngine(snapshot_interval=60)
+    engine.join(competition_id, "endurance", USER_ID)
+    service = PenaltyService(standings=engine)
+    # Пороги 50 м / 30 м та 15 с - незалежно від оточення
+    service.deviation_threshold, service.exit_threshold = 0.05, 0.03
+    service.min_duration_ms = 15 * SECOND
+    service.penalty_seconds = 5
+    return service
+
+async def _ledger(db, competition_id: int):
+    async with db.read() as conn:
+        cursor = await conn.execute(
+            "SELECT started_at, ended_at, max_deviation_m FROM penalties WHERE competition_id = ? ORDER BY started_at",
+            (competition_id,)
+        )
+        return [tuple(row) for row in await cursor.fetchall()]
+
+def _status(service: PenaltyService, competition_id: int):
+    state = service._states.get((competition_id, USER_ID))
+    return state.status if state else None
+
+async def test_hysteresis_thresholds(competition_id):
+    service = _service(competition_id)
+
+    # Рівно поріг входу - ще на маршруті
+    assert not service.observe(USER_ID, competition_id, 0.05, 0)
+    assert _status(service, competition_id) is None
+
+    assert not service.observe(USER_ID, competition_id, 0.06, 1 * SECOND)
+    assert _status(service, competition_id) == SUSPECT
+
+    # Між порогами виходу та входу стан не змінюється
+    assert not service.observe(USER_ID, competition_id, 0.04, 2 * SECOND)
+    assert _status(service, competition_id) == SUSPECT
+
+    # Повернення нижче порогу виходу до кінця витримки - без штрафу
+    assert not service.observe(USER_ID, competition_id, 0.03, 3 * SECOND)
+    assert _status(service, competition_id) is None
+    assert service.standings.get(competition_id).penalty_count == 0
+
+async def test_penalty_after_dwell_time_once_per_excursion(db, competition_id):
+    service = _service(competition_id)
+
+    assert not service.observe(USER_ID, competition_id, 0.08, 0)
+    assert not service.observe(USER_ID, competition_id, 0.08, 14 * SECOND)
+    assert service.observe(USER_ID, competition_id, 0.09, 15 * SECOND)
+    assert _status(service, competition_id) == OFF_ROUTE
+    assert not service.observe(USER_ID, competition_id, 0.12, 40 * SECOND)
+
+    standings = service.standings.get(competition_id)
+    assert standings.penalty_count == 1
+    assert standings.stats_of(USER_ID).penalty_seconds == 5
+
+    # Рядок журналу з'являється разом зі штрафом, ще відкритим
+    assert await service.flush() == 1
+    assert await _ledger(db, competition_id) == [(0, None, pytest.approx(90.0))]
+
+    # Закриття оновлює той самий рядок
+    assert not service.observe(USER_ID, competition_id, 0.01, 50 * SECOND)
+    assert await service.flush() == 1
+    assert await _ledger(db, competition_id) == [(0, 50 * SECOND, pytest.approx(120.0))]
+
+async def test_open_and_close_in_one_batch(db, competition_id):
+    service = _service(competition_id)
+
+    service.observe(USER_ID, competition_id, 0.07, 0)
+    service.observe(USER_ID, competition_id, 0.07, 20 * SECOND)
+    service.observe(USER_ID, competition_id, 0.0, 30 * SECOND)
+
+    assert await service.flush() == 2
+    assert await _ledger(db, competition_id) == [(0, 30 * SECOND, pytest.approx(70.0))]
+
+async def test_open_excursion_at_competition_end(db, competition_id):
+    service = _service(competition_id)
+
+    service.observe(USER_ID, competition_id, 0.07, 0)
+    service.observe(USER_ID, competition_id, 0.07, 20 * SECOND)
+    await service.flush()
+    service.observe(USER_ID, competition_id, 0.2, 30 * SECOND)
+
+    await service.finish_competition(competition_id)
+
+    assert await _ledger(db, competition_id) == [(0, None, pytest.approx(200.0))]
+    assert not service._states
+
+async def test_load_rebuilds_penalty_count_from_ledger(db, competition_id):
+    service = _service(competition_id)
+    for start in (0, 100 * SECOND):
+        service.observe(USER_ID, competition_id, 0.07, start)
+        service.observe(USER_ID, competition_id, 0.07, start + 20 * SECOND)
+        service.observe(USER_ID, competition_id, 0.0, start + 30 * SECOND)
+    await service.flush()
+
+    engine = StandingsEngine(snapshot_interval=60)
+    await engine.load()
+
+    assert engine.get(competition_id).penalty_count == 2
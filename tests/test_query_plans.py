@@ -0,0 +1,67 @@
+"""
+Регресія планів виконання гарячих запитів
+"""
+
+import ast
+import pathlib
+
+import aiosqlite
+import pytest
+
+from database.migrations.runner import apply_migrations
+from database.query_plans import COLD_QUERIES, HOT_QUERIES, explain, find_plan_violations
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# Код, запити якого мають бути зареєстровані в HOT_QUERIES або COLD_QUERIES
+SOURCES = ["services", "bot", "api", "database", "reprocess.py"]
+
+def _normalize(sql: str) -> str:
+    return " ".join(sql.split())
+
+def _source_queries():
+    """(файл:рядок, SQL) для всіх execute/executemany з літералом SQL"""
+
+    files = []
+    for source in SOURCES:
+        path = ROOT / source
+        files.extend(path.rglob("*.py") if path.is_dir() else [path])
+
+    for path in sorted(files):
+        if "migrations" in path.parts or path.name == "query_plans.py":
+            continue
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr in ("execute", "executemany")
+                and node.args
+                and isinstance(node.args[0], ast.Constant)
+                and isinstance(node.args[0].value, str)
+            ):
+                sql = _normalize(node.args[0].value)
+                if not sql.upper().startswith("PRAGMA"):
+                    yield f"{path.relative_to(ROOT)}:{node.lineno}", sql
+
+@pytest.fixture
+async def schema_db():
+    async with aiosqlite.connect(":memory:") as db:
+        await apply_migrations(db)
+        yield db
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+async def test_hot_query_uses_index(schema_db, name):
+    sql, params = HOT_QUERIES[name]
+    plan = await explain(schema_db, sql, params)
+    assert find_plan_violations(name, plan) == [], f"{name}: {plan}"
+
+def test_every_query_is_registered():
+    registered = {_normalize(sql) for sql, _ in HOT_QUERIES.values()}
+    registered |= {_normalize(sql) for sql in COLD_QUERIES.values()}
+
+    missing = [f"{location}: {sql}" for location, sql in _source_queries() if sql not in registered]
+    assert missing == [], "Запити поза database/query_plans.py:\n" + "\n".join(missing)
+
+def test_registries_do_not_overlap():
+    hot = {_normalize(sql) for sql, _ in HOT_QUERIES.values()}
+    assert not hot & {_normalize(sql) for sql in COLD_QUERIES.values()}
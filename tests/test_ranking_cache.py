@@ -0,0 +1,96 @@
+"""
+Кеш відповідей рейтингу: TTL, обмеження розміру та скидання
+"""
+
+import services.ranking_cache as ranking_cache_module
+import utils.cache as cache_module
+from services.leaderboard import Leaderboard
+from services.ranking_cache import RankingResponseCache
+from utils.cache import TTLCache
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    cache = TTLCache(ttl=30)
+
+    cache.set("a", 1)
+    clock.now += 29.9
+    assert cache.get("a") == 1
+    clock.now += 0.2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats == {"hits": 1, "misses": 1, "invalidations": 0}
+
+def test_least_recently_used_entry_is_dropped():
+    cache = TTLCache(ttl=60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+def _cache_with_board(monkeypatch, points: dict) -> RankingResponseCache:
+    board = Leaderboard()
+    for user_id, value in points.items():
+        board.update(user_id, value, "bronze")
+    board.is_loaded = True
+    monkeypatch.setattr(ranking_cache_module, "leaderboard", board)
+
+    cache = RankingResponseCache(ttl=60)
+    cache.set_top("топ")
+    cache.set_top("топ групи", group_id=5)
+    for user_id in points:
+        cache.set_user_stats(user_id, f"статистика {user_id}")
+        cache.set_mini_app_stats(user_id, f"mini app {user_id}")
+    return cache
+
+def test_user_invalidation_keeps_top_when_it_cannot_change(monkeypatch):
+    # 15 користувачів; десяте місце - 60 балів
+    cache = _cache_with_board(monkeypatch, {user_id: user_id * 10 for user_id in range(1, 16)})
+
+    cache.invalidate_user(2, points=30)
+    assert cache.get_user_stats(2) is None
+    assert cache.get_mini_app_stats(2) is None
+    assert cache.get_user_stats(3) == "статистика 3"
+    assert cache.get_top() == "топ"
+
+    # Зміна лише підсумків без балів теж не чіпає топ
+    cache.invalidate_user(3)
+    assert cache.get_top() == "топ"
+
+def test_user_invalidation_drops_top_when_user_reaches_it(monkeypatch):
+    cache = _cache_with_board(monkeypatch, {user_id: user_id * 10 for user_id in range(1, 16)})
+
+    cache.invalidate_user(2, points=60)
+    assert cache.get_top() is None
+    assert cache.get_top(5) == "топ групи"
+
+    cache.set_top("топ")
+    # Користувач із топу, навіть якщо бали нижчі за межу
+    cache.invalidate_user(15, points=1)
+    assert cache.get_top() is None
+
+def test_group_invalidation_is_separate(monkeypatch):
+    cache = _cache_with_board(monkeypatch, {1: 10})
+
+    cache.invalidate_group(5)
+    assert cache.get_top(5) is None
+    assert cache.get_top() == "топ"
+    assert cache.stats()["top"]["invalidations"] == 1
+
+def test_top_is_dropped_until_leaderboard_is_loaded(monkeypatch):
+    monkeypatch.setattr(ranking_cache_module, "leaderboard", Leaderboard())
+    cache = RankingResponseCache(ttl=60)
+    cache.set_top("топ")
+
+    cache.invalidate_user(1, points=1)
+    assert cache.get_top() is None
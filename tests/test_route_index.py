@@ -0,0 +1,42 @@
+"""
+Відстань до маршруту через сітку відрізків
+"""
+
+import math
+import random
+
+from services.route_index import CompiledRoute
+
+def _loop(size: int, radius_deg: float = 0.02):
+    return [
+        (50.45 + radius_deg * math.sin(2 * math.pi * i / size), 30.52 + radius_deg * math.cos(2 * math.pi * i / size))
+        for i in range(size + 1)
+    ]
+
+def test_grid_matches_brute_force():
+    rng = random.Random(7)
+    lat, lon = 50.45, 30.52
+    route = []
+    for _ in range(500):
+        lat += rng.uniform(-0.0005, 0.0005)
+        lon += rng.uniform(-0.0005, 0.0007)
+        route.append((lat, lon))
+    compiled = CompiledRoute(route)
+
+    for _ in range(200):
+        probe = (rng.uniform(50.42, 50.48), rng.uniform(30.50, 30.72))
+        x, y = compiled.project(*probe)
+        assert math.isclose(compiled.distance_km(*probe), compiled._brute_force(x, y), abs_tol=1e-9)
+
+def test_loop_center_falls_back_to_brute_force(monkeypatch):
+    compiled = CompiledRoute(_loop(10_000))
+    calls = []
+    brute_force = compiled._brute_force
+    monkeypatch.setattr(compiled, "_brute_force", lambda x, y: calls.append((x, y)) or brute_force(x, y))
+
+    # Центр петлі всередині меж маршруту, але до кола ~1.4-2.2 км
+    distance = compiled.distance_km(50.45, 30.52)
+
+    assert calls
+    assert 1.3 < distance < 2.3
+    assert compiled.distance_km(50.45 + 0.02, 30.52) < 0.01
@@ -0,0 +1,39 @@
+"""
+Допоміжні HTTP сервери не зупиняють бота, якщо порт зайнятий
+"""
+
+import socket
+
+import pytest
+from fastapi import FastAPI
+
+from api.server import ApiServer
+from utils.metrics import MetricsRegistry, MetricsServer
+
+@pytest.fixture
+def busy_port():
+    sock = socket.create_server(("127.0.0.1", 0))
+    yield sock.getsockname()[1]
+    sock.close()
+
+def _free_port() -> int:
+    with socket.create_server(("127.0.0.1", 0)) as sock:
+        return sock.getsockname()[1]
+
+async def test_api_server_survives_busy_port(busy_port):
+    server = ApiServer(FastAPI(), "127.0.0.1", busy_port)
+
+    assert await server.start() is False
+    await server.stop()
+
+async def test_api_server_starts_and_stops():
+    server = ApiServer(FastAPI(), "127.0.0.1", _free_port())
+
+    assert await server.start() is True
+    await server.stop()
+
+async def test_metrics_server_survives_busy_port(busy_port):
+    server = MetricsServer(MetricsRegistry(), "127.0.0.1", busy_port)
+
+    assert await server.start() is False
+    await server.stop()
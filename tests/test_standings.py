@@ -0,0 +1,49 @@
+"""
+Знімки результатів змагань та завершення змагання
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from services import standings_service
+from services.standings_service import StandingsEngine
+
+def _engine() -> StandingsEngine:
+    engine = StandingsEngine(snapshot_interval=60)
+    engine.join(1, "endurance", 7)
+    engine.join(2, "endurance", 7)
+    engine.record_point(7, 0.5, 10.0, 1000)
+    return engine
+
+async def test_finish_during_snapshot_leaves_no_stale_keys(db):
+    engine = _engine()
+
+    running = asyncio.create_task(engine.snapshot())
+    await asyncio.sleep(0)
+    await engine.finish(1)
+    await running
+
+    # Точка після завершення змагання 1 зараховується лише в змагання 2
+    assert engine.record_point(7, 0.5, 10.0, 2000) == [2]
+    assert await engine.snapshot() == 1
+    assert not engine._dirty
+    assert await engine.snapshot() == 0
+
+async def test_failed_snapshot_keeps_dirty_keys(db, monkeypatch):
+    engine = _engine()
+
+    @asynccontextmanager
+    async def broken_write():
+        raise RuntimeError("disk I/O error")
+        yield
+
+    monkeypatch.setattr(standings_service.db_pool, "write", broken_write)
+    with pytest.raises(RuntimeError):
+        await engine.snapshot()
+    assert engine._dirty == {(1, 7), (2, 7)}
+
+    monkeypatch.undo()
+    assert await engine.snapshot() == 2
+    assert not engine._dirty
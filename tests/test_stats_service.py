@@ -0,0 +1,76 @@
+"""
+Статистика Mini App: ETag та актуальність місця в рейтингу
+"""
+
+import json
+
+import pytest
+
+from services.leaderboard import Leaderboard
+from services.ranking_cache import RankingResponseCache
+from services.stats_service import StatsPayload, UserStatsService
+from services.user_state_service import UserStateStore
+
+ME, OTHER = 1201, 1202
+
+@pytest.mark.parametrize("header, expected", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", W/"abc"', True),
+    ('"x",W/"y" ,  "abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+    ('"x", W/"y"', False),
+    ("abc", False),
+    ('"*"', False),
+    ("", False),
+    (None, False),
+])
+def test_if_none_match_parsing(header, expected):
+    assert StatsPayload(body=b"{}", etag='"abc"').matches(header) is expected
+
+@pytest.fixture
+async def service(db):
+    async with db.write() as conn:
+        await conn.executemany(
+            "INSERT OR IGNORE INTO users (user_id, telegram_id, first_name) VALUES (?, ?, ?)",
+            [(ME, ME, "Я"), (OTHER, OTHER, "Інший")]
+        )
+        await conn.commit()
+
+    board = Leaderboard()
+    board.is_loaded = True
+    board.update(ME, 50, "bronze")
+    board.update(OTHER, 40, "bronze")
+
+    store = UserStateStore()
+    (await store.get(ME)).points = 50
+    return UserStatsService(cache=RankingResponseCache(ttl=60), board=board, state_store=store)
+
+async def test_repeated_polls_reuse_payload(service):
+    first = await service.get(ME)
+    assert await service.get(ME) is first
+    assert json.loads(first.body)["user"]["position"] == 1
+
+async def test_other_users_gains_refresh_position_and_etag(service):
+    before = await service.get(ME)
+
+    service.leaderboard.update(OTHER, 70, "bronze")
+    after = await service.get(ME)
+
+    assert after.etag != before.etag
+    assert not after.matches(before.etag)
+    data = json.loads(after.body)
+    assert data["user"]["position"] == 2
+    assert [row["points"] for row in data["leaderboard"]] == [70, 50]
+    assert [row["is_me"] for row in data["leaderboard"]] == [False, True]
+
+async def test_own_changes_refresh_after_invalidation(service):
+    before = await service.get(ME)
+
+    (await service.state_store.get(ME)).total_distance = 5.0
+    service.cache.invalidate_user(ME)
+    after = await service.get(ME)
+
+    assert after.etag != before.etag
+    assert json.loads(after.body)["user"]["distance_km"] == 5.0
@@ -0,0 +1,52 @@
+"""
+Мітки часу: старі naive значення однаково в міграції 004 та в to_epoch_ms
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from database.migrations.runner import discover_migrations
+from utils.timestamps import from_epoch_ms, to_epoch_ms
+
+LEGACY = "2024-03-10 14:25:36"
+
+@pytest.fixture
+def kyiv_summer_tz(monkeypatch):
+    """Сервер у поясі UTC+3 (POSIX запис без бази tzdata)"""
+
+    monkeypatch.setenv("TZ", "EEST-3")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def _migrate(db: sqlite3.Connection, versions):
+    for version, _, path in discover_migrations():
+        if version in versions:
+            with open(path, encoding="utf-8") as f:
+                db.executescript(f.read())
+
+def test_legacy_text_converts_as_local_time_in_both_paths(kyiv_summer_tz):
+    db = sqlite3.connect(":memory:")
+    _migrate(db, {1, 2, 3})
+    db.execute("INSERT INTO gps_tracks (user_id, latitude, longitude, timestamp) VALUES (1, 50.0, 30.0, ?)", (LEGACY,))
+    db.execute("""
+        INSERT INTO track_archive (user_id, day, point_count, first_timestamp, last_timestamp, payload)
+        VALUES (1, '2024-03-10', 1, ?, ?, x'')
+    """, (LEGACY, LEGACY))
+    _migrate(db, {4})
+
+    migrated = db.execute("SELECT timestamp FROM gps_tracks").fetchone()[0]
+    archived = db.execute("SELECT first_timestamp FROM track_archive").fetchone()[0]
+    runtime = to_epoch_ms(LEGACY)
+
+    assert migrated == archived == runtime
+    assert from_epoch_ms(runtime) == datetime(2024, 3, 10, 11, 25, 36, tzinfo=timezone.utc)
+    assert to_epoch_ms(datetime.fromisoformat(LEGACY)) == runtime
+
+def test_explicit_offset_is_kept(kyiv_summer_tz):
+    assert to_epoch_ms(LEGACY + "+00:00") == to_epoch_ms(datetime(2024, 3, 10, 14, 25, 36, tzinfo=timezone.utc))
+    assert to_epoch_ms(from_epoch_ms(1_700_000_000_123)) == 1_700_000_000_123
@@ -0,0 +1,64 @@
+"""
+Спрощення треків та запис кандидатів затихлих потоків
+"""
+
+import asyncio
+import time
+
+from database.models import GpsTrack
+from services.ingestion_service import GpsIngestionQueue
+from services.track_simplifier import TrackSimplifier
+
+def _straight(user_id: int, count: int, start: int = 0, interval_ms: int = 5000):
+    """Точки рівномірно на північ по прямій, ~11 м між сусідніми"""
+    return [
+        GpsTrack(
+            user_id=user_id, latitude=50.0 + i * 0.0001, longitude=30.0, timestamp=i * interval_ms, distance_km=0.011
+        )
+        for i in range(start, start + count)
+    ]
+
+def test_straight_line_keeps_only_candidate():
+    simplifier = TrackSimplifier(tolerance_m=5)
+    stored = [point for point in _straight(1, 10) for point in simplifier.add(point)]
+
+    assert len(stored) == 1
+    assert simplifier.flush_idle() == []
+
+def test_idle_stream_releases_candidate():
+    simplifier = TrackSimplifier(tolerance_m=5, max_gap_ms=1000)
+    points = _straight(1, 10, interval_ms=10)
+    for point in points:
+        simplifier.add(point)
+
+    assert simplifier.flush_idle(time.monotonic()) == []
+
+    flushed = simplifier.flush_idle(time.monotonic() + 2)
+    assert len(flushed) == 1
+    assert flushed[0].timestamp == points[-1].timestamp
+    assert abs(flushed[0].distance_km - 0.011 * 9) < 1e-9
+
+    # Потік забуто: наступна точка починає новий і зберігається одразу
+    assert len(simplifier.add(_straight(1, 1, start=20, interval_ms=10)[0])) == 1
+
+async def test_ingestion_writes_idle_candidates(db):
+    simplifier = TrackSimplifier(tolerance_m=5, max_gap_ms=50)
+    queue = GpsIngestionQueue(flush_interval=0.01, simplifier=simplifier, idle_check_interval=0.02)
+    async with db.write() as conn:
+        await conn.execute("INSERT INTO users (user_id, telegram_id, first_name) VALUES (401, 401, 'A')")
+        await conn.commit()
+
+    points = _straight(401, 10, interval_ms=1)
+    for point in points:
+        for stored in simplifier.add(point):
+            await queue.submit(stored)
+
+    await asyncio.sleep(0.3)
+    await queue.stop()
+
+    async with db.read() as conn:
+        cursor = await conn.execute("SELECT timestamp FROM gps_tracks WHERE user_id = 401 ORDER BY timestamp")
+        timestamps = [row[0] for row in await cursor.fetchall()]
+
+    assert timestamps == [points[0].timestamp, points[-1].timestamp]
+    assert queue.stats["idle_flushed"] == 1
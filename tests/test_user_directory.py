@@ -0,0 +1,85 @@
+"""
+Кеш user_id за telegram_id та AuthMiddleware
+"""
+
+import asyncio
+
+from aiogram.types import User
+
+from bot.middlewares.auth import AuthMiddleware
+from services.user_directory import UserContext, UserDirectory
+
+def _user(telegram_id: int, is_bot: bool = False) -> User:
+    return User(id=telegram_id, is_bot=is_bot, first_name="Тест", username=f"u{telegram_id}")
+
+async def test_unknown_user_is_not_cached(db):
+    directory = UserDirectory()
+
+    assert await directory.resolve(1301) is None
+    assert len(directory) == 0
+
+    user_id, created = await directory.ensure(1301, "u1301", "Тест")
+    assert created
+    # Реєстрація з іншого місця видна одразу, а повторне звернення - з кешу
+    assert await directory.resolve(1301) == user_id
+    assert directory.stats["hits"] == 1 and directory.stats["registrations"] == 1
+
+async def test_concurrent_registration_creates_one_user(db):
+    directory = UserDirectory()
+
+    results = await asyncio.gather(*(directory.ensure(1302, "u1302", "Тест") for _ in range(5)))
+
+    assert len({user_id for user_id, _ in results}) == 1
+    assert sum(created for _, created in results) == 1
+
+    async with db.read() as conn:
+        cursor = await conn.execute("SELECT COUNT(*) FROM users WHERE telegram_id = 1302")
+        assert (await cursor.fetchone())[0] == 1
+
+async def test_cache_is_bounded(db):
+    directory = UserDirectory(max_size=2)
+    ids = [(await directory.ensure(telegram_id, None, "Тест"))[0] for telegram_id in (1303, 1304, 1305)]
+
+    assert len(directory) == 2 and directory.stats["evictions"] == 1
+    # Витіснений запис знову читається з БД без повторної реєстрації
+    assert await directory.ensure(1303, None, "Тест") == (ids[0], False)
+
+async def test_context_carries_profile(db):
+    context = await UserDirectory().context(_user(1306))
+
+    assert (context.telegram_id, context.first_name, context.username, context.is_new) == (1306, "Тест", "u1306", True)
+
+async def test_middleware_sets_user_context(db):
+    middleware = AuthMiddleware(UserDirectory())
+    seen = []
+
+    async def handler(event, data):
+        seen.append(data["user_context"])
+        return "ok"
+
+    assert await middleware(handler, object(), {"event_from_user": _user(1307)}) == "ok"
+    assert seen[0].telegram_id == 1307 and seen[0].is_new
+
+    assert await middleware(handler, object(), {"event_from_user": _user(1307)}) == "ok"
+    assert seen[1].user_id == seen[0].user_id and not seen[1].is_new
+
+async def test_middleware_skips_bots_and_updates_without_user(db):
+    directory = UserDirectory()
+    middleware = AuthMiddleware(directory)
+
+    async def handler(event, data):
+        raise AssertionError("обробник не має викликатись")
+
+    assert await middleware(handler, object(), {"event_from_user": _user(1308, is_bot=True)}) is None
+    assert await middleware(handler, object(), {}) is None
+    assert await directory.resolve(1308) is None
+
+async def test_middleware_reuses_existing_context(db):
+    directory = UserDirectory()
+    context = UserContext(user_id=77, telegram_id=1309)
+
+    async def handler(event, data):
+        return data["user_context"]
+
+    assert await AuthMiddleware(directory)(handler, object(), {"event_from_user": _user(1309), "user_context": context}) is context
+    assert directory.stats["misses"] == 0
@@ -0,0 +1,51 @@
+"""
+Кеш стану користувачів та закріплення незаписаних станів
+"""
+
+from database.models import GpsTrack
+from services.ingestion_service import GpsIngestionQueue
+from services.user_state_service import UserStateStore, user_state_store
+
+async def test_lru_evicts_oldest(db):
+    store = UserStateStore(max_size=2)
+    for user_id in (101, 102, 103):
+        await store.get(user_id)
+
+    assert 101 not in store
+    assert 102 in store and 103 in store
+    assert store.stats["evictions"] == 1
+
+async def test_pinned_state_is_not_evicted(db):
+    store = UserStateStore(max_size=2)
+    state = await store.get(201)
+    state.points = 42
+    store.pin(201)
+
+    await store.get(202)
+    await store.get(203)
+
+    assert 201 in store
+    assert 202 not in store
+    assert (await store.get(201)).points == 42
+
+    # Пропущений стан переноситься в кінець черги витіснення
+    store.unpin(201)
+    await store.get(204)
+    await store.get(205)
+    assert 201 not in store
+
+async def test_writer_releases_pin_after_write(db):
+    queue = GpsIngestionQueue(flush_interval=0.01)
+    async with db.write() as conn:
+        await conn.execute("INSERT INTO users (user_id, telegram_id, first_name) VALUES (301, 301, 'A')")
+        await conn.commit()
+
+    state = await user_state_store.get(301)
+    user_state_store.pin(301)
+    state.total_distance = 1.5
+    await queue.submit(GpsTrack(user_id=301, latitude=50.45, longitude=30.52, timestamp=1), state)
+    assert 301 in user_state_store._pins
+
+    await queue.flush()
+    await queue.stop()
+    assert 301 not in user_state_store._pins
@@ -0,0 +1,38 @@
+"""
+Перевірка секрету webhook
+"""
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot.webhook import SECRET_HEADER, WEBHOOK_HANDLER_KEY, create_webhook_app
+
+UPDATE = {"update_id": 1}
+
+@pytest.fixture
+async def bot():
+    bot = Bot(token="123456:TEST")
+    yield bot
+    await bot.session.close()
+
+def test_secret_is_required(bot):
+    with pytest.raises(ValueError):
+        create_webhook_app(bot, Dispatcher(), secret="")
+
+@pytest.mark.parametrize("headers", [{}, {SECRET_HEADER: ""}, {SECRET_HEADER: "wrong"}])
+async def test_update_without_valid_secret_is_rejected(bot, headers):
+    app = create_webhook_app(bot, Dispatcher(), secret="s3cret")
+    async with TestClient(TestServer(app)) as client:
+        response = await client.post("/webhook", json=UPDATE, headers=headers)
+
+    assert response.status == 401
+    assert app[WEBHOOK_HANDLER_KEY].stats["rejected"] == 1
+
+async def test_update_with_secret_is_accepted(bot):
+    app = create_webhook_app(bot, Dispatcher(), secret="s3cret")
+    async with TestClient(TestServer(app)) as client:
+        response = await client.post("/webhook", json=UPDATE, headers={SECRET_HEADER: "s3cret"})
+
+    assert response.status == 200
+    assert app[WEBHOOK_HANDLER_KEY].stats["received"] == 1
@@ -0,0 +1,59 @@
+"""
+Кеш з часом життя записів (TTL) та обмеженим розміром
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class TTLCache:
+    """LRU кеш, записи якого застарівають через ttl секунд"""
+
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Значення за ключем або None, якщо його немає чи воно застаріло"""
+
+        item = self._data.get(key)
+        if item is not None:
+            expires_at, value = item
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.stats["hits"] += 1
+                return value
+            del self._data[key]
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: Hashable, value: Any):
+        """Збереження значення"""
+
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Видалення значення за ключем"""
+
+        if self._data.pop(key, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        """Очищення кешу"""
+
+        self.stats["invalidations"] += len(self._data)
+        self._data.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
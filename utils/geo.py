@@ -0,0 +1,105 @@
+"""
+Геодезичні розрахунки: скалярні для однієї пари точок та векторизовані над масивами NumPy
+"""
+
+import math
+import numpy as np
+from typing import Sequence, Tuple, Union
+
+EARTH_RADIUS_KM = 6371.0
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Відстань між двома точками в км (скалярний шлях без NumPy)"""
+
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def haversine_many(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike) -> np.ndarray:
+    """Відстані в км між парами точок (аргументи транслюються за правилами NumPy)"""
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    # clip захищає arcsin від похибки округлення для протилежних точок
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def distances_to(lat: float, lon: float, lats: ArrayLike, lons: ArrayLike) -> np.ndarray:
+    """Відстані в км від однієї точки до кожної з масиву"""
+    return haversine_many(lat, lon, lats, lons)
+
+def bearings_deg(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike) -> np.ndarray:
+    """Початковий азимут з першої точки на другу, градуси [0, 360)"""
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    dlon = lon2 - lon1
+    x = np.sin(dlon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return np.degrees(np.arctan2(x, y)) % 360.0
+
+def segment_lengths(lats: ArrayLike, lons: ArrayLike) -> np.ndarray:
+    """Довжини відрізків між сусідніми точками треку (n - 1 значень)"""
+
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if lats.size < 2:
+        return np.zeros(0)
+    return haversine_many(lats[:-1], lons[:-1], lats[1:], lons[1:])
+
+def cumulative_distance(lats: ArrayLike, lons: ArrayLike) -> np.ndarray:
+    """Пройдена відстань до кожної точки треку, км (перше значення 0)"""
+
+    lats = np.asarray(lats, dtype=np.float64)
+    if lats.size == 0:
+        return np.zeros(0)
+    return np.concatenate(([0.0], np.cumsum(segment_lengths(lats, lons))))
+
+def speed_series(
+    lats: ArrayLike,
+    lons: ArrayLike,
+    timestamps_ms: ArrayLike,
+    max_speed_kmh: float = 100.0
+) -> np.ndarray:
+    """
+    Швидкість у кожній точці треку за попереднім відрізком, км/год.
+
+    Перша точка та відрізки з неконтрольованим часом (dt <= 0) дають 0,
+    швидкість обмежується max_speed_kmh, як і в GpsService.
+    """
+
+    timestamps = np.asarray(timestamps_ms, dtype=np.float64)
+    speeds = np.zeros(timestamps.size)
+    if timestamps.size < 2:
+        return speeds
+
+    hours = np.diff(timestamps) / 3_600_000
+    lengths = segment_lengths(lats, lons)
+    moving = hours > 0
+    speeds[1:][moving] = np.minimum(lengths[moving] / hours[moving], max_speed_kmh)
+    return speeds
+
+def local_scale(origin_lat: float) -> Tuple[float, float]:
+    """Км на градус довготи та широти в околі origin_lat (локальна рівнопрямокутна проекція)"""
+
+    km_per_degree = EARTH_RADIUS_KM * math.pi / 180
+    return km_per_degree * math.cos(math.radians(origin_lat)), km_per_degree
+
+def point_segment_distance(x: float, y: float, x1: float, y1: float, x2: float, y2: float) -> float:
+    """Відстань на площині від точки (x, y) до відрізка (x1, y1)-(x2, y2)"""
+
+    dx, dy = x2 - x1, y2 - y1
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0.0:
+        return math.hypot(x - x1, y - y1)
+
+    t = ((x - x1) * dx + (y - y1) * dy) / length_sq
+    t = 0.0 if t < 0.0 else 1.0 if t > 1.0 else t
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+def as_coordinates(points: Sequence[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Розбиття послідовності (lat, lon) на масиви широт та довгот"""
+
+    coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return coords[:, 0], coords[:, 1]
@@ -4,11 +4,26 @@
 
 import logging
 import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List
 from loguru import logger as loguru_logger
 from config import config
 
+_configured = False
+
 def setup_logger():
-    """Налаштування логера"""
+    """
+    Налаштування логера (один раз на процес; повторні виклики лише повертають його).
+
+    Обидва приймачі працюють через чергу loguru (enqueue=True): виклик логера
+    в циклі подій лише ставить запис у чергу, а запис у консоль і файл
+    виконує окремий потік.
+    """
+
+    global _configured
+    if _configured:
+        return loguru_logger
 
     # Видалення стандартного обробника loguru
     loguru_logger.remove()
@@ -18,7 +33,8 @@ def setup_logger():
         sys.stdout,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         level=config.LOG_LEVEL,
-        colorize=True
+        colorize=True,
+        enqueue=True
     )
 
     # Додавання файлового логування
@@ -27,7 +43,69 @@ def setup_logger():
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
         level=config.LOG_LEVEL,
         rotation="10 MB",
-        retention="7 days"
+        retention="7 days",
+        enqueue=True
     )
 
+    _configured = True
     return loguru_logger
+
+class LogSampler:
+    """
+    Вибірка записів гарячого шляху: не більше одного запису на ключ
+    (напр. ("location", user_id)) за interval секунд.
+
+    Пропущені записи підраховуються і додаються до наступного записаного
+    рядка того ж ключа. Помилки через вибірку не пропускаються - їх
+    логують напряму. interval = 0 вимикає вибірку.
+    """
+
+    def __init__(self, interval: float, max_keys: int = 10000):
+        self.interval = interval
+        self.max_keys = max_keys
+        # ключ -> [коли дозволено наступний запис (monotonic), пропущено з останнього]
+        self._keys: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+        self.stats: Dict[str, int] = {"emitted": 0, "suppressed": 0}
+
+    def log(self, level: str, key: Hashable, message: str, *args: Any, **kwargs: Any):
+        """
+        Запис через loguru з вибіркою за ключем.
+
+        message форматується лише для записаних рядків: аргументи
+        передаються окремо, у стилі loguru ("... {} ...", value).
+        """
+        self._log(level, key, message, args, kwargs)
+
+    def debug(self, key: Hashable, message: str, *args: Any, **kwargs: Any):
+        self._log("DEBUG", key, message, args, kwargs)
+
+    def info(self, key: Hashable, message: str, *args: Any, **kwargs: Any):
+        self._log("INFO", key, message, args, kwargs)
+
+    def warning(self, key: Hashable, message: str, *args: Any, **kwargs: Any):
+        self._log("WARNING", key, message, args, kwargs)
+
+    def _log(self, level: str, key: Hashable, message: str, args: tuple, kwargs: Dict[str, Any]):
+        if self.interval > 0:
+            now = time.monotonic()
+            entry = self._keys.get(key)
+            if entry is not None and now < entry[0]:
+                entry[1] += 1
+                self.stats["suppressed"] += 1
+                return
+
+            suppressed = entry[1] if entry is not None else 0
+            self._keys[key] = [now + self.interval, 0]
+            self._keys.move_to_end(key)
+            if len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+
+            if suppressed:
+                message += " (ще {} за {:g} с)"
+                args += (suppressed, self.interval)
+
+        self.stats["emitted"] += 1
+        # depth=2: у записі функція та рядок того, хто викликав log/info/...
+        loguru_logger.opt(depth=2).log(level, message, *args, **kwargs)
+
+log_sampler = LogSampler(config.LOG_SAMPLE_INTERVAL_SECONDS)
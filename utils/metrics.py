@@ -0,0 +1,269 @@
+"""
+Метрики у текстовому форматі Prometheus та локальний HTTP сервер для них
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from utils.logger import log_sampler, setup_logger
+
+logger = setup_logger()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Межі кошиків для тривалостей у секундах: від 0.5 мс до 10 с
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: очікується мітки {self.labelnames}, отримано {labels}")
+        return tuple(str(value) for value in labels)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """Лічильник, що лише зростає"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._values.items():
+            yield self.name, self._labels(key), value
+
+class Gauge(_Metric):
+    """Поточне значення, що може зростати та зменшуватись"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str):
+        self._values[self._key(labels)] = value
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._values.items():
+            yield self.name, self._labels(key), value
+
+class Histogram(_Metric):
+    """Гістограма з фіксованими кошиками (кумулятивними при виводі)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # мітки -> [лічильники кошиків (останній - +Inf), сума, кількість]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def samples(self) -> Iterable[Sample]:
+        for key, (counts, total, count) in self._series.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+class MetricsRegistry:
+    """
+    Реєстр метрик процесу.
+
+    Окрім власних метрик, реєстр опитує колектори - функції, що повертають
+    знімок уже наявних лічильників сервісів (stats словників) у момент
+    запиту /metrics, тож гарячий шлях не дублює їх облік.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]):
+        """Колектор повертає (назва, тип, опис, семпли) для кожної метрики"""
+        self._collectors.append(collector)
+
+    def register_stats(
+        self,
+        name: str,
+        documentation: str,
+        getter: Callable[[], Dict[str, float]],
+        label: str = "event",
+        kind: str = "counter"
+    ):
+        """Експорт словника stats сервісу як однієї метрики з міткою за ключем"""
+
+        def collect():
+            samples = [(name, {label: key}, value) for key, value in getter().items()]
+            return [(name, kind, documentation, samples)]
+
+        self.register_collector(collect)
+
+    def render(self) -> str:
+        """Усі метрики в текстовому форматі Prometheus"""
+
+        lines = []
+
+        def emit(name: str, kind: str, documentation: str, samples: Iterable[Sample]):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+        for metric in self._metrics.values():
+            emit(metric.name, metric.kind, metric.documentation, metric.samples())
+
+        for collector in self._collectors:
+            try:
+                for name, kind, documentation, samples in collector():
+                    emit(name, kind, documentation, samples)
+            except Exception as e:
+                logger.error(f"❌ Помилка колектора метрик: {e}")
+
+        return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """Локальний HTTP сервер з /metrics для Prometheus"""
+
+    def __init__(self, registry: "MetricsRegistry", host: str = "127.0.0.1", port: int = 9100):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        started = time.perf_counter()
+        body = self.registry.render()
+        scrape_duration.observe(time.perf_counter() - started)
+        return web.Response(body=body.encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self) -> bool:
+        """Запуск сервера; False, якщо адреса недоступна (бот працює далі без /metrics)"""
+
+        if self._runner is not None:
+            return True
+
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except OSError as e:
+            logger.error(f"❌ Сервер метрик не запущено: {self.host}:{self.port} недоступний ({e})")
+            await self.stop()
+            return False
+
+        logger.info(f"📈 Метрики доступні на http://{self.host}:{self.port}/metrics")
+        return True
+
+    async def stop(self):
+        """Зупинка сервера"""
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+metrics = MetricsRegistry()
+
+scrape_duration = metrics.histogram("metrics_scrape_duration_seconds", "Час формування відповіді /metrics")
+
+metrics.register_stats(
+    "log_sampled_records_total", "Записані та пропущені вибіркою записи гарячого шляху", lambda: log_sampler.stats
+)
@@ -0,0 +1,42 @@
+"""
+Мітки часу як цілі мілісекунди епохи (UTC)
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Union
+
+TimestampLike = Union[int, float, str, datetime]
+
+def now_ms() -> int:
+    """Поточний час у мілісекундах епохи"""
+    return time.time_ns() // 1_000_000
+
+def to_epoch_ms(value: TimestampLike) -> int:
+    """
+    Перетворення мітки часу в мілісекунди епохи.
+
+    Сумісність зі старими рядками: ISO текст без зсуву та naive datetime
+    вважаються місцевим часом процесу (їх писав datetime.now()), як і в
+    міграції 004 з модифікатором 'utc'. Значення в UTC передаються з явним
+    зсувом (+00:00) або як aware datetime.
+    """
+
+    if isinstance(value, int):
+        return value
+
+    if isinstance(value, float):
+        return int(value)
+
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+
+    if value.tzinfo is None:
+        # astimezone для naive datetime бере часовий пояс процесу, як і SQLite
+        value = value.astimezone(timezone.utc)
+
+    return int(round(value.timestamp() * 1000))
+
+def from_epoch_ms(value: int) -> datetime:
+    """Мілісекунди епохи в datetime з часовою зоною UTC"""
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc)